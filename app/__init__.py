@@ -3,6 +3,8 @@ from .rag import RAGService
 from .schemas import (
     QueryRequest,
     QueryResponse,
+    BatchQueryRequest,
+    BatchQueryResponse,
     DocumentResponse,
     DocumentList,
     ErrorResponse
@@ -13,6 +15,8 @@ __all__ = [
     'RAGService',
     'QueryRequest',
     'QueryResponse',
+    'BatchQueryRequest',
+    'BatchQueryResponse',
     'DocumentResponse',
     'DocumentList',
     'ErrorResponse'
@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+class AdmissionRejected(Exception):
+    def __init__(self, message: str, retry_after: int):
+        """
+        Raised when the LLM cannot take a request within its queue limits.
+
+        Args:
+            message: Why the request was rejected
+            retry_after: Suggested seconds before retrying
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class AdmissionController:
+    def __init__(self, max_concurrency: int = 2, max_queue: int = 16, queue_timeout: float = 30.0):
+        """
+        Bound concurrent LLM generations with a bounded, deadline-limited wait queue.
+
+        Slots are accounted on a single event loop, the first one to use the
+        controller. Async callers on other loops and synchronous callers on
+        other threads are handed over to it, so every caller shares one limit.
+
+        Args:
+            max_concurrency: Generations allowed to run at once
+            max_queue: Requests allowed to wait for a slot; more are rejected immediately
+            queue_timeout: Seconds a request may wait for a slot before it is rejected
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._service_time = None  # moving average of seconds a slot is held
+
+    def retry_after(self) -> int:
+        """Estimate seconds until a slot frees up for a new request."""
+        service_time = self._service_time or 1.0
+        return max(1, math.ceil(service_time * (self.waiting + 1) / self.max_concurrency))
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        self.rejected += 1
+        retry_after = self.retry_after()
+        logger.warning(f"LLM admission rejected ({reason}), retry after {retry_after}s")
+        return AdmissionRejected(f"LLM is overloaded: {reason}", retry_after)
+
+    def ensure_capacity(self) -> None:
+        """
+        Fail fast if a new request would be rejected for a full queue.
+
+        Raises:
+            AdmissionRejected: If every slot is busy and the wait queue is full
+        """
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            raise self._reject("queue is full")
+
+    @staticmethod
+    def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+
+    def _owner_loop(self, candidate: Optional[asyncio.AbstractEventLoop] = None) -> asyncio.AbstractEventLoop:
+        """
+        The loop slots are accounted on, adopting candidate if there is none yet.
+
+        Without a candidate (a synchronous caller came first), a private loop
+        is started on a daemon thread.
+        """
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                if candidate is None:
+                    candidate = asyncio.new_event_loop()
+                    threading.Thread(target=candidate.run_forever, name="llm-admission", daemon=True).start()
+                if self._loop is not None:
+                    # Slots held on a closed loop can never be released
+                    self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                    self.in_flight = self.waiting = 0
+                self._loop = candidate
+            return self._loop
+
+    async def acquire(self) -> None:
+        """
+        Wait for a generation slot.
+
+        Raises:
+            AdmissionRejected: If the queue is full or the deadline passes
+        """
+        loop = asyncio.get_running_loop()
+        owner = self._owner_loop(loop)
+        if owner is not loop:
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._acquire(), owner))
+        else:
+            await self._acquire()
+
+    async def _acquire(self) -> None:
+        """Wait for a generation slot on the owner loop."""
+        self.ensure_capacity()
+        start_time = time.monotonic()
+        if self._semaphore.locked():
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise self._reject(f"no slot within {self.queue_timeout:g}s")
+            finally:
+                self.waiting -= 1
+        else:
+            # A free slot is taken without suspending, so the counters stay exact
+            await self._semaphore.acquire()
+        waited = time.monotonic() - start_time
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+        self.admitted += 1
+        self.in_flight += 1
+
+    def release(self, held: float = None) -> None:
+        """
+        Return a generation slot.
+
+        Args:
+            held: Seconds the slot was held, used to estimate Retry-After
+        """
+        if self._running_loop() is not self._loop:
+            self._loop.call_soon_threadsafe(self._release, held)
+        else:
+            self._release(held)
+
+    def _release(self, held: float = None) -> None:
+        """Return a generation slot on the owner loop."""
+        self.in_flight -= 1
+        self._semaphore.release()
+        if held is not None:
+            if self._service_time is None:
+                self._service_time = held
+            else:
+                self._service_time = 0.8 * self._service_time + 0.2 * held
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a generation slot for the duration of the block."""
+        await self.acquire()
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start_time)
+
+    @contextmanager
+    def blocking_slot(self) -> Iterator[None]:
+        """
+        Hold a generation slot for the duration of the block, from synchronous code.
+
+        Raises:
+            AdmissionRejected: If the queue is full or the deadline passes
+            RuntimeError: If called on the controller's event loop, which it would block
+        """
+        loop = self._owner_loop()
+        if self._running_loop() is loop:
+            raise RuntimeError("blocking_slot would block the event loop; use slot() instead")
+        asyncio.run_coroutine_threadsafe(self._acquire(), loop).result()
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start_time)
+
+    def stats(self) -> Dict[str, float]:
+        """Get queue depth, wait time and admission counters for monitoring."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_wait_ms": self._total_wait / self.admitted * 1000 if self.admitted else 0.0,
+            "max_wait_ms": self._max_wait * 1000
+        }
@@ -0,0 +1,108 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        embed: Callable[[List[str]], Sequence[Sequence[float]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0
+    ):
+        """
+        Merge embedding requests from concurrent threads into batched model calls.
+
+        The first request of a batch waits at most max_wait_ms for others to
+        join, so added latency is bounded by that setting plus the forward pass.
+
+        Args:
+            embed: Embeds a list of texts in one model call
+            max_batch_size: Texts that trigger an immediate flush
+            max_wait_ms: Longest time a request waits for a batch to fill
+        """
+        self._embed = embed
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.texts = 0
+        self._requests: "queue.Queue" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts as part of the next batch, blocking until the vectors are ready.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List[List[float]]: One vector per text
+        """
+        if not texts:
+            return []
+        future: Future = Future()
+        self._requests.put((list(texts), future))
+        return future.result()
+
+    def _collect(self, first) -> List:
+        """Gather requests until the batch is full or the first one has waited long enough."""
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is _STOP:
+                self._requests.put(_STOP)
+                break
+            batch.append(request)
+            size += len(request[0])
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            first = self._requests.get()
+            if first is _STOP:
+                return
+            batch = self._collect(first)
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                vectors = self._embed(texts)
+            except Exception as e:
+                logger.error(f"Batched embedding of {len(texts)} texts failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.texts += len(texts)
+            offset = 0
+            for request_texts, future in batch:
+                count = len(request_texts)
+                future.set_result([[float(x) for x in v] for v in vectors[offset:offset + count]])
+                offset += count
+
+    def close(self) -> None:
+        """Stop the worker once queued requests are served."""
+        self._requests.put(_STOP)
+        self._worker.join(timeout=5)
+
+    def stats(self) -> Dict[str, float]:
+        """Get batch counters for monitoring."""
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "avg_batch_size": self.texts / self.batches if self.batches else 0.0
+        }
@@ -0,0 +1,231 @@
+import hashlib
+import itertools
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+_whitespace = re.compile(r'\s+')
+
+def normalize_question(text: str) -> str:
+    """Normalize question text so trivially different spellings share a cache entry."""
+    text = unicodedata.normalize('NFKC', text)
+    return _whitespace.sub(' ', text).strip().casefold()
+
+class EmbeddingCache:
+    def __init__(self, max_size: int = 1024, ttl: float = 3600.0):
+        """
+        Bounded LRU cache of query embeddings with a time-to-live.
+
+        Args:
+            max_size: Maximum number of cached vectors
+            ttl: Seconds an entry stays valid; 0 disables expiry
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, List[float]]]" = OrderedDict()
+
+    def get(self, model_name: str, text: str) -> Optional[List[float]]:
+        """
+        Look up the embedding of a text for a model.
+
+        Args:
+            model_name: Name of the embedding model
+            text: The text that was embedded
+
+        Returns:
+            Optional[List[float]]: The cached vector, or None on a miss
+        """
+        key = (model_name, normalize_question(text))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, model_name: str, text: str, embedding: List[float]) -> None:
+        """
+        Store the embedding of a text for a model, evicting the least recently used entry if full.
+
+        Args:
+            model_name: Name of the embedding model
+            text: The text that was embedded
+            embedding: The embedding vector
+        """
+        if self.max_size <= 0:
+            return
+        key = (model_name, normalize_question(text))
+        with self._lock:
+            self._entries[key] = (time.monotonic(), embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached vectors."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Get hit/miss counters for monitoring."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+@dataclass
+class _CachedAnswer:
+    """
+    A generated answer together with what it was generated from.
+
+    Attributes:
+        scope (Hashable): Collection version, retrieved chunk set and chat history key
+        embedding (np.ndarray): Unit-normalized question embedding
+        answer (str): The generated answer
+    """
+    scope: Hashable
+    embedding: np.ndarray
+    answer: str
+
+class AnswerCache:
+    def __init__(self, max_size: int = 256, threshold: float = 0.95):
+        """
+        Size-bounded semantic cache of generated answers.
+
+        A cached answer is only reused when it was generated from the same
+        collection version, the same retrieved chunks and the same chat
+        history, and its question embedding is within the cosine threshold.
+
+        Args:
+            max_size: Maximum number of cached answers; 0 disables the cache
+            threshold: Minimum cosine similarity between question embeddings
+        """
+        self.max_size = max_size
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._entries: "OrderedDict[int, _CachedAnswer]" = OrderedDict()
+        self._scopes: Dict[Hashable, List[int]] = {}
+
+    @staticmethod
+    def make_scope(collection_version: int, chunk_ids: List[str], chat_history: str = "") -> Tuple[int, FrozenSet[str], str]:
+        """
+        Build the exact-match part of a cache key.
+
+        Args:
+            collection_version: Version of the collection the chunks came from
+            chunk_ids: IDs of the retrieved chunks
+            chat_history: Formatted chat history included in the prompt
+
+        Returns:
+            Tuple: Hashable scope for get and put
+        """
+        history_key = hashlib.sha1(chat_history.encode('utf-8')).hexdigest() if chat_history else ""
+        return collection_version, frozenset(chunk_ids), history_key
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        """Scale an embedding to unit length so dot products are cosines."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, scope: Hashable, embedding) -> Optional[str]:
+        """
+        Find a cached answer for a semantically equivalent question.
+
+        Args:
+            scope: Scope built with make_scope
+            embedding: Question embedding
+
+        Returns:
+            Optional[str]: The cached answer, or None on a miss
+        """
+        if self.max_size <= 0:
+            return None
+        query = self._normalize(embedding)
+        with self._lock:
+            entry_ids = self._scopes.get(scope, [])
+            best_id = None
+            if entry_ids:
+                matrix = np.stack([self._entries[i].embedding for i in entry_ids])
+                scores = matrix @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    best_id = entry_ids[best]
+            if best_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id].answer
+
+    def put(self, scope: Hashable, embedding, answer: str) -> None:
+        """
+        Cache an answer, evicting the least recently used one if full.
+
+        Args:
+            scope: Scope built with make_scope
+            embedding: Question embedding
+            answer: The generated answer
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = _CachedAnswer(scope, self._normalize(embedding), answer)
+            self._scopes.setdefault(scope, []).append(entry_id)
+            while len(self._entries) > self.max_size:
+                evicted_id, evicted = self._entries.popitem(last=False)
+                ids = self._scopes[evicted.scope]
+                ids.remove(evicted_id)
+                if not ids:
+                    del self._scopes[evicted.scope]
+
+    def invalidate_before(self, collection_version: int) -> None:
+        """Drop answers generated from older collection versions."""
+        with self._lock:
+            stale = [i for i, e in self._entries.items() if e.scope[0] < collection_version]
+            for entry_id in stale:
+                entry = self._entries.pop(entry_id)
+                ids = self._scopes[entry.scope]
+                ids.remove(entry_id)
+                if not ids:
+                    del self._scopes[entry.scope]
+
+    def clear(self) -> None:
+        """Drop all cached answers."""
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Get hit/miss counters for monitoring."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
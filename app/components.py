@@ -0,0 +1,178 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+LOADING = "loading"
+LOADED = "loaded"  # Loaded but not warmed up yet
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+
+class _Component:
+    def __init__(self, load: Callable[[], Any], warm_up: Optional[Callable[[Any], None]]):
+        self.load = load
+        self.warm_up = warm_up
+        self.lock = threading.Lock()
+        self.instance: Any = None
+        self.loaded = False
+        self.awaiting_warm_up = False  # A warm-up pass will still warm this component
+        self.state = PENDING
+        self.error: Optional[str] = None
+        self.load_ms: Optional[float] = None
+        self.warm_up_ms: Optional[float] = None
+
+class ComponentRegistry:
+    def __init__(self, lazy: bool = False):
+        """
+        Load expensive components on first use, at most once each.
+
+        Components are registered with a loader and an optional warm-up
+        that exercises the loaded instance (a dummy embed, convert or
+        search), so lazily initialized internals are ready before real
+        traffic arrives. Loading is thread-safe; concurrent callers of
+        get wait for a single load.
+
+        A component loaded on first use outside a warm-up pass, or in use
+        after its warm-up failed, counts as ready: warm-ups only save
+        first-request latency, so skipping one must not keep the process
+        out of rotation.
+
+        In lazy mode no warm-up pass runs, so a component that has not been
+        used yet counts as ready too: some only load on traffic, such as
+        the first upload, that a process reporting unready would never get.
+
+        Args:
+            lazy: Whether components load on first use instead of in a warm-up pass
+        """
+        self.lazy = lazy
+        self._components: Dict[str, _Component] = {}
+
+    def register(self, name: str, load: Callable[[], Any], warm_up: Optional[Callable[[Any], None]] = None) -> None:
+        """
+        Register a component.
+
+        Args:
+            name: Component name used by get and in status reports
+            load: Creates the component
+            warm_up: Exercises a loaded component; run by warm_up only
+        """
+        self._components[name] = _Component(load, warm_up)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._components
+
+    def is_loaded(self, name: str) -> bool:
+        """Whether a component has been loaded, without loading it."""
+        component = self._components.get(name)
+        return component is not None and component.loaded
+
+    def peek(self, name: str) -> Any:
+        """The component if it has been loaded, else None."""
+        component = self._components.get(name)
+        return component.instance if component is not None and component.loaded else None
+
+    def get(self, name: str) -> Any:
+        """
+        Return a component, loading it on first use.
+
+        Args:
+            name: Registered component name
+
+        Returns:
+            The loaded component
+
+        Raises:
+            KeyError: If no component is registered under name
+            Exception: Whatever the loader raised; the next call retries
+        """
+        component = self._components[name]
+        if component.loaded:
+            if component.state == FAILED:
+                # Its warm-up failed, but it loaded and is serving; keep the error for diagnosis
+                component.state = READY
+            return component.instance
+        with component.lock:
+            if not component.loaded:
+                component.state = LOADING
+                start_time = time.perf_counter()
+                try:
+                    component.instance = component.load()
+                except Exception as e:
+                    component.state = FAILED
+                    component.error = str(e)
+                    logger.error(f"Failed to load {name}: {e}")
+                    raise
+                component.load_ms = (time.perf_counter() - start_time) * 1000
+                component.error = None
+                component.loaded = True
+                warming = component.warm_up is not None and component.awaiting_warm_up
+                component.state = LOADED if warming else READY
+                logger.info(f"Loaded {name} in {component.load_ms:.0f}ms")
+        return component.instance
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> bool:
+        """
+        Load and warm up components in registration order.
+
+        A failing component is recorded and skipped; the rest still warm up.
+
+        Args:
+            names: Components to warm up. Defaults to all of them
+
+        Returns:
+            bool: Whether every component warmed up successfully
+        """
+        success = True
+        names = list(names if names is not None else self._components)
+        for name in names:
+            self._components[name].awaiting_warm_up = True
+        for name in names:
+            component = self._components[name]
+            if component.state == READY:
+                component.awaiting_warm_up = False
+                continue
+            try:
+                instance = self.get(name)
+                if component.warm_up is not None:
+                    component.state = WARMING
+                    start_time = time.perf_counter()
+                    component.warm_up(instance)
+                    component.warm_up_ms = (time.perf_counter() - start_time) * 1000
+                    logger.info(f"Warmed up {name} in {component.warm_up_ms:.0f}ms")
+                component.state = READY
+            except Exception as e:
+                component.state = FAILED
+                component.error = str(e)
+                logger.error(f"Failed to warm up {name}: {e}")
+                success = False
+            finally:
+                component.awaiting_warm_up = False
+        return success
+
+    def start_warm_up(self) -> threading.Thread:
+        """Warm up all components on a background thread."""
+        thread = threading.Thread(target=self.warm_up, name="component-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    @property
+    def ready(self) -> bool:
+        """Whether every component is loaded and warmed up, or in lazy mode not loading or failed."""
+        accepted = (READY, PENDING) if self.lazy else (READY,)
+        return all(component.state in accepted for component in self._components.values())
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Per-component state, timings and last error."""
+        return {
+            name: {
+                "state": component.state,
+                "load_ms": round(component.load_ms, 1) if component.load_ms is not None else None,
+                "warm_up_ms": round(component.warm_up_ms, 1) if component.warm_up_ms is not None else None,
+                "error": component.error
+            }
+            for name, component in self._components.items()
+        }
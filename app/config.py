@@ -12,23 +12,84 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
     # Databases
+    VECTOR_STORE: str = "chroma"  # "chroma" or "flat" (memory-mapped flat index)
     CHROMA_DB_PATH: str = "./data/chroma_db"
+    CHROMA_SERVER_HOST: str = ""  # Use a shared Chroma server instead of CHROMA_DB_PATH (multi-worker mode)
+    CHROMA_SERVER_PORT: int = 8001
+    FLAT_STORE_PATH: str = "./data/flat_store"
+    VECTOR_PRECISION: str = "float16"  # Flat store vector precision: "float16" or "float32"
+    COLLECTION_STATS_PATH: str = "./data/chroma_db/collection_stats.json"
+    BM25_INDEX_PATH: str = "./data/chroma_db/bm25_index.pkl"
     MONGODB_URL: str = "mongodb://localhost:27017"
     MONGODB_DB_NAME: str = "ragapp"
     
     # Models
     EMBEDDING_MODEL: str = "ibm-granite/granite-embedding-278m-multilingual"
+    EMBEDDING_DIM: int = 0       # Truncate embeddings to this many dimensions (0 = full width)
+    EMBEDDING_BACKEND: str = "torch"  # "torch" or "onnx-int8" (quantized ONNX on onnxruntime)
+    ONNX_MODEL_DIR: str = "./data/onnx"  # Where quantized ONNX exports are cached
+    EMBEDDING_WORKERS: int = 0   # Embedding worker processes (0 = embed in the API process)
+    EMBEDDING_SERVICE_SOCKET: str = ""  # Unix socket of a shared embedding service (multi-worker mode)
+    EMBEDDING_SERVICE_AUTHKEY: str = "ragapp-embeddings"  # Shared secret of the embedding service
+    WARM_UP_ON_STARTUP: bool = True  # Load and exercise models in the background at startup (else on first use)
     MLX_MODEL: str = "mlx-community/Qwen2.5-7B-Instruct-4bit"
     MLX_URL: str = "http://localhost:8000/v1"
-    CHUNK_SIZE: int = 512
+    CHUNK_SIZE: int = 512        # Tokens per chunk, special tokens included; clamped to the embedding model's input limit
+    CHUNK_TOKENIZER: str = ""    # Model whose tokens CHUNK_SIZE counts ("" = EMBEDDING_MODEL, matching its input limit)
     MAX_CONTEXT_CHUNKS: int = 10  # Number of relevant chunks to use for context
-    MAX_CHAT_HISTORY: int = 5    # Number of previous chat turns to include
+    MAX_CHAT_HISTORY: int = 10   # Max previous chat turns to consider, trimmed to HISTORY_TOKEN_BUDGET
+    PROMPT_TOKEN_BUDGET: int = 3072  # Tokens available for the whole prompt
+    LLM_TOKENIZER: str = ""      # Model whose tokens the prompt budgets count ("" = MLX_MODEL)
+    HISTORY_TOKEN_BUDGET: int = 512  # Tokens of the prompt budget chat history may use
+    RETRIEVAL_WORKERS: int = 4   # Threads for blocking embedding and vector search
+    EMBEDDING_BATCH_SIZE: int = 32   # Query texts that flush an embedding batch immediately
+    EMBEDDING_BATCH_WAIT_MS: float = 5.0  # Max wait for concurrent queries to join a batch
+    BATCH_MAX_QUESTIONS: int = 500   # Max questions accepted by the batch query endpoint
+    BATCH_LLM_CONCURRENCY: int = 4   # Concurrent LLM generations per batch
+    
+    # LLM admission control
+    LLM_MAX_CONCURRENCY: int = 2     # Generations sent to the LLM at once
+    LLM_MAX_QUEUE: int = 16          # Requests waiting for a slot before new ones get 429
+    LLM_QUEUE_TIMEOUT: float = 30.0  # Seconds a request may wait for a slot
+    
+    # Hybrid retrieval
+    HYBRID_SEARCH: bool = True   # Fuse BM25 lexical results with vector results
+    HYBRID_CANDIDATES: int = 20  # Candidates fetched from each retriever before fusion
+    RRF_K: int = 60              # Reciprocal rank fusion smoothing constant
+    
+    # Binary prefilter
+    BINARY_PREFILTER: bool = False   # Search 1-bit embedding codes first, rescoring candidates exactly
+    BINARY_INDEX_PATH: str = "./data/chroma_db/binary_index.npz"
+    BINARY_RESCORE_CANDIDATES: int = 100  # Hamming candidates rescored with full-precision vectors
+    
+    # Diversification
+    MMR_ENABLED: bool = False    # Select a diverse subset of candidates by maximal marginal relevance
+    MMR_CANDIDATES: int = 40     # Candidates fetched with embeddings for MMR selection
+    MMR_LAMBDA: float = 0.7      # Relevance vs. diversity trade-off (1.0 = relevance only)
+    
+    # Reranking
+    RERANK_ENABLED: bool = True
+    RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES: int = 30  # Chunks retrieved for the cross-encoder to score
+    RERANK_TOP_K: int = 4        # Chunks kept for the prompt after reranking
+    RERANK_BUDGET_MS: int = 300  # Latency budget before falling back to retrieval order
     
     # Collection
     COLLECTION_NAME: str = "documents"
     
+    # Ingestion jobs
+    UPLOAD_DIR: str = "./data/uploads"  # Uploaded files, stored by content hash
+    UPLOAD_GRACE_SECONDS: float = 600.0  # Age after which an upload no pending job needs is deleted
+    INGESTION_WORKERS: int = 1       # Ingestion jobs run at once per API process
+    INGESTION_MAX_ATTEMPTS: int = 3  # Runs of a job (first run plus resumptions after crashes) before it fails
+    INGESTION_STALE_SECONDS: float = 60.0  # Heartbeat silence after which a running job is resumed elsewhere
+    
     # Caching and Vector DB Management
     CACHE_DIR: str = "./data/cache"
+    EMBEDDING_CACHE_SIZE: int = 1024     # Number of query embeddings to keep
+    EMBEDDING_CACHE_TTL: int = 3600      # Seconds before a cached query embedding expires
+    ANSWER_CACHE_SIZE: int = 256         # Number of generated answers to keep (0 disables)
+    ANSWER_CACHE_THRESHOLD: float = 0.95 # Min cosine similarity to reuse a cached answer
     CLEAR_VECTORDB_ON_CHAT: bool = False  # Whether to clear vector DB on new chat
     
     class Config:
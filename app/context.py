@@ -0,0 +1,142 @@
+import hashlib
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+@dataclass
+class PackedContext:
+    """
+    Chunks and chat history selected to fit a prompt token budget.
+
+    Attributes:
+        chunk_indices (List[int]): Indices of the selected chunks, in relevance order
+        chunk_texts (List[str]): Text of the selected chunks, truncated if needed
+        history (List[str]): Selected chat turns in chronological order
+        tokens (int): Estimated prompt tokens used
+    """
+    chunk_indices: List[int] = field(default_factory=list)
+    chunk_texts: List[str] = field(default_factory=list)
+    history: List[str] = field(default_factory=list)
+    tokens: int = 0
+
+class ContextPacker:
+    def __init__(
+        self,
+        count_tokens: Callable[[str], int],
+        truncate_tokens: Callable[[str, int], str],
+        token_budget: int = 3072,
+        history_budget: int = 512,
+        overlap_threshold: float = 0.5,
+        tokenizer_name: Optional[str] = None
+    ):
+        """
+        Pack retrieved chunks and chat history into a prompt token budget.
+
+        Every part of the prompt is counted with the same tokenizer as
+        count_tokens. A chunk's stored count is used only if ingestion
+        counted it with that tokenizer too.
+
+        Args:
+            count_tokens: Returns the number of tokens in a text
+            truncate_tokens: Cuts a text down to at most the given number of tokens
+            token_budget: Total tokens available for the prompt
+            history_budget: Maximum tokens spent on chat history
+            overlap_threshold: Fraction of a chunk's span that may overlap an
+                already selected chunk of the same source before it is dropped
+            tokenizer_name: Model whose tokenizer count_tokens uses, matched
+                against the 'llm_tokenizer' of chunk metadata
+        """
+        self.count_tokens = count_tokens
+        self.truncate_tokens = truncate_tokens
+        self.token_budget = token_budget
+        self.history_budget = history_budget
+        self.overlap_threshold = overlap_threshold
+        self.tokenizer_name = tokenizer_name
+
+    def _chunk_tokens(self, text: str, meta: Optional[Dict]) -> int:
+        """Use the token count stored at ingestion if it was made with our tokenizer, else count."""
+        if (
+            meta and meta.get('llm_tokens') is not None
+            and self.tokenizer_name is not None
+            and meta.get('llm_tokenizer') == self.tokenizer_name
+        ):
+            return int(meta['llm_tokens'])
+        return self.count_tokens(text)
+
+    def _is_duplicate(self, text: str, meta: Optional[Dict], seen_hashes: set, spans: Dict[str, List[tuple]]) -> bool:
+        """Check whether a chunk repeats content that was already selected."""
+        digest = hashlib.sha1(' '.join(text.split()).encode('utf-8')).hexdigest()
+        if digest in seen_hashes:
+            return True
+        seen_hashes.add(digest)
+
+        if not meta or meta.get('start_index') is None or meta.get('end_index') is None:
+            return False
+        start, end = int(meta['start_index']), int(meta['end_index'])
+        length = max(end - start, 1)
+        for other_start, other_end in spans.get(meta.get('source'), []):
+            overlap = min(end, other_end) - max(start, other_start)
+            if overlap / length > self.overlap_threshold:
+                return True
+        return False
+
+    def pack(
+        self,
+        documents: List[str],
+        metadatas: List[Optional[Dict]],
+        history: List[str],
+        reserved_tokens: int = 0
+    ) -> PackedContext:
+        """
+        Select chunks and chat turns that fit the token budget.
+
+        Chat history is filled newest turn first up to the history budget,
+        then chunks are taken in relevance order, skipping duplicates and
+        chunks that no longer fit.
+
+        Args:
+            documents: Chunk texts in relevance order
+            metadatas: Chunk metadata, parallel to documents
+            history: Chat turns in chronological order
+            reserved_tokens: Tokens already used by the prompt template and question
+
+        Returns:
+            PackedContext: The selected chunks and history
+        """
+        packed = PackedContext(tokens=reserved_tokens)
+        remaining = max(self.token_budget - reserved_tokens, 0)
+
+        # Keep the most recent turns that fit the history budget
+        history_remaining = min(self.history_budget, remaining)
+        selected_history = []
+        for turn in reversed(history):
+            tokens = self.count_tokens(turn)
+            if tokens > history_remaining:
+                break
+            selected_history.append(turn)
+            history_remaining -= tokens
+            remaining -= tokens
+            packed.tokens += tokens
+        packed.history = list(reversed(selected_history))
+
+        seen_hashes: set = set()
+        spans: Dict[str, List[tuple]] = {}
+        for i, (text, meta) in enumerate(zip(documents, metadatas)):
+            if self._is_duplicate(text, meta, seen_hashes, spans):
+                continue
+            tokens = self._chunk_tokens(text, meta)
+            if tokens > remaining:
+                if packed.chunk_indices or remaining <= 0:
+                    continue
+                # Never send an empty context: cut the best chunk down to fit
+                text = self.truncate_tokens(text, remaining)
+                tokens = remaining
+            packed.chunk_indices.append(i)
+            packed.chunk_texts.append(text)
+            remaining -= tokens
+            packed.tokens += tokens
+            if meta and meta.get('start_index') is not None and meta.get('end_index') is not None:
+                spans.setdefault(meta.get('source'), []).append(
+                    (int(meta['start_index']), int(meta['end_index']))
+                )
+
+        return packed
@@ -2,6 +2,7 @@ import motor.motor_asyncio
 from beanie import init_beanie
 from .config import settings
 from .models.chat import ChatSession, Message
+from .models.job import IngestionJob
 
 async def init_db():
     """Initialize database connections."""
@@ -15,7 +16,8 @@ async def init_db():
         database=client[settings.MONGODB_DB_NAME],
         document_models=[
             ChatSession,
-            Message
+            Message,
+            IngestionJob
         ]
     )
     
@@ -0,0 +1,305 @@
+import asyncio
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+
+from .models.job import IngestionJob
+from .uploads import ContentStore
+
+logger = logging.getLogger(__name__)
+
+class JobCancelled(Exception):
+    """Raised inside an ingestion whose job has been cancelled."""
+
+class IngestionJobQueue:
+    def __init__(
+        self,
+        rag_service,
+        max_workers: int = 1,
+        max_attempts: int = 3,
+        heartbeat_interval: float = 2.0,
+        stale_after: float = 60.0,
+        poll_interval: float = 2.0,
+        content_store: Optional[ContentStore] = None,
+        upload_grace: float = 600.0
+    ):
+        """
+        Run document ingestions as background jobs persisted in MongoDB.
+
+        Workers claim queued jobs atomically, so several API processes can
+        share one queue. While a job runs, its progress and a heartbeat are
+        written every heartbeat_interval. If the heartbeat stops because the
+        process died, the job is requeued and resumed, up to max_attempts
+        runs. Re-ingesting a source replaces its chunks, and converted chunks
+        are cached by content hash, so a resumed job redoes at most the
+        embedding of an interrupted run. Once no queued or running job
+        needs an uploaded file, the sweep deletes it from content_store.
+
+        Args:
+            rag_service: The RAGService that ingests documents
+            max_workers: Jobs this process runs at once
+            max_attempts: Runs of a job before it is failed
+            heartbeat_interval: Seconds between progress writes
+            stale_after: Seconds without a heartbeat before a running job is requeued
+            poll_interval: Seconds an idle worker waits before looking for jobs again
+            content_store: Where uploaded files are stored, None to keep them
+            upload_grace: Seconds an unreferenced upload is kept, so one whose
+                          job is still being queued is not deleted
+        """
+        self.rag_service = rag_service
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.poll_interval = poll_interval
+        self.content_store = content_store
+        self.upload_grace = upload_grace
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._cancel_events: Dict[ObjectId, threading.Event] = {}
+
+    @staticmethod
+    def _collection():
+        return IngestionJob.get_motor_collection()
+
+    def start(self) -> None:
+        """Start the workers and the sweep for abandoned jobs."""
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.max_workers)]
+        self._tasks.append(asyncio.create_task(self._sweep()))
+
+    async def stop(self) -> None:
+        """
+        Stop taking jobs.
+
+        Ingestions already running in threads cannot be interrupted; their
+        jobs stop heartbeating and are resumed by the next process.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, file_path: str | Path, source: str, doc_hash: Optional[str] = None) -> IngestionJob:
+        """
+        Queue a document for ingestion.
+
+        Args:
+            file_path: Stored upload to ingest
+            source: Canonical name chats refer to the document by
+            doc_hash: Hash of the file contents, if already known
+
+        Returns:
+            IngestionJob: The queued job
+        """
+        job = IngestionJob(source=source, file_path=str(file_path), doc_hash=doc_hash)
+        await job.insert()
+        self._wakeup.set()
+        logger.info(f"Queued ingestion job {job.id} for {source}")
+        return job
+
+    async def get(self, job_id: str) -> Optional[IngestionJob]:
+        """Get a job by ID, or None if it does not exist."""
+        try:
+            return await IngestionJob.get(ObjectId(job_id))
+        except InvalidId:
+            return None
+
+    async def cancel(self, job_id: str) -> Optional[IngestionJob]:
+        """
+        Cancel a job.
+
+        Queued jobs are cancelled immediately. Running jobs stop at their
+        next progress report, in whichever process runs them, and never
+        change the collection once they are cancelled.
+
+        Args:
+            job_id: ID of the job
+
+        Returns:
+            Optional[IngestionJob]: The job, or None if it does not exist
+        """
+        try:
+            oid = ObjectId(job_id)
+        except InvalidId:
+            return None
+        now = datetime.utcnow()
+        cancelled = await self._collection().find_one_and_update(
+            {"_id": oid, "status": "queued"},
+            {"$set": {"status": "cancelled", "stage": "cancelled", "cancel_requested": True, "finished_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
+        if cancelled is None:
+            await self._collection().update_one(
+                {"_id": oid, "status": "running"},
+                {"$set": {"cancel_requested": True}}
+            )
+            event = self._cancel_events.get(oid)
+            if event is not None:
+                event.set()
+        return await IngestionJob.get(oid)
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for monitoring."""
+        return {"workers": self.max_workers, "running": len(self._cancel_events)}
+
+    async def _work(self) -> None:
+        """Claim and run jobs until stopped."""
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.error(f"Failed to claim an ingestion job: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _claim(self) -> Optional[IngestionJob]:
+        """Atomically take the oldest queued job."""
+        now = datetime.utcnow()
+        claimed = await self._collection().find_one_and_update(
+            {"status": "queued"},
+            {
+                "$set": {"status": "running", "worker": self.worker_id, "started_at": now, "heartbeat_at": now},
+                "$inc": {"attempts": 1}
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        return await IngestionJob.get(claimed["_id"]) if claimed else None
+
+    async def _run(self, job: IngestionJob) -> None:
+        """Ingest a claimed job's document, recording how it ended."""
+        if job.cancel_requested:
+            await self._finish(job, "cancelled", "cancelled")
+            return
+        if job.attempts > self.max_attempts:
+            await self._finish(job, "failed", job.stage, error=f"Gave up after {self.max_attempts} attempts")
+            return
+        if not Path(job.file_path).exists():
+            await self._finish(job, "failed", job.stage, error="Uploaded file is missing")
+            return
+        if job.attempts > 1:
+            logger.info(f"Resuming ingestion job {job.id} (attempt {job.attempts})")
+
+        cancel_event = threading.Event()
+        state = {"stage": "starting", "current": 0, "total": 0}
+
+        def progress(stage: str, current: int, total: int) -> None:
+            # Called from the ingestion thread; also its cancellation point
+            if cancel_event.is_set():
+                raise JobCancelled(f"Job {job.id} was cancelled")
+            state.update(stage=stage, current=current, total=total)
+
+        self._cancel_events[job.id] = cancel_event
+        heartbeat = asyncio.create_task(self._heartbeat(job.id, state, cancel_event))
+        try:
+            await self.rag_service.aingest_pdf(
+                job.file_path,
+                source=job.source,
+                doc_hash=job.doc_hash,
+                progress=progress
+            )
+            await self._finish(job, "completed", "done", current=state["total"], total=state["total"])
+        except JobCancelled:
+            await self._finish(job, "cancelled", "cancelled", current=state["current"], total=state["total"])
+        except Exception as e:
+            logger.error(f"Ingestion job {job.id} failed: {e}", exc_info=True)
+            await self._finish(job, "failed", state["stage"], error=str(e), current=state["current"], total=state["total"])
+        finally:
+            heartbeat.cancel()
+            self._cancel_events.pop(job.id, None)
+
+    async def _heartbeat(self, job_id: ObjectId, state: Dict, cancel_event: threading.Event) -> None:
+        """Persist progress periodically and pick up cancellations from any process."""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                job = await self._collection().find_one_and_update(
+                    {"_id": job_id, "worker": self.worker_id, "status": "running"},
+                    {"$set": {
+                        "heartbeat_at": datetime.utcnow(),
+                        "stage": state["stage"],
+                        "progress_current": state["current"],
+                        "progress_total": state["total"]
+                    }},
+                    projection={"cancel_requested": 1},
+                    return_document=ReturnDocument.AFTER
+                )
+            except Exception as e:
+                logger.warning(f"Failed to record progress of job {job_id}: {e}")
+                continue
+            # A job that is no longer ours was requeued after a stall; let the new run own it
+            if job is None or job.get("cancel_requested"):
+                cancel_event.set()
+
+    async def _finish(
+        self,
+        job: IngestionJob,
+        status: str,
+        stage: str,
+        error: Optional[str] = None,
+        current: int = 0,
+        total: int = 0
+    ) -> None:
+        """Record a job's final state."""
+        result = await self._collection().update_one(
+            {"_id": job.id, "worker": self.worker_id, "status": "running"},
+            {"$set": {
+                "status": status,
+                "stage": stage,
+                "error": error,
+                "progress_current": current,
+                "progress_total": total,
+                "finished_at": datetime.utcnow()
+            }}
+        )
+        if result.modified_count:
+            logger.info(f"Ingestion job {job.id} {status}")
+
+    async def _sweep(self) -> None:
+        """Requeue running jobs whose process stopped heartbeating, and delete uploads no job needs."""
+        while True:
+            try:
+                cutoff = datetime.utcnow() - timedelta(seconds=self.stale_after)
+                result = await self._collection().update_many(
+                    {"status": "running", "heartbeat_at": {"$lt": cutoff}},
+                    {"$set": {"status": "queued", "worker": None}}
+                )
+                if result.modified_count:
+                    logger.warning(f"Requeued {result.modified_count} abandoned ingestion jobs")
+                    self._wakeup.set()
+            except Exception as e:
+                logger.error(f"Failed to sweep ingestion jobs: {e}")
+            if self.content_store is not None:
+                try:
+                    await self._collect_uploads()
+                except Exception as e:
+                    logger.error(f"Failed to delete unneeded uploads: {e}")
+            await asyncio.sleep(self.stale_after / 2)
+
+    async def _collect_uploads(self) -> None:
+        """Delete stored uploads that no queued or running job refers to."""
+        # Read the references before listing files: an upload queued after
+        # this query is newer than upload_grace and survives the listing
+        keep = await self._collection().distinct("doc_hash", {"status": {"$in": ["queued", "running"]}})
+        removed = await asyncio.get_running_loop().run_in_executor(
+            None, self.content_store.collect, set(keep), self.upload_grace
+        )
+        if removed:
+            logger.info(f"Deleted {removed} uploads no ingestion job needs")
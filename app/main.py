@@ -1,18 +1,30 @@
 from fastapi import FastAPI, HTTPException, Request, UploadFile, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio
+import json
 import logging
+import time
+from contextlib import aclosing
 from typing import List
 
+from .admission import AdmissionRejected
 from .config import settings
+from .jobs import IngestionJobQueue
+from .uploads import ContentStore
 from .rag import RAGService
 from .db import init_db, close_db
 from .models.chat import ChatSession, Message
 from .schemas import (
     QueryRequest,
     QueryResponse,
+    BatchQueryRequest,
+    BatchQueryResponse,
     DocumentResponse,
     ErrorResponse,
+    JobResponse,
+    JobSubmittedResponse,
     ChatSessionCreate,
     ChatSessionResponse,
     MessageResponse
@@ -38,17 +50,44 @@ app.add_middleware(
 
 # Initialize services
 rag_service = RAGService()
+content_store = ContentStore(settings.UPLOAD_DIR)
+job_queue = IngestionJobQueue(
+    rag_service,
+    max_workers=settings.INGESTION_WORKERS,
+    max_attempts=settings.INGESTION_MAX_ATTEMPTS,
+    stale_after=settings.INGESTION_STALE_SECONDS,
+    content_store=content_store,
+    upload_grace=settings.UPLOAD_GRACE_SECONDS
+)
 mongodb_client = None
 
 @app.on_event("startup")
 async def startup_event():
     global mongodb_client
     mongodb_client = await init_db()
+    # Also resumes jobs left unfinished by a previous run
+    job_queue.start()
+    if settings.WARM_UP_ON_STARTUP:
+        # Models load in the background so the port opens immediately; /ready reports progress
+        rag_service.components.start_warm_up()
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await job_queue.stop()
     if mongodb_client:
         await close_db(mongodb_client)
+    rag_service.close()
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=429,
+        content=ErrorResponse(
+            message="Too many concurrent requests, please retry later",
+            details=str(exc)
+        ).dict(),
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -66,6 +105,26 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint reporting the warm-up state of each component"""
+    components = rag_service.components.status()
+    if rag_service.components.ready:
+        status = "ready"
+    elif any(component["state"] == "failed" for component in components.values()):
+        status = "failed"
+    else:
+        status = "warming_up"
+    return JSONResponse(
+        status_code=200 if status == "ready" else 503,
+        content={"status": status, "components": components}
+    )
+
+def _log_timings(label: str, timings: dict) -> None:
+    """Log per-stage timings of a request in milliseconds."""
+    stages = ", ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in timings.items())
+    logger.info(f"{label} timings: {stages}")
+
 async def get_chat_session(chat_id: str) -> ChatSession:
     """Get chat session by ID."""
     chat = await ChatSession.get(chat_id)
@@ -80,7 +139,7 @@ async def create_chat(chat: ChatSessionCreate):
         # Clear vector DB if configured
         if settings.CLEAR_VECTORDB_ON_CHAT:
             logger.info("Clearing vector database for new chat session")
-            rag_service.clear_collection()
+            await rag_service.aclear_collection()
             
         chat_session = ChatSession(**chat.dict())
         await chat_session.insert()
@@ -117,39 +176,157 @@ async def query_documents(
     chat: ChatSession = Depends(get_chat_session)
 ):
     """Query the RAG system with a question"""
+    timings = {}
+    save_question = None
     try:
-        # Get recent chat history
-        recent_messages = await chat.get_recent_messages(settings.MAX_CHAT_HISTORY)
-        chat_history = chat.format_chat_history(recent_messages)
+        # Reject up front when the LLM queue is already full
+        rag_service.admission.ensure_capacity()
+
+        # Fetch chat history and retrieve context concurrently; neither depends on the other
+        stage_start = time.perf_counter()
+        recent_messages, retrieval = await asyncio.gather(
+            chat.get_recent_messages(settings.MAX_CHAT_HISTORY),
+            rag_service.aretrieve(
+                question=request.question,
+                n_results=settings.MAX_CONTEXT_CHUNKS,
+                sources=chat.document_scope()
+            )
+        )
+        chat_history = chat.format_chat_turns(recent_messages)
+        timings["history_and_retrieval"] = time.perf_counter() - stage_start
 
-        # Save the question first
-        await chat.add_message(request.question, "question")
+        # Save the question in the background while the answer is generated
+        save_question = asyncio.create_task(chat.add_message(request.question, "question"))
         
-        # Query with more context chunks and chat history
-        response = rag_service.query(
+        # Query with the retrieved context and chat history
+        stage_start = time.perf_counter()
+        response = await rag_service.aquery(
             question=request.question,
-            n_results=settings.MAX_CONTEXT_CHUNKS,
-            chat_history=chat_history
+            chat_history=chat_history,
+            retrieval=retrieval
         )
+        timings["generation"] = time.perf_counter() - stage_start
 
-        # Save the answer
+        # Save the answer once the question is stored, so messages keep their order
+        stage_start = time.perf_counter()
+        await save_question
         await chat.add_message(response, "answer")
 
         # Get the updated chat session with messages
-        updated_chat = await ChatSession.get(chat.id)
-        chat_response = await updated_chat.to_response_dict()
+        chat_response = await chat.to_response_dict()
+        timings["persistence"] = time.perf_counter() - stage_start
+        _log_timings("Query", timings)
         
         return {
             "answer": response,
             "chat": chat_response
         }
+    except AdmissionRejected:
+        if save_question is not None:
+            await asyncio.gather(save_question, return_exceptions=True)
+        raise
     except Exception as e:
+        if save_question is not None:
+            await asyncio.gather(save_question, return_exceptions=True)
         logger.error(f"Query error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post(f"{settings.API_V1_STR}/documents")
+@app.post(f"{settings.API_V1_STR}/query/batch", response_model=BatchQueryResponse)
+async def batch_query_documents(request: BatchQueryRequest):
+    """Answer many questions against the documents in one batch"""
+    if len(request.questions) > settings.BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BATCH_MAX_QUESTIONS} questions are allowed per batch"
+        )
+    try:
+        results = await rag_service.aquery_batch(
+            questions=request.questions,
+            n_results=request.n_results,
+            sources=[request.document_name] if request.document_name else None
+        )
+        return {
+            "results": [
+                {"question": question, **result}
+                for question, result in zip(request.questions, results)
+            ]
+        }
+    except Exception as e:
+        logger.error(f"Batch query error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _sse_event(data: dict, event: str = None) -> str:
+    """Format a server-sent event."""
+    payload = json.dumps(jsonable_encoder(data))
+    if event:
+        return f"event: {event}\ndata: {payload}\n\n"
+    return f"data: {payload}\n\n"
+
+@app.post(f"{settings.API_V1_STR}/chats/{{chat_id}}/query/stream")
+async def stream_query_documents(
+    chat_id: str,
+    request: QueryRequest,
+    chat: ChatSession = Depends(get_chat_session)
+):
+    """Query the RAG system and stream the answer as server-sent events"""
+    # Reject before the stream starts when the LLM queue is already full
+    rag_service.admission.ensure_capacity()
+
+    # Fetch chat history and retrieve context concurrently; neither depends on the other
+    recent_messages, retrieval = await asyncio.gather(
+        chat.get_recent_messages(settings.MAX_CHAT_HISTORY),
+        rag_service.aretrieve(
+            question=request.question,
+            n_results=settings.MAX_CONTEXT_CHUNKS,
+            sources=chat.document_scope()
+        )
+    )
+    chat_history = chat.format_chat_turns(recent_messages)
+
+    # Save the question in the background while the answer streams
+    save_question = asyncio.create_task(chat.add_message(request.question, "question"))
+
+    async def event_stream():
+        pieces = []
+        try:
+            # A client disconnect cancels this generator; aclosing then stops the upstream generation
+            async with aclosing(rag_service.astream_query(
+                question=request.question,
+                chat_history=chat_history,
+                retrieval=retrieval
+            )) as answer_stream:
+                async for piece in answer_stream:
+                    pieces.append(piece)
+                    yield _sse_event({"token": piece})
+
+            # Save the finished answer once the question is stored
+            response = "".join(pieces)
+            await save_question
+            await chat.add_message(response, "answer")
+
+            # Send the updated chat session with messages
+            chat_response = await chat.to_response_dict()
+            yield _sse_event({"answer": response, "chat": chat_response}, event="done")
+        except asyncio.CancelledError:
+            logger.info(f"Client disconnected from streaming query in chat {chat_id}")
+            raise
+        except Exception as e:
+            await asyncio.gather(save_question, return_exceptions=True)
+            logger.error(f"Streaming query error: {e}", exc_info=True)
+            yield _sse_event(ErrorResponse(
+                message="Failed to generate answer",
+                details=str(e)
+            ).dict(), event="error")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post(f"{settings.API_V1_STR}/documents", status_code=202, response_model=JobSubmittedResponse)
 async def upload_document(file: UploadFile):
-    """Upload and ingest a PDF document"""
+    """Upload a PDF document and queue it for ingestion"""
     try:
         if not file.filename.endswith('.pdf'):
             raise HTTPException(
@@ -157,29 +334,39 @@ async def upload_document(file: UploadFile):
                 detail="Only PDF files are supported"
             )
         
-        # Save the uploaded file temporarily
-        temp_path = f"temp_{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        # Process the document
-        rag_service.ingest_pdf(temp_path)
-        
-        # Clean up
-        import os
-        os.remove(temp_path)
+        # Stream the upload to content-addressed storage, hashing it as it arrives
+        doc_hash, upload_path = await content_store.save_upload(file)
         
-        return {"message": f"Successfully ingested {file.filename}"}
+        # Ingest in the background under the name chats refer to the document by
+        job = await job_queue.submit(upload_path, source=file.filename, doc_hash=doc_hash)
+        return JobSubmittedResponse(job_id=str(job.id), source=job.source, status=job.status)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Upload error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get(f"{settings.API_V1_STR}/jobs/{{job_id}}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """Get the status and progress of an ingestion job"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_response_dict()
+
+@app.post(f"{settings.API_V1_STR}/jobs/{{job_id}}/cancel", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    """Cancel a queued or running ingestion job"""
+    job = await job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_response_dict()
+
 @app.get(f"{settings.API_V1_STR}/documents", response_model=List[DocumentResponse])
 async def list_documents():
     """List all ingested documents"""
     try:
-        results = rag_service.list_documents()
+        results = await rag_service.alist_documents()
         return [
             DocumentResponse(source=source)
             for source in results
@@ -187,3 +374,47 @@ async def list_documents():
     except Exception as e:
         logger.error(f"List documents error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.delete(f"{settings.API_V1_STR}/documents/{{source:path}}")
+async def delete_document(source: str):
+    """Delete an ingested document and its chunks"""
+    try:
+        if source not in await rag_service.alist_documents():
+            raise HTTPException(status_code=404, detail="Document not found")
+        deleted = await rag_service.adelete_document(source)
+        return {"message": f"Deleted {deleted} chunks for {source}"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Delete document error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get(f"{settings.API_V1_STR}/stats")
+async def collection_stats():
+    """Get chunk counts for the vector collection and cache counters"""
+    reranker = rag_service.components.peek("reranker")  # Reporting must not load the model
+    return {
+        "total_chunks": rag_service.stats.total_chunks,
+        "documents": rag_service.stats.documents(),
+        "collection_version": rag_service.stats.version,
+        "embedding_cache": rag_service.embedding_cache.stats(),
+        "embedding_batches": rag_service.embedding_batcher.stats(),
+        "answer_cache": rag_service.answer_cache.stats(),
+        "rerank_fallbacks": reranker.fallbacks if reranker else 0,
+        "coalescing": rag_service.inflight.stats(),
+        "llm_admission": rag_service.admission.stats(),
+        "ingestion_jobs": job_queue.stats()
+    }
+
+@app.post(f"{settings.API_V1_STR}/stats/reconcile")
+async def reconcile_collection_stats():
+    """Rebuild the collection statistics from the vector database"""
+    try:
+        await rag_service.areconcile_stats()
+        return {
+            "total_chunks": rag_service.stats.total_chunks,
+            "documents": rag_service.stats.documents()
+        }
+    except Exception as e:
+        logger.error(f"Reconcile stats error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
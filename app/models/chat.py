@@ -99,3 +99,15 @@ class ChatSession(Document):
             role = "User" if msg.type == "question" else "Assistant"
             formatted.append(f"{role}: {msg.content}")
         return "\n".join(formatted)
+
+    def document_scope(self) -> List[str]:
+        """Get the document sources this chat searches, including the legacy upload name."""
+        return [self.document_name, f"temp_{self.document_name}"]
+
+    def format_chat_turns(self, messages: List[Message]) -> List[str]:
+        """Format recent messages as chat turns in chronological order."""
+        ordered = sorted(messages, key=lambda msg: msg.created_at)
+        return [
+            f"{'User' if msg.type == 'question' else 'Assistant'}: {msg.content}"
+            for msg in ordered
+        ]
@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Optional
+from beanie import Document
+from pydantic import Field
+
+class IngestionJob(Document):
+    source: str
+    file_path: str
+    doc_hash: Optional[str] = None
+    status: str = Field(default="queued", description="'queued', 'running', 'completed', 'failed' or 'cancelled'")
+    stage: str = Field(default="queued", description="Current step, e.g. 'converting', 'chunking', 'embedding'")
+    progress_current: int = 0
+    progress_total: int = 0
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    attempts: int = 0
+    worker: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+
+    class Settings:
+        name = "ingestion_jobs"
+        indexes = [
+            [("status", 1), ("created_at", 1)],
+            [("created_at", -1)]
+        ]
+
+    @property
+    def is_finished(self) -> bool:
+        """Whether the job has reached a final state."""
+        return self.status in ("completed", "failed", "cancelled")
+
+    def to_response_dict(self):
+        """Convert to a response-friendly dictionary."""
+        return {
+            "id": str(self.id),
+            "source": self.source,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": {"current": self.progress_current, "total": self.progress_total},
+            "error": self.error,
+            "attempts": self.attempts,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
@@ -1,19 +1,148 @@
+import asyncio
+import fcntl
+import itertools
 import logging
-import hashlib
+import os
 import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing, contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Set, Optional
+from typing import AsyncIterator, Callable, Dict, Hashable, List, Set, Optional
 
-import chromadb
-from chromadb.utils import embedding_functions
-from transformers import AutoTokenizer
+import numpy as np
 
+from .admission import AdmissionController
+from .batching import EmbeddingBatcher
+from .components import ComponentRegistry
 from .config import settings
+from .context import ContextPacker
+from .cache import AnswerCache, EmbeddingCache, normalize_question
+from .singleflight import SingleFlight
+from .stats import CollectionStats
+from .uploads import hash_file
 from backend.workflows.pdf_workflow import PdfToChunksWorkflow
+from backend.embeddings import (
+    EmbeddingServiceClient,
+    EmbeddingWorkerPool,
+    LazyEmbeddingFunction,
+    OnnxEmbeddingFunction,
+    PooledEmbeddingFunction,
+    SharedSentenceTransformerEmbeddingFunction,
+    TruncatedEmbeddingFunction
+)
+from backend.models import get_max_seq_length, get_tokenizer
 from backend.llm import FastMLXEndpoint
+from backend.retrieval import BinaryIndex, BM25Index, CrossEncoderReranker, mmr_select, reciprocal_rank_fusion
+from backend.vectorstores import ChromaVectorStore, MmapFlatVectorStore, VectorStore
 
 logger = logging.getLogger(__name__)
 
+# Chunks embedded per call during ingestion, the granularity of embedding progress
+INGEST_EMBEDDING_BATCH = 64
+
+# Receives (stage, current, total) as an ingestion advances; raising aborts it
+ProgressCallback = Callable[[str, int, int], None]
+
+PROMPT_TEMPLATE = """Use the following context and chat history to answer the question. If you cannot answer the question based on the context, say "I cannot answer this question based on the available context."
+
+Context:
+{context}
+
+Chat History:
+{chat_history}
+
+Question: {question}
+
+Answer the question based on the context above. If the chat history is relevant, you may reference it, but prioritize information from the context. Be clear and concise in your response."""
+
+@dataclass
+class PreparedQuery:
+    """
+    Outcome of retrieval for a question, before generation.
+    
+    Attributes:
+        prompt (Optional[str]): Prompt for the LLM, or None if no generation is needed
+        answer (Optional[str]): Answer to return directly (canned or cached)
+        cache_scope (Optional[Hashable]): Answer cache scope to store the generated answer under
+        embedding (Optional[List[float]]): Question embedding used for retrieval
+    """
+    prompt: Optional[str] = None
+    answer: Optional[str] = None
+    cache_scope: Optional[Hashable] = None
+    embedding: Optional[List[float]] = None
+
+@dataclass
+class Retrieval:
+    """
+    Context retrieved for a question, before it is packed into a prompt.
+    
+    Attributes:
+        question (str): The question that was searched for
+        embedding (Optional[List[float]]): Question embedding used for retrieval
+        results (Optional[Dict[str, List]]): Retrieved chunks, or None if nothing could be searched
+        collection_version (int): Collection version the chunks were retrieved from
+        answer (Optional[str]): Canned answer when nothing could be searched
+    """
+    question: str
+    embedding: Optional[List[float]] = None
+    results: Optional[Dict[str, List]] = None
+    collection_version: int = 0
+    answer: Optional[str] = None
+
+class _IngestionWaiters:
+    def __init__(self):
+        """
+        Callers sharing one coalesced ingestion.
+        
+        Every caller's progress callback sees the shared ingestion's progress.
+        A callback that raises detaches only its own caller; the ingestion is
+        aborted once no caller is waiting for it any more.
+        """
+        self._lock = threading.Lock()
+        self._progress: Dict[int, ProgressCallback] = {}
+        self._detach: Dict[int, Callable[[BaseException], None]] = {}
+        self._ids = itertools.count()
+        self.waiting = 0
+        self.aborted = False
+
+    def add(self, progress: Optional[ProgressCallback], detach: Callable[[BaseException], None]) -> int:
+        """Register a caller, returning its ID."""
+        with self._lock:
+            caller = next(self._ids)
+            if progress is not None:
+                self._progress[caller] = progress
+            self._detach[caller] = detach
+            self.waiting += 1
+            return caller
+
+    def remove(self, caller: int) -> bool:
+        """Unregister a caller, returning whether it was still registered."""
+        with self._lock:
+            self._progress.pop(caller, None)
+            if self._detach.pop(caller, None) is None:
+                return False
+            self.waiting -= 1
+            return True
+
+    def report(self, stage: str, current: int, total: int) -> None:
+        """Pass progress to every caller, detaching those whose callback raises."""
+        with self._lock:
+            callbacks = list(self._progress.items())
+        for caller, callback in callbacks:
+            try:
+                callback(stage, current, total)
+            except Exception as e:
+                with self._lock:
+                    detach = self._detach.get(caller)
+                if detach is None or not self.remove(caller):
+                    continue
+                detach(e)
+                if self.waiting == 0:
+                    self.aborted = True
+                    raise
+
 class RAGService:
     def __init__(self):
         """Initialize the RAG service with necessary components."""
@@ -21,50 +150,311 @@ class RAGService:
             # Create cache directory if it doesn't exist
             Path(settings.CACHE_DIR).mkdir(parents=True, exist_ok=True)
             
-            # Initialize ChromaDB
-            self.chroma_client = chromadb.PersistentClient(
-                path=settings.CHROMA_DB_PATH
+            # Load models and the vector store on first use; warm_up loads them ahead of traffic
+            self.embedding_pool = None
+            self.components = ComponentRegistry(lazy=not settings.WARM_UP_ON_STARTUP)
+            self.components.register("embedding_model", self._load_embedding_function, self._warm_up_embedding)
+            self.components.register("vector_store", self._create_vector_store, self._warm_up_search)
+            self.components.register(
+                "tokenizer",
+                lambda: get_tokenizer(self.llm_tokenizer_name),
+                lambda tokenizer: tokenizer.encode("warm-up")
             )
-            self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-                model_name=settings.EMBEDDING_MODEL
+            self.components.register(
+                "pdf_workflow",
+                lambda: PdfToChunksWorkflow(
+                    max_chunk_size=self._chunk_size(),
+                    tokenizer_model=settings.CHUNK_TOKENIZER or settings.EMBEDDING_MODEL
+                ),
+                lambda workflow: workflow.warm_up()
             )
-            self.collection = self.chroma_client.get_or_create_collection(
-                name=settings.COLLECTION_NAME,
-                embedding_function=self.embedding_function
+            if settings.RERANK_ENABLED:
+                self.components.register(
+                    "reranker",
+                    lambda: CrossEncoderReranker(model_name=settings.RERANK_MODEL),
+                    lambda reranker: reranker.warm_up()
+                )
+            self.embedding_function = LazyEmbeddingFunction(lambda: self.components.get("embedding_model"))
+            
+            # Merge query embeddings from concurrent requests into one forward pass
+            self.embedding_batcher = EmbeddingBatcher(
+                embed=self.embedding_function,
+                max_batch_size=settings.EMBEDDING_BATCH_SIZE,
+                max_wait_ms=settings.EMBEDDING_BATCH_WAIT_MS
+            )
+            
+            # Cache query embeddings so repeated questions skip the model
+            self.embedding_cache = EmbeddingCache(
+                max_size=settings.EMBEDDING_CACHE_SIZE,
+                ttl=settings.EMBEDDING_CACHE_TTL
             )
             
-            # Initialize PDF workflow
-            self.pdf_workflow = PdfToChunksWorkflow(
-                max_chunk_size=settings.CHUNK_SIZE
+            # Cache generated answers for semantically equivalent questions
+            self.answer_cache = AnswerCache(
+                max_size=settings.ANSWER_CACHE_SIZE,
+                threshold=settings.ANSWER_CACHE_THRESHOLD
             )
             
+            # Load the collection state; with several API workers, only one rebuilds it at a time
+            with self._state_lock():
+                # Initialize collection statistics, rebuilding them if missing
+                self.stats = CollectionStats(settings.COLLECTION_STATS_PATH)
+                if not self.stats.loaded:
+                    self.stats.reconcile(self.vector_store)
+                
+                # Initialize lexical index, rebuilding it if missing
+                self.bm25_index = BM25Index.load(settings.BM25_INDEX_PATH)
+                if self.bm25_index is None:
+                    self.bm25_index = BM25Index()
+                    self._rebuild_bm25_index()
+                
+                # Initialize 1-bit embedding prefilter, rebuilding it if missing
+                self.binary_index = None
+                if settings.BINARY_PREFILTER:
+                    self.binary_index = BinaryIndex.load(settings.BINARY_INDEX_PATH)
+                    if self.binary_index is None:
+                        self.binary_index = BinaryIndex()
+                        self._rebuild_binary_index()
+                self._state_mtime = self._stats_mtime()
+            
             # Initialize MLX endpoint
             self.llm = FastMLXEndpoint(
                 api_key="test-key",  # Replace with actual key if needed
                 url_base=settings.MLX_URL
             )
             
-            # Initialize tokenizer for chunking
-            self.tokenizer = AutoTokenizer.from_pretrained(
-                settings.EMBEDDING_MODEL
+            # Bound concurrent generations so a burst queues briefly or gets 429
+            self.admission = AdmissionController(
+                max_concurrency=settings.LLM_MAX_CONCURRENCY,
+                max_queue=settings.LLM_MAX_QUEUE,
+                queue_timeout=settings.LLM_QUEUE_TIMEOUT
+            )
+            
+            # Coalesce identical concurrent ingestions and queries
+            self.inflight = SingleFlight()
+            self._ingestion_waiters: Dict[Hashable, _IngestionWaiters] = {}
+            
+            # Bounded pool for blocking embedding and search work from async callers
+            self.executor = ThreadPoolExecutor(
+                max_workers=settings.RETRIEVAL_WORKERS,
+                thread_name_prefix="rag-retrieval"
             )
             
+            # Pack prompts within the token budget
+            self.context_packer = ContextPacker(
+                count_tokens=self._count_tokens,
+                truncate_tokens=self._truncate_tokens,
+                token_budget=settings.PROMPT_TOKEN_BUDGET,
+                history_budget=settings.HISTORY_TOKEN_BUDGET,
+                tokenizer_name=self.llm_tokenizer_name
+            )
+            self._template_tokens: Optional[int] = None
+            
             logger.info("RAG service initialized successfully")
             
         except Exception as e:
             logger.error(f"Failed to initialize RAG service: {e}")
             raise
 
+    def _load_embedding_function(self):
+        """Create the embedding function selected in settings."""
+        if settings.EMBEDDING_SERVICE_SOCKET:
+            # Share one embedding service between all API worker processes
+            embedding_function = PooledEmbeddingFunction(EmbeddingServiceClient(
+                socket_path=settings.EMBEDDING_SERVICE_SOCKET,
+                authkey=settings.EMBEDDING_SERVICE_AUTHKEY.encode(),
+                connect_timeout=60.0
+            ))
+        elif settings.EMBEDDING_WORKERS > 0:
+            # Embed in worker processes, keeping the model off this process's GIL
+            self.embedding_pool = EmbeddingWorkerPool(
+                model_name=settings.EMBEDDING_MODEL,
+                num_workers=settings.EMBEDDING_WORKERS,
+                backend=settings.EMBEDDING_BACKEND,
+                onnx_dir=settings.ONNX_MODEL_DIR
+            )
+            embedding_function = PooledEmbeddingFunction(self.embedding_pool)
+        elif settings.EMBEDDING_BACKEND == "onnx-int8":
+            embedding_function = OnnxEmbeddingFunction(
+                model_name=settings.EMBEDDING_MODEL,
+                root=settings.ONNX_MODEL_DIR
+            )
+        else:
+            embedding_function = SharedSentenceTransformerEmbeddingFunction(
+                model_name=settings.EMBEDDING_MODEL
+            )
+        
+        # Truncate and renormalize every vector, so ingestion and queries agree
+        if settings.EMBEDDING_DIM:
+            embedding_function = TruncatedEmbeddingFunction(embedding_function, settings.EMBEDDING_DIM)
+        return embedding_function
+
+    def _chunk_size(self) -> int:
+        """CHUNK_SIZE, clamped so a full chunk is not truncated by the embedding model."""
+        tokenizer_model = settings.CHUNK_TOKENIZER or settings.EMBEDDING_MODEL
+        if tokenizer_model != settings.EMBEDDING_MODEL:
+            # Counts in another vocabulary cannot be compared with the embedder's limit
+            return settings.CHUNK_SIZE
+        limit = get_max_seq_length(settings.EMBEDDING_MODEL)
+        if limit is not None and settings.CHUNK_SIZE > limit:
+            logger.warning(
+                f"CHUNK_SIZE {settings.CHUNK_SIZE} exceeds the {limit} tokens "
+                f"{settings.EMBEDDING_MODEL} embeds; using {limit}"
+            )
+            return limit
+        return settings.CHUNK_SIZE
+
+    def _warm_up_embedding(self, embedding_function) -> None:
+        """Embed a dummy query so the first real one does not pay for lazy setup."""
+        embedding_function(["warm-up"])
+
+    def _warm_up_search(self, vector_store: VectorStore) -> None:
+        """Run a dummy search, paging in the index files."""
+        if self.stats.total_chunks:
+            vector_store.query(query_embeddings=self.embedding_function(["warm-up"]), n_results=1)
+
+    @property
+    def vector_store(self) -> VectorStore:
+        """The vector store, opened on first use."""
+        return self.components.get("vector_store")
+
+    @property
+    def llm_tokenizer_name(self) -> str:
+        """Model whose tokenizer counts prompt tokens."""
+        return settings.LLM_TOKENIZER or settings.MLX_MODEL
+
+    @property
+    def tokenizer(self):
+        """Tokenizer of the LLM, so prompt token budgets match the model's real context limit."""
+        return self.components.get("tokenizer")
+
+    @property
+    def pdf_workflow(self) -> PdfToChunksWorkflow:
+        """PDF conversion and chunking workflow, loaded on first use."""
+        return self.components.get("pdf_workflow")
+
+    @property
+    def reranker(self) -> Optional[CrossEncoderReranker]:
+        """Cross-encoder for reranking retrieved chunks, or None if reranking is disabled."""
+        return self.components.get("reranker") if "reranker" in self.components else None
+
+    def _count_template_tokens(self) -> int:
+        """Tokens used by the prompt template itself, counted once."""
+        if self._template_tokens is None:
+            self._template_tokens = self._count_tokens(
+                PROMPT_TEMPLATE.format(context="", chat_history="", question="")
+            )
+        return self._template_tokens
+
+    def _create_vector_store(self) -> VectorStore:
+        """Open the vector store backend selected in settings, recording how its vectors are made."""
+        metadata = {
+            "embedding_model": settings.EMBEDDING_MODEL,
+            "embedding_dim": settings.EMBEDDING_DIM
+        }
+        if settings.VECTOR_STORE == "flat":
+            return MmapFlatVectorStore(
+                path=settings.FLAT_STORE_PATH,
+                embedding_function=self.embedding_function,
+                precision=settings.VECTOR_PRECISION,
+                metadata=metadata
+            )
+        return ChromaVectorStore(
+            path=settings.CHROMA_DB_PATH,
+            collection_name=settings.COLLECTION_NAME,
+            embedding_function=self.embedding_function,
+            metadata=metadata,
+            host=settings.CHROMA_SERVER_HOST or None,
+            port=settings.CHROMA_SERVER_PORT
+        )
+
+    @staticmethod
+    def _stats_mtime() -> Optional[int]:
+        """Modification time of the persisted collection stats, written last by every change."""
+        try:
+            return os.stat(settings.COLLECTION_STATS_PATH).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @contextmanager
+    def _state_lock(self):
+        """
+        Hold an exclusive lock on the persisted collection state.
+        
+        Only taken when API workers share a Chroma server, so that their
+        statistics and index files are never written concurrently.
+        """
+        if not settings.CHROMA_SERVER_HOST:
+            yield
+            return
+        lock_path = Path(settings.COLLECTION_STATS_PATH).with_suffix('.lock')
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _sync_shared_state(self) -> None:
+        """Reload the statistics and indexes if another API worker has changed the collection."""
+        if not settings.CHROMA_SERVER_HOST:
+            return
+        mtime = self._stats_mtime()
+        if mtime is None or mtime == self._state_mtime:
+            return
+        self._state_mtime = mtime
+        self.stats = CollectionStats(settings.COLLECTION_STATS_PATH)
+        self.bm25_index = BM25Index.load(settings.BM25_INDEX_PATH) or self.bm25_index
+        if self.binary_index is not None:
+            self.binary_index = BinaryIndex.load(settings.BINARY_INDEX_PATH) or self.binary_index
+        self.answer_cache.invalidate_before(self.stats.version)
+        logger.info("Reloaded collection state changed by another worker")
+
+    @contextmanager
+    def _shared_state(self):
+        """Change the collection state under the state lock, starting from its latest version."""
+        with self._state_lock():
+            self._sync_shared_state()
+            yield
+            self._state_mtime = self._stats_mtime()
+
+    def close(self) -> None:
+        """Release resources held by the service."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.embedding_batcher.close()
+        for name in ("vector_store", "reranker"):
+            component = self.components.peek(name)
+            if component is not None:
+                component.close()
+        if self.embedding_pool is not None:
+            self.embedding_pool.close()
+
+    async def _run_blocking(self, func, *args):
+        """Run a blocking call on the retrieval executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    def _count_tokens(self, text: str) -> int:
+        """Count tokens in a text without special tokens."""
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def _truncate_tokens(self, text: str, max_tokens: int) -> str:
+        """Cut a text down to at most max_tokens tokens."""
+        token_ids = self.tokenizer.encode(text, add_special_tokens=False)[:max_tokens]
+        return self.tokenizer.decode(token_ids, skip_special_tokens=True)
+
     def _get_document_hash(self, file_path: str | Path) -> str:
-        """Get hash of document for caching."""
-        with open(file_path, 'rb') as f:
-            return hashlib.md5(f.read()).hexdigest()
+        """Get hash of document for caching, as computed for uploads."""
+        return hash_file(file_path)
 
     def _cache_chunks(self, doc_hash: str, chunks: List) -> None:
-        """Cache processed chunks."""
+        """Cache processed chunks atomically, so a crash never leaves a truncated cache file."""
         cache_path = Path(settings.CACHE_DIR) / f"{doc_hash}.pkl"
-        with open(cache_path, 'wb') as f:
+        tmp_path = cache_path.with_suffix('.pkl.tmp')
+        with open(tmp_path, 'wb') as f:
             pickle.dump(chunks, f)
+        tmp_path.replace(cache_path)
 
     def _get_cached_chunks(self, doc_hash: str) -> Optional[List]:
         """Get cached chunks if they exist."""
@@ -77,141 +467,733 @@ class RAGService:
     def clear_collection(self) -> None:
         """Clear all documents from the collection."""
         try:
-            # Get all document IDs first
-            results = self.collection.get()
-            if results and results['ids']:
-                self.collection.delete(ids=results['ids'])
-                logger.info(f"Cleared {len(results['ids'])} documents from vector database")
-            else:
-                logger.info("No documents to clear from vector database")
+            with self._shared_state():
+                deleted = self.vector_store.clear()
+                if deleted:
+                    logger.info(f"Cleared {deleted} documents from vector database")
+                else:
+                    logger.info("No documents to clear from vector database")
+                self.stats.clear()
+                self.bm25_index.clear()
+                self.bm25_index.save(settings.BM25_INDEX_PATH)
+                if self.binary_index is not None:
+                    self.binary_index.clear()
+                    self.binary_index.save(settings.BINARY_INDEX_PATH)
+                self.answer_cache.invalidate_before(self.stats.version)
         except Exception as e:
             logger.error(f"Failed to clear collection: {e}")
             raise
 
-    def ingest_pdf(self, pdf_path: str | Path) -> None:
+    async def aclear_collection(self) -> None:
+        """Clear the collection on the retrieval executor, without blocking the event loop."""
+        await self._run_blocking(self.clear_collection)
+
+    def ingest_pdf(
+        self,
+        pdf_path: str | Path,
+        source: Optional[str] = None,
+        doc_hash: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> None:
         """
         Ingest a PDF file into the vector database.
         
+        Re-ingesting a source replaces its chunks, so an interrupted
+        ingestion can simply be run again.
+        
         Args:
             pdf_path: Path to the PDF file
+            source: Canonical name chats refer to the document by. Defaults to pdf_path
+            doc_hash: Hash of the file contents, if already known
+            progress: Called with (stage, current, total) as ingestion advances; an
+                      exception it raises aborts ingestion before the collection changes
             
         Raises:
             Exception: If ingestion fails
         """
         logger.info(f"Ingesting PDF: {pdf_path}")
+        source = source or str(pdf_path)
+        report = progress or (lambda stage, current, total: None)
         try:
             # Check cache first
-            doc_hash = self._get_document_hash(pdf_path)
+            doc_hash = doc_hash or self._get_document_hash(pdf_path)
             chunks = self._get_cached_chunks(doc_hash)
             
             if not chunks:
                 logger.info("No cached chunks found, processing PDF...")
                 # Process PDF and get chunks
-                chunks = self.pdf_workflow.process(pdf_path)
+                chunks = self.pdf_workflow.process(pdf_path, progress=report)
                 # Cache the chunks
                 self._cache_chunks(doc_hash, chunks)
                 logger.info("Cached processed chunks")
             else:
                 logger.info("Using cached chunks")
             
-            # Get IDs of existing chunks for this document
-            existing_chunks = self.collection.get(
-                where={"source": str(pdf_path)},
-                include=['metadatas']
-            )
-            
-            # Extract IDs from metadatas and delete if any exist
-            if existing_chunks and existing_chunks['metadatas']:
-                existing_ids = [
-                    f"{Path(meta['source']).stem}_chunk_{meta['chunk_index']}"
-                    for meta in existing_chunks['metadatas']
-                ]
-                if existing_ids:
-                    self.collection.delete(ids=existing_ids)
-                    logger.info(f"Deleted {len(existing_ids)} existing chunks for {pdf_path}")
-
-            # Add new chunks to ChromaDB
             texts = [chunk.content for chunk in chunks]
-            ids = [f"{Path(pdf_path).stem}_chunk_{i}" for i in range(len(chunks))]
+            ids = [f"{Path(source).stem}_chunk_{i}" for i in range(len(chunks))]
             metadatas = [{
-                "source": str(pdf_path),
-                "chunk_index": i
-            } for i in range(len(chunks))]
+                "source": source,
+                "chunk_index": i,
+                "tokens": chunk.tokens,
+                # Counted again for the prompt budget: chunk and LLM vocabularies differ
+                "llm_tokens": self._count_tokens(chunk.content),
+                "llm_tokenizer": self.llm_tokenizer_name,
+                "start_index": chunk.start_index,
+                "end_index": chunk.end_index
+            } for i, chunk in enumerate(chunks)]
+            embeddings = []
+            for start in range(0, len(texts), INGEST_EMBEDDING_BATCH):
+                report("embedding", start, len(texts))
+                embeddings.extend(self.embedding_function(texts[start:start + INGEST_EMBEDDING_BATCH]))
             
-            self.collection.add(
-                documents=texts,
-                ids=ids,
-                metadatas=metadatas
-            )
+            report("indexing", 0, len(texts))
+            with self._shared_state():
+                # Delete existing chunks for this document
+                deleted = self.vector_store.delete(where={"source": source})
+                if deleted:
+                    logger.info(f"Deleted {deleted} existing chunks for {source}")
+                
+                # Add new chunks to the vector store
+                self.vector_store.add(
+                    documents=texts,
+                    ids=ids,
+                    metadatas=metadatas,
+                    embeddings=embeddings
+                )
+                self.bm25_index.remove_source(source)
+                self.bm25_index.add(ids, texts, [source] * len(ids))
+                self.bm25_index.save(settings.BM25_INDEX_PATH)
+                if self.binary_index is not None:
+                    self.binary_index.remove_source(source)
+                    self.binary_index.add(ids, embeddings, [source] * len(ids))
+                    self.binary_index.save(settings.BINARY_INDEX_PATH)
+                self.stats.set_document(source, len(chunks))
+                self.answer_cache.invalidate_before(self.stats.version)
             logger.info(f"Successfully added {len(chunks)} chunks to vector database")
             
         except Exception as e:
             logger.error(f"Failed to ingest PDF {pdf_path}: {e}")
             raise
 
-    def query(self, question: str, n_results: int = 5, chat_history: str = "") -> str:
+    async def aingest_pdf(
+        self,
+        pdf_path: str | Path,
+        source: Optional[str] = None,
+        doc_hash: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> None:
         """
-        Query the vector database and generate a response.
+        Ingest a PDF file without blocking the event loop.
+        
+        Concurrent uploads of the same content under the same source share
+        a single ingestion. Each caller's progress callback receives its
+        progress. A callback that raises makes only its own call fail with
+        that exception; the shared ingestion is aborted once no caller is
+        waiting for it.
         
         Args:
-            question: The question to answer
-            n_results: Number of relevant chunks to consider
+            pdf_path: Path to the PDF file
+            source: Canonical name chats refer to the document by. Defaults to pdf_path
+            doc_hash: Hash of the file contents, if already known
+            progress: Called from a worker thread with (stage, current, total)
+            
+        Raises:
+            Exception: If ingestion fails, or whatever progress raised
+        """
+        source = source or str(pdf_path)
+        loop = asyncio.get_running_loop()
+        if doc_hash is None:
+            doc_hash = await loop.run_in_executor(None, self._get_document_hash, pdf_path)
+        key = ("ingest", doc_hash, source)
+        while True:
+            waiters = self._ingestion_waiters.setdefault(key, _IngestionWaiters())
+            detached = loop.create_future()
+            
+            def detach(error: BaseException, detached: asyncio.Future = detached) -> None:
+                # Called from the ingestion thread
+                loop.call_soon_threadsafe(lambda: detached.done() or detached.set_exception(error))
+            
+            async def ingest(waiters: _IngestionWaiters = waiters) -> None:
+                try:
+                    await loop.run_in_executor(None, self.ingest_pdf, pdf_path, source, doc_hash, waiters.report)
+                finally:
+                    if self._ingestion_waiters.get(key) is waiters:
+                        del self._ingestion_waiters[key]
+            
+            caller = waiters.add(progress, detach)
+            shared = asyncio.ensure_future(self.inflight.do(key, ingest))
+            shared.add_done_callback(lambda done: done.cancelled() or done.exception())
+            try:
+                await asyncio.wait({shared, detached}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                waiters.remove(caller)
+            if detached.done():
+                # This caller left; the shared ingestion goes on for the others
+                raise detached.exception()
+            detached.cancel()
+            if shared.exception() is not None and waiters.aborted:
+                # Joined just as every other caller left and the ingestion was aborted; start over
+                continue
+            return shared.result()
+
+    def delete_document(self, source: str) -> int:
+        """
+        Delete all chunks of a document from the vector database.
+        
+        Args:
+            source: Source of the document as recorded at ingestion
             
         Returns:
-            str: Generated answer
+            int: Number of chunks deleted
             
         Raises:
-            Exception: If query processing fails
+            Exception: If deletion fails
         """
-        logger.info(f"Processing query: {question}")
         try:
-            # Check if there are any documents in the collection
-            all_docs = self.collection.get()
-            doc_count = len(all_docs['ids']) if all_docs and 'ids' in all_docs else 0
-            logger.info(f"Current document count in collection: {doc_count}")
+            with self._shared_state():
+                deleted = self.vector_store.delete(where={"source": source})
+                self.bm25_index.remove_source(source)
+                self.bm25_index.save(settings.BM25_INDEX_PATH)
+                if self.binary_index is not None:
+                    self.binary_index.remove_source(source)
+                    self.binary_index.save(settings.BINARY_INDEX_PATH)
+                self.stats.remove_document(source)
+                self.answer_cache.invalidate_before(self.stats.version)
+            logger.info(f"Deleted {deleted} chunks for {source}")
+            return deleted
+        except Exception as e:
+            logger.error(f"Failed to delete document {source}: {e}")
+            raise
+
+    async def adelete_document(self, source: str) -> int:
+        """Delete a document on the retrieval executor, without blocking the event loop."""
+        return await self._run_blocking(self.delete_document, source)
+
+    def _rebuild_bm25_index(self) -> None:
+        """Rebuild the lexical index from the chunks stored in the vector database."""
+        results = self.vector_store.get(include=['documents', 'metadatas'])
+        self.bm25_index.clear()
+        if results and results['ids']:
+            self.bm25_index.add(
+                results['ids'],
+                results['documents'],
+                [meta['source'] for meta in results['metadatas']]
+            )
+        self.bm25_index.save(settings.BM25_INDEX_PATH)
+        logger.info(f"Rebuilt BM25 index with {len(self.bm25_index)} chunks")
+
+    def _rebuild_binary_index(self) -> None:
+        """Rebuild the binary prefilter from the embeddings stored in the vector database."""
+        results = self.vector_store.get(include=['embeddings', 'metadatas'])
+        self.binary_index.clear()
+        if results and len(results['ids']):
+            self.binary_index.add(
+                results['ids'],
+                results['embeddings'],
+                [meta['source'] for meta in results['metadatas']]
+            )
+        self.binary_index.save(settings.BINARY_INDEX_PATH)
+        logger.info(f"Rebuilt binary index with {len(self.binary_index)} chunks")
+
+    def reconcile_stats(self) -> None:
+        """Rebuild the collection statistics and retrieval indexes from the vector database."""
+        try:
+            with self._shared_state():
+                self.stats.reconcile(self.vector_store)
+                self._rebuild_bm25_index()
+                if self.binary_index is not None:
+                    self._rebuild_binary_index()
+                self.answer_cache.invalidate_before(self.stats.version)
+        except Exception as e:
+            logger.error(f"Failed to reconcile collection stats: {e}")
+            raise
+
+    async def areconcile_stats(self) -> None:
+        """Reconcile the collection statistics on the retrieval executor, without blocking the event loop."""
+        await self._run_blocking(self.reconcile_stats)
+
+    def _embed_queries(self, questions: List[str]) -> List[List[float]]:
+        """Embed questions, batching cache misses with those of concurrent requests."""
+        embeddings = [self.embedding_cache.get(settings.EMBEDDING_MODEL, q) for q in questions]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            vectors = self.embedding_batcher.embed([questions[i] for i in missing])
+            for i, vector in zip(missing, vectors):
+                embeddings[i] = vector
+                self.embedding_cache.put(settings.EMBEDDING_MODEL, questions[i], embeddings[i])
+        return embeddings
+
+    def _embed_query(self, question: str) -> List[float]:
+        """Embed a question, reusing the cached vector when available."""
+        return self._embed_queries([question])[0]
+
+    def _dense_search(
+        self,
+        embeddings: List[List[float]],
+        n_results: int,
+        sources: Optional[List[str]] = None
+    ) -> List[Dict[str, List]]:
+        """
+        Search the vector store for several query embeddings in one call.
+        
+        Args:
+            embeddings: Query embeddings
+            n_results: Number of chunks to return per query
+            sources: Only search chunks from these documents
             
-            if doc_count == 0:
-                return "No documents have been uploaded yet. Please upload a document first."
+        Returns:
+            List[Dict[str, List]]: Per query, parallel 'ids', 'documents' and 'metadatas'
+            lists, best first, plus 'embeddings' when MMR is enabled
+        """
+        include = ['documents', 'metadatas', 'embeddings'] if settings.MMR_ENABLED else ['documents', 'metadatas']
+        if self.binary_index is not None and len(self.binary_index):
+            return self._prefiltered_search(embeddings, n_results, sources, include)
+        dense = self.vector_store.query(
+            query_embeddings=embeddings,
+            n_results=n_results,
+            where=self._source_filter(sources),
+            include=include
+        )
+        return [
+            {'ids': dense['ids'][q], **{key: dense[key][q] for key in include}}
+            for q in range(len(embeddings))
+        ]
+
+    def _prefiltered_search(
+        self,
+        embeddings: List[List[float]],
+        n_results: int,
+        sources: Optional[List[str]],
+        include: List[str]
+    ) -> List[Dict[str, List]]:
+        """
+        Search by Hamming distance over 1-bit codes, then rescore the candidates exactly.
+        
+        Args:
+            embeddings: Query embeddings
+            n_results: Number of chunks to return per query
+            sources: Only search chunks from these documents
+            include: Fields to return besides 'ids'
             
-            # Get relevant chunks from ChromaDB with metadata
-            results = self.collection.query(
-                query_texts=[question],
-                n_results=min(n_results, doc_count),  # Don't request more chunks than we have
-                include=['documents', 'metadatas']
-            )
+        Returns:
+            List[Dict[str, List]]: Per query results in the same shape as _dense_search
+        """
+        n_candidates = max(n_results, settings.BINARY_RESCORE_CANDIDATES)
+        candidates = [
+            [doc_id for doc_id, _ in self.binary_index.search(embedding, n_candidates, sources=sources)]
+            for embedding in embeddings
+        ]
+        
+        # Fetch full-precision vectors for every query's candidates in one call
+        unique_ids = list(dict.fromkeys(doc_id for ids in candidates for doc_id in ids))
+        fetched = self.vector_store.get(ids=unique_ids, include=list(dict.fromkeys(include + ['embeddings'])))
+        if not len(fetched['ids']):
+            return [{'ids': [], **{key: [] for key in include}} for _ in embeddings]
+        position = {doc_id: i for i, doc_id in enumerate(fetched['ids'])}
+        vectors = np.asarray(fetched['embeddings'], dtype=np.float32)
+        vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        
+        results = []
+        for embedding, ids in zip(embeddings, candidates):
+            rows = np.array([position[doc_id] for doc_id in ids if doc_id in position], dtype=np.int64)
+            query = np.asarray(embedding, dtype=np.float32)
+            scores = vectors[rows] @ (query / max(float(np.linalg.norm(query)), 1e-12))
+            best = rows[np.argsort(-scores)[:n_results]]
+            results.append({
+                'ids': [fetched['ids'][i] for i in best],
+                **{key: [fetched[key][i] for i in best] for key in include}
+            })
+        return results
+
+    @staticmethod
+    def _source_filter(sources: Optional[List[str]]) -> Optional[Dict]:
+        """Build a where filter restricting results to the given sources."""
+        if sources is None:
+            return None
+        if len(sources) == 1:
+            return {"source": sources[0]}
+        return {"source": {"$in": list(sources)}}
+
+    def _retrieve(
+        self,
+        question: str,
+        dense: Dict[str, List],
+        n_results: int,
+        sources: Optional[List[str]] = None
+    ) -> Dict[str, List]:
+        """
+        Rank the most relevant chunks for a question.
+        
+        With hybrid search enabled, the dense candidates are merged with
+        lexical BM25 results by reciprocal rank fusion.
+        
+        Args:
+            question: The question text, used for lexical search
+            dense: The question's dense search results, as returned by _dense_search
+            n_results: Number of chunks to return
+            sources: Only return chunks from these documents
+            
+        Returns:
+            Dict[str, List]: The chunks in the same shape as dense, best first
+        """
+        include = [key for key in dense if key != 'ids']
+        chunks = {
+            doc_id: tuple(dense[key][i] for key in include)
+            for i, doc_id in enumerate(dense['ids'])
+        }
+        ranked_ids = list(dense['ids'])
+        
+        if settings.HYBRID_SEARCH:
+            lexical_ids = [doc_id for doc_id, _ in self.bm25_index.search(
+                question, max(n_results, settings.HYBRID_CANDIDATES), sources=sources
+            )]
+            ranked_ids = reciprocal_rank_fusion([ranked_ids, lexical_ids], k=settings.RRF_K)[:n_results]
+            
+            # Fetch chunks that only the lexical search found
+            missing_ids = [doc_id for doc_id in ranked_ids if doc_id not in chunks]
+            if missing_ids:
+                fetched = self.vector_store.get(ids=missing_ids, include=include)
+                for i, doc_id in enumerate(fetched['ids']):
+                    chunks[doc_id] = tuple(fetched[key][i] for key in include)
+                ranked_ids = [doc_id for doc_id in ranked_ids if doc_id in chunks]
+        
+        ranked_ids = ranked_ids[:n_results]
+        results = {'ids': ranked_ids}
+        for position, key in enumerate(include):
+            results[key] = [chunks[doc_id][position] for doc_id in ranked_ids]
+        return results
+
+    def _diversify(self, embedding: List[float], results: Dict[str, List], k: int) -> Dict[str, List]:
+        """
+        Keep a relevant but non-redundant subset of k chunks using MMR.
+        
+        Args:
+            embedding: The question embedding
+            results: Retrieved chunks including 'embeddings', as returned by _retrieve
+            k: Number of chunks to keep
             
-            logger.info(f"Query results: {results}")  # Log full results for debugging
+        Returns:
+            Dict[str, List]: The kept chunks in the same shape as results
+        """
+        if len(results['ids']) <= k:
+            return results
+        order = mmr_select(embedding, results['embeddings'], k, lambda_mult=settings.MMR_LAMBDA)
+        return {key: [values[i] for i in order] for key, values in results.items()}
+
+    def _rerank(self, question: str, results: Dict[str, List], top_k: int) -> Dict[str, List]:
+        """
+        Keep the top_k chunks by cross-encoder score, or by retrieval order if over budget.
+        
+        Args:
+            question: The question text
+            results: Retrieved chunks as returned by _retrieve
+            top_k: Number of chunks to keep
             
-            if not results['documents'] or not results['documents'][0]:
-                logger.warning("Query returned no relevant chunks")
-                return "No relevant information found in the documents."
+        Returns:
+            Dict[str, List]: The kept chunks in the same shape as results
+        """
+        order = self.reranker.rerank(
+            question,
+            results['documents'],
+            top_k=top_k,
+            budget_s=settings.RERANK_BUDGET_MS / 1000
+        )
+        if order is None:
+            order = list(range(min(top_k, len(results['ids']))))
+        return {key: [values[i] for i in order] for key, values in results.items()}
+
+    def _retrieve_many(
+        self,
+        questions: List[str],
+        n_results: int,
+        sources: Optional[List[str]] = None
+    ) -> List[Retrieval | Exception]:
+        """
+        Retrieve context for several questions.
+        
+        All questions are embedded in one model call and searched in one
+        ChromaDB call; fusion, diversification and reranking then run per question.
+        
+        Args:
+            questions: The questions to answer
+            n_results: Number of relevant chunks to consider per question
+            sources: Only search chunks from these documents. Defaults to the whole collection
+            
+        Returns:
+            List[Retrieval | Exception]: Per question, in order, the retrieved
+            chunks or the exception that prevented retrieving them
+        """
+        # Pick up documents ingested or deleted by other API workers
+        self._sync_shared_state()
+        
+        # Check if there are any documents in the collection
+        doc_count = self.stats.total_chunks
+        logger.info(f"Current document count in collection: {doc_count}")
+        
+        if doc_count == 0:
+            return [
+                Retrieval(question, answer="No documents have been uploaded yet. Please upload a document first.")
+                for question in questions
+            ]
+        
+        # Check if the documents in scope have been uploaded
+        if sources is not None:
+            doc_count = sum(self.stats.chunk_count(source) for source in sources)
+            logger.info(f"Chunks in scope {sources}: {doc_count}")
+            if doc_count == 0:
+                return [
+                    Retrieval(question, answer="The document for this chat has not been uploaded yet. Please upload it first.")
+                    for question in questions
+                ]
+        
+        # Get relevant chunks with metadata, over-fetching candidates for MMR and the reranker
+        collection_version = self.stats.version
+        n_selected = max(n_results, settings.RERANK_CANDIDATES) if self.reranker else n_results
+        n_candidates = max(n_selected, settings.MMR_CANDIDATES) if settings.MMR_ENABLED else n_selected
+        n_candidates = min(n_candidates, doc_count)  # Don't request more chunks than we have
+        n_dense = max(n_candidates, settings.HYBRID_CANDIDATES) if settings.HYBRID_SEARCH else n_candidates
+        embeddings = self._embed_queries(questions)
+        dense_results = self._dense_search(embeddings, min(n_dense, doc_count), sources)
+        
+        retrievals = []
+        for question, embedding, dense in zip(questions, embeddings, dense_results):
+            try:
+                results = self._retrieve(question, dense, n_candidates, sources)
+                if settings.MMR_ENABLED:
+                    results = self._diversify(embedding, results, n_selected)
+                if self.reranker:
+                    results = self._rerank(question, results, min(n_results, settings.RERANK_TOP_K))
                 
-            logger.info(f"Found {len(results['documents'][0])} relevant chunks")
+                # Log full results for debugging, without the bulky embeddings
+                logger.info(f"Query results: { {k: v for k, v in results.items() if k != 'embeddings'} }")
+                retrievals.append(Retrieval(question, embedding, results, collection_version))
+            except Exception as e:
+                logger.error(f"Failed to retrieve context for {question!r}: {e}")
+                retrievals.append(e)
+        return retrievals
+
+    def _build_prompt(self, retrieval: Retrieval, chat_history: str | List[str]) -> PreparedQuery:
+        """
+        Pack retrieved chunks and chat history into the LLM prompt.
+        
+        Args:
+            retrieval: The retrieved context for the question
+            chat_history: Formatted chat history, or chat turns in chronological order
             
-            # Construct context with all chunks and their sources
-            context_parts = []
-            for i, (doc, meta) in enumerate(zip(results['documents'][0], results['metadatas'][0])):
-                source = Path(meta['source']).stem
-                context_parts.append(f"[Chunk {i+1} from {source}]:\n{doc}")
+        Returns:
+            PreparedQuery: The prompt to generate from, or an answer to return
+            directly when there is nothing to retrieve or the answer is cached
+        """
+        if retrieval.results is None:
+            return PreparedQuery(answer=retrieval.answer)
+        question, results = retrieval.question, retrieval.results
+        
+        if not results['documents']:
+            logger.warning("Query returned no relevant chunks")
+            return PreparedQuery(answer="No relevant information found in the documents.")
             
-            context = "\n\n" + "\n\n".join(context_parts)
-            prompt = f"""Use the following context and chat history to answer the question. If you cannot answer the question based on the context, say "I cannot answer this question based on the available context."
+        logger.info(f"Found {len(results['documents'])} relevant chunks")
+        
+        # Fit chunks and chat history into the prompt token budget
+        if isinstance(chat_history, str):
+            chat_history = [chat_history] if chat_history else []
+        packed = self.context_packer.pack(
+            results['documents'],
+            results['metadatas'],
+            chat_history,
+            reserved_tokens=self._count_template_tokens() + self._count_tokens(question)
+        )
+        logger.info(
+            f"Packed {len(packed.chunk_indices)} chunks and {len(packed.history)} chat turns "
+            f"into ~{packed.tokens} prompt tokens"
+        )
+        history_text = "\n".join(packed.history)
+        
+        # Reuse an answer generated from the same chunks for an equivalent question
+        cache_scope = self.answer_cache.make_scope(
+            retrieval.collection_version,
+            [results['ids'][i] for i in packed.chunk_indices],
+            history_text
+        )
+        cached_answer = self.answer_cache.get(cache_scope, retrieval.embedding)
+        if cached_answer is not None:
+            logger.info("Answer cache hit")
+            return PreparedQuery(answer=cached_answer)
+        
+        # Construct context with the packed chunks and their sources
+        context_parts = []
+        for i, (chunk_index, doc) in enumerate(zip(packed.chunk_indices, packed.chunk_texts)):
+            source = Path(results['metadatas'][chunk_index]['source']).stem
+            context_parts.append(f"[Chunk {i+1} from {source}]:\n{doc}")
+        
+        context = "\n\n" + "\n\n".join(context_parts)
+        prompt = PROMPT_TEMPLATE.format(context=context, chat_history=history_text, question=question)
+        return PreparedQuery(prompt=prompt, cache_scope=cache_scope, embedding=retrieval.embedding)
 
-Context:
-{context}
+    def _prepare_queries(
+        self,
+        questions: List[str],
+        n_results: int,
+        chat_histories: List[str | List[str]],
+        sources: Optional[List[str]] = None
+    ) -> List[PreparedQuery | Exception]:
+        """
+        Retrieve context for several questions and build their LLM prompts.
+        
+        Args:
+            questions: The questions to answer
+            n_results: Number of relevant chunks to consider per question
+            chat_histories: Chat history per question, formatted or as chat turns
+            sources: Only search chunks from these documents. Defaults to the whole collection
+            
+        Returns:
+            List[PreparedQuery | Exception]: Per question, in order, the prepared
+            query or the exception that prevented preparing it
+        """
+        prepared = []
+        for retrieval, chat_history in zip(self._retrieve_many(questions, n_results, sources), chat_histories):
+            if isinstance(retrieval, Exception):
+                prepared.append(retrieval)
+                continue
+            try:
+                prepared.append(self._build_prompt(retrieval, chat_history))
+            except Exception as e:
+                logger.error(f"Failed to build prompt for {retrieval.question!r}: {e}")
+                prepared.append(e)
+        return prepared
 
-Chat History:
-{chat_history}
+    def _prepare_query(
+        self,
+        question: str,
+        n_results: int,
+        chat_history: str | List[str],
+        sources: Optional[List[str]] = None
+    ) -> PreparedQuery:
+        """
+        Retrieve context for a question and build the LLM prompt.
+        
+        Args:
+            question: The question to answer
+            n_results: Number of relevant chunks to consider
+            chat_history: Formatted chat history, or chat turns in chronological order
+            sources: Only search chunks from these documents. Defaults to the whole collection
+            
+        Returns:
+            PreparedQuery: The prompt to generate from, or an answer to return
+            directly when there is nothing to retrieve or the answer is cached
+        """
+        prepared = self._prepare_queries([question], n_results, [chat_history], sources)[0]
+        if isinstance(prepared, Exception):
+            raise prepared
+        return prepared
 
-Question: {question}
+    async def aretrieve(self, question: str, n_results: int = 5, sources: Optional[List[str]] = None) -> Retrieval:
+        """
+        Retrieve context for a question without blocking the event loop.
+        
+        The result can be passed to aquery or astream_query as retrieval, so
+        retrieval can overlap with fetching the chat history it will be packed with.
+        
+        Args:
+            question: The question to answer
+            n_results: Number of relevant chunks to consider
+            sources: Only search chunks from these documents. Defaults to the whole collection
+            
+        Returns:
+            Retrieval: The retrieved context
+            
+        Raises:
+            Exception: If retrieval fails
+        """
+        key = ("retrieve", normalize_question(question), tuple(sources or ()), n_results)
+        retrieval = (await self.inflight.do(
+            key, lambda: self._run_blocking(self._retrieve_many, [question], n_results, sources)
+        ))[0]
+        if isinstance(retrieval, Exception):
+            raise retrieval
+        return retrieval
 
-Answer the question based on the context above. If the chat history is relevant, you may reference it, but prioritize information from the context. Be clear and concise in your response."""
+    async def _aprepare_query(
+        self,
+        question: str,
+        n_results: int,
+        chat_history: str | List[str],
+        sources: Optional[List[str]],
+        retrieval: Optional[Retrieval]
+    ) -> PreparedQuery:
+        """Prepare a query on the retrieval executor, reusing an earlier retrieval if given."""
+        if retrieval is not None:
+            return await self._run_blocking(self._build_prompt, retrieval, chat_history)
+        return await self._run_blocking(
+            self._prepare_query, question, n_results, chat_history, sources
+        )
+
+    async def _agenerate(self, prompt: str) -> str:
+        """
+        Generate a response once the admission controller grants a slot.
+        
+        Args:
+            prompt: The full prompt to send to the LLM
             
-            # Generate response using MLX
-            response = self.llm.generate(
+        Returns:
+            str: Generated answer
+            
+        Raises:
+            AdmissionRejected: If the LLM queue is full or the wait deadline passes
+        """
+        async with self.admission.slot():
+            return await self.llm.agenerate(
                 prompt=prompt,
                 model_name=settings.MLX_MODEL
             )
+
+    def _remember_answer(self, prepared: PreparedQuery, response: str) -> None:
+        """Store a generated answer in the answer cache."""
+        if prepared.cache_scope is not None and response:
+            self.answer_cache.put(prepared.cache_scope, prepared.embedding, response)
+
+    async def _agenerate_and_remember(self, prepared: PreparedQuery) -> str:
+        """Generate the answer to a prepared query and store it in the answer cache."""
+        response = await self._agenerate(prepared.prompt)
+        self._remember_answer(prepared, response)
+        return response
+
+    def query(
+        self,
+        question: str,
+        n_results: int = 5,
+        chat_history: str | List[str] = "",
+        sources: Optional[List[str]] = None
+    ) -> str:
+        """
+        Query the vector database and generate a response.
+        
+        Args:
+            question: The question to answer
+            n_results: Number of relevant chunks to consider
+            chat_history: Formatted chat history, or chat turns in chronological order
+            sources: Only search chunks from these documents. Defaults to the whole collection
+            
+        Returns:
+            str: Generated answer
+            
+        Raises:
+            AdmissionRejected: If the LLM queue is full or the wait deadline passes
+            Exception: If query processing fails
+        """
+        logger.info(f"Processing query: {question}")
+        try:
+            prepared = self._prepare_query(question, n_results, chat_history, sources)
+            if prepared.prompt is None:
+                return prepared.answer
+            
+            # Generate response using MLX, within the same admission limit as async callers
+            with self.admission.blocking_slot():
+                response = self.llm.generate(
+                    prompt=prepared.prompt,
+                    model_name=settings.MLX_MODEL
+                )
+            self._remember_answer(prepared, response)
             
             return response
             
@@ -219,6 +1201,152 @@ Answer the question based on the context above. If the chat history is relevant,
             logger.error(f"Failed to process query: {e}")
             raise
 
+    async def aquery(
+        self,
+        question: str,
+        n_results: int = 5,
+        chat_history: str | List[str] = "",
+        sources: Optional[List[str]] = None,
+        retrieval: Optional[Retrieval] = None
+    ) -> str:
+        """
+        Query the vector database and generate a response without blocking the event loop.
+        
+        Embedding and vector search run on the bounded retrieval executor and
+        generation uses the asynchronous LLM client.
+        
+        Args:
+            question: The question to answer
+            n_results: Number of relevant chunks to consider
+            chat_history: Formatted chat history, or chat turns in chronological order
+            sources: Only search chunks from these documents. Defaults to the whole collection
+            retrieval: Context already retrieved with aretrieve, skipping retrieval
+            
+        Returns:
+            str: Generated answer
+            
+        Raises:
+            Exception: If query processing fails
+        """
+        logger.info(f"Processing async query: {question}")
+        try:
+            prepared = await self._aprepare_query(
+                question, n_results, chat_history, sources, retrieval
+            )
+            if prepared.prompt is None:
+                return prepared.answer
+            
+            # Generate response using MLX, sharing it with identical in-flight questions;
+            # only the call that generates it stores it in the answer cache
+            key = ("answer", normalize_question(question), prepared.cache_scope)
+            return await self.inflight.do(key, lambda: self._agenerate_and_remember(prepared))
+            
+        except Exception as e:
+            logger.error(f"Failed to process async query: {e}")
+            raise
+
+    async def aquery_batch(
+        self,
+        questions: List[str],
+        n_results: int = 5,
+        max_concurrency: Optional[int] = None,
+        sources: Optional[List[str]] = None
+    ) -> List[Dict[str, Optional[str]]]:
+        """
+        Answer many questions with one embedding call and one vector search.
+        
+        Generations are dispatched concurrently through the asynchronous LLM
+        client, with at most max_concurrency in flight.
+        
+        Args:
+            questions: The questions to answer
+            n_results: Number of relevant chunks to consider per question
+            max_concurrency: Maximum concurrent generations. Defaults to settings.BATCH_LLM_CONCURRENCY
+            sources: Only search chunks from these documents. Defaults to the whole collection
+            
+        Returns:
+            List[Dict[str, Optional[str]]]: Per question, in order, its 'answer'
+            or the 'error' that prevented answering it
+            
+        Raises:
+            Exception: If retrieval fails for the whole batch
+        """
+        logger.info(f"Processing batch of {len(questions)} queries")
+        try:
+            prepared = await self._run_blocking(
+                self._prepare_queries, questions, n_results, [""] * len(questions), sources
+            )
+        except Exception as e:
+            logger.error(f"Failed to process query batch: {e}")
+            raise
+        
+        semaphore = asyncio.Semaphore(max_concurrency or settings.BATCH_LLM_CONCURRENCY)
+        
+        async def answer(item: PreparedQuery | Exception) -> Dict[str, Optional[str]]:
+            if isinstance(item, Exception):
+                return {"answer": None, "error": str(item)}
+            if item.prompt is None:
+                return {"answer": item.answer, "error": None}
+            try:
+                async with semaphore:
+                    response = await self._agenerate_and_remember(item)
+            except Exception as e:
+                logger.error(f"Failed to generate batch answer: {e}")
+                return {"answer": None, "error": str(e)}
+            return {"answer": response, "error": None}
+        
+        return list(await asyncio.gather(*(answer(item) for item in prepared)))
+
+    async def astream_query(
+        self,
+        question: str,
+        n_results: int = 5,
+        chat_history: str | List[str] = "",
+        sources: Optional[List[str]] = None,
+        retrieval: Optional[Retrieval] = None
+    ) -> AsyncIterator[str]:
+        """
+        Query the vector database and stream the response as it is generated.
+        
+        Args:
+            question: The question to answer
+            n_results: Number of relevant chunks to consider
+            chat_history: Formatted chat history, or chat turns in chronological order
+            sources: Only search chunks from these documents. Defaults to the whole collection
+            retrieval: Context already retrieved with aretrieve, skipping retrieval
+            
+        Yields:
+            str: Pieces of the generated answer
+            
+        Raises:
+            Exception: If query processing fails
+        """
+        logger.info(f"Processing streaming query: {question}")
+        try:
+            # Retrieval is blocking, so keep it off the event loop
+            prepared = await self._aprepare_query(
+                question, n_results, chat_history, sources, retrieval
+            )
+            if prepared.prompt is None:
+                yield prepared.answer
+                return
+            
+            # Closing this generator closes the LLM stream and frees the slot right away
+            pieces = []
+            async with self.admission.slot():
+                async with aclosing(self.llm.astream(
+                    prompt=prepared.prompt,
+                    model_name=settings.MLX_MODEL
+                )) as stream:
+                    async for piece in stream:
+                        pieces.append(piece)
+                        yield piece
+            self._remember_answer(prepared, "".join(pieces))
+                
+        except Exception as e:
+            logger.error(f"Failed to process streaming query: {e}")
+            raise
+
     def list_documents(self) -> Set[str]:
         """
         Get a list of all ingested documents.
@@ -230,15 +1358,14 @@ Answer the question based on the context above. If the chat history is relevant,
             Exception: If retrieval fails
         """
         try:
-            results = self.collection.get(include=['metadatas'])
-            if not results or not results['metadatas']:
-                return set()
-                
-            return {
-                meta['source'] 
-                for meta in results['metadatas']
-            }
+            # Pick up documents ingested or deleted by other API workers
+            self._sync_shared_state()
+            return set(self.stats.documents())
             
         except Exception as e:
             logger.error(f"Failed to list documents: {e}")
             raise
+
+    async def alist_documents(self) -> Set[str]:
+        """List documents on the retrieval executor, without blocking the event loop on the state lock."""
+        return await self._run_blocking(self.list_documents)
@@ -44,8 +44,42 @@ class QueryResponse(BaseModel):
     answer: str = Field(..., description="The generated answer to the question")
     chat: ChatSessionResponse = Field(..., description="Updated chat session with new messages")
 
+class BatchQueryRequest(BaseModel):
+    questions: List[str] = Field(..., min_length=1, description="The questions to ask about the documents")
+    n_results: int = Field(default=3, ge=1, le=10, description="Number of relevant chunks to consider per question")
+    document_name: Optional[str] = Field(default=None, description="Only search this document; defaults to all documents")
+
+class BatchQueryResult(BaseModel):
+    question: str = Field(..., description="The question that was asked")
+    answer: Optional[str] = Field(default=None, description="The generated answer, if successful")
+    error: Optional[str] = Field(default=None, description="Why the question could not be answered")
+
+class BatchQueryResponse(BaseModel):
+    results: List[BatchQueryResult] = Field(..., description="Results in the same order as the questions")
+
 class DocumentResponse(BaseModel):
     source: str = Field(..., description="The source/path of the document")
 
 class DocumentList(BaseModel):
     documents: List[DocumentResponse]
+
+class JobProgress(BaseModel):
+    current: int = Field(..., description="Units of the current stage done (e.g. chunks embedded)")
+    total: int = Field(..., description="Units in the current stage, 0 if unknown")
+
+class JobResponse(BaseModel):
+    id: str
+    source: str = Field(..., description="The document being ingested")
+    status: str = Field(..., description="'queued', 'running', 'completed', 'failed' or 'cancelled'")
+    stage: str = Field(..., description="Current step: 'queued', 'converting', 'exporting', 'chunking', 'embedding', 'indexing', 'done'")
+    progress: JobProgress
+    error: Optional[str] = None
+    attempts: int = Field(..., description="Times the job has been started, including resumptions")
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class JobSubmittedResponse(BaseModel):
+    job_id: str = Field(..., description="ID to poll at /jobs/{job_id}")
+    source: str
+    status: str
@@ -0,0 +1,61 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Coalesce concurrent identical async calls into one shared execution.
+
+        Keys are tuples whose first element names the kind of work
+        ("ingest", "retrieve", "answer"); counters are kept per kind.
+        """
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, kind: str, counter: str) -> None:
+        counters = self._counters.setdefault(kind, {"leaders": 0, "coalesced": 0})
+        counters[counter] += 1
+
+    def _finish(self, key: Hashable, future: asyncio.Future) -> None:
+        """Forget a finished call, marking its exception as retrieved if every caller left."""
+        self._flights.pop(key, None)
+        if not future.cancelled():
+            future.exception()
+
+    async def do(self, key: Tuple, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run func, or wait for an identical in-flight call to finish.
+
+        The shared call is shielded, so a caller that goes away does not
+        cancel the work other callers are waiting on.
+
+        Args:
+            key: Identity of the call; its first element names the kind of work
+            func: Starts the work when no identical call is in flight
+
+        Returns:
+            The shared result; exceptions are shared too
+        """
+        kind = str(key[0])
+        future = self._flights.get(key)
+        if future is None:
+            self._count(kind, "leaders")
+            future = asyncio.ensure_future(func())
+            self._flights[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self._count(kind, "coalesced")
+            logger.info(f"Coalescing duplicate in-flight {kind} request")
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Get per-kind counters of executed and coalesced calls."""
+        return {
+            kind: {**counters, "in_flight": sum(1 for key in self._flights if str(key[0]) == kind)}
+            for kind, counters in self._counters.items()
+        }
@@ -0,0 +1,137 @@
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+class CollectionStats:
+    def __init__(self, stats_path: str | Path):
+        """
+        Track chunk counts for the vector collection without scanning it.
+
+        Args:
+            stats_path: Path to the JSON file the counters are persisted to
+        """
+        self.stats_path = Path(stats_path)
+        self._lock = threading.Lock()
+        self._chunks_per_document: Dict[str, int] = {}
+        self._total_chunks = 0
+        self._version = 0
+        self._loaded = self._load()
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the counters were restored from disk."""
+        return self._loaded
+
+    @property
+    def total_chunks(self) -> int:
+        """Total number of chunks in the collection."""
+        with self._lock:
+            return self._total_chunks
+
+    @property
+    def version(self) -> int:
+        """Collection version, bumped on every change to its contents."""
+        with self._lock:
+            return self._version
+
+    @property
+    def document_count(self) -> int:
+        """Number of distinct documents in the collection."""
+        with self._lock:
+            return len(self._chunks_per_document)
+
+    def documents(self) -> Dict[str, int]:
+        """Get a snapshot of the per-document chunk counts."""
+        with self._lock:
+            return dict(self._chunks_per_document)
+
+    def chunk_count(self, source: str) -> int:
+        """Get the number of chunks stored for a document."""
+        with self._lock:
+            return self._chunks_per_document.get(source, 0)
+
+    def set_document(self, source: str, chunk_count: int) -> None:
+        """Record the chunk count of a freshly (re-)ingested document."""
+        with self._lock:
+            self._total_chunks -= self._chunks_per_document.pop(source, 0)
+            if chunk_count > 0:
+                self._chunks_per_document[source] = chunk_count
+                self._total_chunks += chunk_count
+            self._version += 1
+            self._save()
+
+    def remove_document(self, source: str) -> None:
+        """Forget a document that was deleted from the collection."""
+        with self._lock:
+            removed = self._chunks_per_document.pop(source, None)
+            if removed is not None:
+                self._total_chunks -= removed
+                self._version += 1
+                self._save()
+
+    def clear(self) -> None:
+        """Reset all counters after the collection was emptied."""
+        with self._lock:
+            self._chunks_per_document = {}
+            self._total_chunks = 0
+            self._version += 1
+            self._save()
+
+    def reconcile(self, vector_store) -> None:
+        """
+        Rebuild the counters from the collection contents.
+
+        This scans every chunk's metadata, so it is only meant for startup
+        or repair, never for the query path.
+
+        Args:
+            vector_store: The VectorStore to count
+        """
+        results = vector_store.get(include=['metadatas'])
+        counts: Dict[str, int] = {}
+        for meta in (results or {}).get('metadatas') or []:
+            source = meta.get('source') if meta else None
+            if source is not None:
+                counts[source] = counts.get(source, 0) + 1
+
+        with self._lock:
+            self._chunks_per_document = counts
+            self._total_chunks = sum(counts.values())
+            self._version += 1
+            self._save()
+        logger.info(
+            f"Reconciled collection stats: {sum(counts.values())} chunks "
+            f"across {len(counts)} documents"
+        )
+
+    def _load(self) -> bool:
+        """Load persisted counters, returning False if none are usable."""
+        if not self.stats_path.exists():
+            return False
+        try:
+            with open(self.stats_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._chunks_per_document = {
+                str(source): int(count)
+                for source, count in data.get('documents', {}).items()
+            }
+            self._total_chunks = sum(self._chunks_per_document.values())
+            self._version = int(data.get('version', 0))
+            return True
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable collection stats {self.stats_path}: {e}")
+            self._chunks_per_document = {}
+            self._total_chunks = 0
+            return False
+
+    def _save(self) -> None:
+        """Atomically persist the counters. Caller must hold the lock."""
+        self.stats_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.stats_path.with_suffix(self.stats_path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self._version, 'documents': self._chunks_per_document}, f)
+        tmp_path.replace(self.stats_path)
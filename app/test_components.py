@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+
+# Add the parent directory to sys.path to allow imports from the app package
+sys.path.append(str(Path(__file__).parent.parent))
+from app.components import ComponentRegistry
+
+def _registry(lazy: bool) -> ComponentRegistry:
+    registry = ComponentRegistry(lazy=lazy)
+    registry.register("embedding_model", lambda: "model", lambda model: None)
+    registry.register("pdf_workflow", lambda: "workflow", lambda workflow: None)
+    return registry
+
+def test_lazy_readiness():
+    """Test that without a warm-up pass, components nobody has used yet do not hold back readiness"""
+    try:
+        registry = _registry(lazy=True)
+        ready_before_use = registry.ready
+        registry.get("embedding_model")
+        ready_after_use = registry.ready
+
+        failing = ComponentRegistry(lazy=True)
+        failing.register("reranker", lambda: 1 / 0)
+        try:
+            failing.get("reranker")
+        except ZeroDivisionError:
+            pass
+
+        print("\nLazy Readiness Test:")
+        print(f"Ready before use: {ready_before_use}, after use: {ready_after_use}, after a failed load: {failing.ready}")
+        print(f"States: {registry.status()}")
+        return ready_before_use and ready_after_use and not failing.ready
+    except Exception as e:
+        print(f"Error in lazy readiness test: {str(e)}")
+        return False
+
+def test_warm_up_readiness():
+    """Test that with a warm-up pass, readiness waits for every component to warm up"""
+    try:
+        registry = _registry(lazy=False)
+        ready_before = registry.ready
+        registry.get("embedding_model")
+        ready_partial = registry.ready
+        warmed = registry.warm_up()
+
+        print("\nWarm-up Readiness Test:")
+        print(f"Ready before warm-up: {ready_before}, with one loaded: {ready_partial}, after warm-up: {registry.ready}")
+        return not ready_before and not ready_partial and warmed and registry.ready
+    except Exception as e:
+        print(f"Error in warm-up readiness test: {str(e)}")
+        return False
+
+def main():
+    lazy_success = test_lazy_readiness()
+    warm_up_success = test_warm_up_readiness()
+
+    # Print overall results
+    print("\nTest Results:")
+    print(f"Lazy Readiness Test: {'✓ Passed' if lazy_success else '✗ Failed'}")
+    print(f"Warm-up Readiness Test: {'✓ Passed' if warm_up_success else '✗ Failed'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Collection, Tuple
+
+from fastapi import UploadFile
+
+logger = logging.getLogger(__name__)
+
+# Bytes read, hashed and written per step, bounding memory per upload
+UPLOAD_BLOCK_SIZE = 1 << 20
+
+def content_hasher():
+    """New hash object for document contents; BLAKE2b is faster than MD5 on 64-bit CPUs."""
+    return hashlib.blake2b(digest_size=16)
+
+def hash_file(path: str | Path) -> str:
+    """
+    Hash a file's contents in fixed-size blocks.
+
+    Args:
+        path: File to hash
+
+    Returns:
+        str: Hex digest, the same as ContentStore computes while saving
+    """
+    hasher = content_hasher()
+    with open(path, 'rb') as f:
+        while block := f.read(UPLOAD_BLOCK_SIZE):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+class ContentStore:
+    def __init__(self, root: str | Path):
+        """
+        Store uploaded files under paths derived from their content hash.
+
+        Identical uploads share one file, and concurrent uploads never
+        write to the same path: each streams into its own temporary file,
+        which is atomically renamed into place once its hash is known.
+        Files are only needed until their ingestion ends; collect() removes
+        those no pending job refers to.
+
+        Args:
+            root: Directory to store files in
+        """
+        self.root = Path(root)
+        self._tmp_dir = self.root / "tmp"
+        self._tmp_dir.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, doc_hash: str, suffix: str = ".pdf") -> Path:
+        """Where the file with this content hash is stored."""
+        return self.root / doc_hash[:2] / f"{doc_hash}{suffix}"
+
+    async def save_upload(self, upload: UploadFile, suffix: str = ".pdf") -> Tuple[str, Path]:
+        """
+        Stream an upload to disk, hashing it on the way.
+
+        Args:
+            upload: The uploaded file
+            suffix: Extension of the stored file
+
+        Returns:
+            Tuple[str, Path]: The content hash and the stored file's path
+        """
+        loop = asyncio.get_running_loop()
+        hasher = content_hasher()
+        tmp_path = self._tmp_dir / f"{uuid.uuid4().hex}.part"
+        size = 0
+        try:
+            with open(tmp_path, 'wb') as f:
+                while block := await upload.read(UPLOAD_BLOCK_SIZE):
+                    hasher.update(block)
+                    await loop.run_in_executor(None, f.write, block)
+                    size += len(block)
+            doc_hash = hasher.hexdigest()
+            path = self.path_for(doc_hash, suffix)
+            if path.exists():
+                logger.info(f"Upload {upload.filename} matches stored content {doc_hash}")
+                tmp_path.unlink()
+                # Counts as a fresh upload, so collect() leaves it alone until its job is queued
+                os.utime(path)
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, path)
+            logger.info(f"Stored {upload.filename} ({size} bytes) as {path}")
+            return doc_hash, path
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    def collect(self, keep: Collection[str], min_age: float) -> int:
+        """
+        Delete stored files that are no longer needed.
+
+        A file is kept if its hash is in keep or it was stored or uploaded
+        again within min_age seconds, which covers an upload whose job has
+        not been queued yet. Temporary files left by interrupted uploads are
+        deleted after min_age as well.
+
+        Args:
+            keep: Content hashes still referenced
+            min_age: Seconds a file is kept after it was last stored
+
+        Returns:
+            int: Number of files deleted
+        """
+        removed = 0
+        for path in self.root.glob("*/*"):
+            if path.parent == self._tmp_dir or path.stem in keep:
+                continue
+            removed += self._remove_if_older(path, min_age)
+        for path in self._tmp_dir.glob("*.part"):
+            removed += self._remove_if_older(path, min_age)
+        return removed
+
+    @staticmethod
+    def _remove_if_older(path: Path, min_age: float) -> bool:
+        try:
+            if time.time() - path.stat().st_mtime < min_age:
+                return False
+            path.unlink()
+        except FileNotFoundError:
+            return False
+        logger.info(f"Deleted unneeded upload {path}")
+        return True
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from typing import List
-from transformers import AutoTokenizer
+from backend.models import get_tokenizer
 import re
 import asyncio
 
@@ -28,10 +28,11 @@ class SimpleChunker:
         Args:
             max_chunk_size (int): Maximum number of tokens per chunk. Defaults to 512.
             model_name (str): Name of the model to use for tokenization. 
-                            Defaults to "sentence-transformers/all-MiniLM-L6-v2".
+                            Defaults to "sentence-transformers/all-MiniLM-L6-v2". Pass the
+                            embedding model to size chunks in the embedder's own tokens.
         """
         self.max_chunk_size = max_chunk_size
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.tokenizer = get_tokenizer(model_name)
         
         # Regex patterns for special blocks
         self.special_block_pattern = re.compile(
@@ -49,9 +50,10 @@ class SimpleChunker:
             text (str): Text to tokenize
             
         Returns:
-            int: Number of tokens
+            int: Number of tokens, including the special tokens the model adds,
+                 so a chunk of max_chunk_size tokens fits an input of that length
         """
-        return len(self.tokenizer.encode(text))
+        return len(self.tokenizer.encode(text, add_special_tokens=True))
 
     async def aget_tokens(self, text: str) -> int:
         """
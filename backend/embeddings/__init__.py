@@ -0,0 +1,15 @@
+from .lazy import LazyEmbeddingFunction
+from .onnx_backend import OnnxEmbeddingFunction, export_quantized_onnx
+from .sentence_transformer import SharedSentenceTransformerEmbeddingFunction
+from .truncation import TruncatedEmbeddingFunction, truncate_embeddings
+from .service import EmbeddingServer, EmbeddingServiceClient
+from .worker_pool import EmbeddingWorkerPool, PooledEmbeddingFunction
+
+__all__ = [
+    'LazyEmbeddingFunction',
+    'OnnxEmbeddingFunction', 'export_quantized_onnx',
+    'SharedSentenceTransformerEmbeddingFunction',
+    'TruncatedEmbeddingFunction', 'truncate_embeddings',
+    'EmbeddingWorkerPool', 'PooledEmbeddingFunction',
+    'EmbeddingServer', 'EmbeddingServiceClient'
+]
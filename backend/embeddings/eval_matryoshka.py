@@ -0,0 +1,73 @@
+import argparse
+import re
+import sys
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+# Add the parent directory to sys.path to allow imports from the backend package
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from backend.embeddings import truncate_embeddings
+
+MODEL_ID = "ibm-granite/granite-embedding-278m-multilingual"
+SAMPLE_PDFS = [str(Path(__file__).parent.parent / "arena_learning.pdf")]
+DIMS = [768, 512, 384, 256, 128, 64]
+PRECISIONS = {"float32": np.float32, "float16": np.float16}
+
+def _pseudo_queries(texts: List[str], max_words: int = 20) -> List[str]:
+    """Use the opening words of each chunk as a query whose answer is known to be in the corpus."""
+    queries = []
+    for text in texts:
+        words = re.sub(r'\s+', ' ', text).strip().split(' ')
+        if len(words) >= 8:
+            queries.append(' '.join(words[:max_words]))
+    return queries
+
+def _top_k(queries: np.ndarray, chunks: np.ndarray, k: int) -> np.ndarray:
+    scores = queries.astype(np.float32) @ chunks.astype(np.float32).T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+def evaluate(pdf_paths: List[str], k: int = 5) -> None:
+    """
+    Report recall@k and index size for each embedding width and storage precision.
+
+    Ground truth is exact search with full-width float32 vectors, so the
+    recall shows how much ranking each smaller index gives up.
+
+    Args:
+        pdf_paths: PDFs to chunk and embed
+        k: Number of results compared per query
+    """
+    from sentence_transformers import SentenceTransformer
+    from backend.workflows.pdf_workflow import PdfToChunksWorkflow
+
+    workflow = PdfToChunksWorkflow(max_chunk_size=512)
+    texts = [chunk.content for path in pdf_paths for chunk in workflow.process(path)]
+    queries = _pseudo_queries(texts)
+    model = SentenceTransformer(MODEL_ID, device="cpu")
+    chunk_vectors = model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+    query_vectors = model.encode(queries, convert_to_numpy=True, show_progress_bar=False)
+
+    full_dim = chunk_vectors.shape[1]
+    truth = _top_k(truncate_embeddings(query_vectors, 0), truncate_embeddings(chunk_vectors, 0), k)
+    print(f"\n{len(texts)} chunks, {len(queries)} queries, full width {full_dim}")
+    print(f"{'dim':>5} {'precision':>9} {'recall@' + str(k):>9} {'MB / 100k chunks':>17}")
+    for dim in [d for d in DIMS if d <= full_dim]:
+        queries_dim = truncate_embeddings(query_vectors, dim)
+        for name, dtype in PRECISIONS.items():
+            chunks_dim = truncate_embeddings(chunk_vectors, dim).astype(dtype)
+            found = _top_k(queries_dim, chunks_dim, k)
+            recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+            size_mb = 100000 * dim * np.dtype(dtype).itemsize / 1e6
+            print(f"{dim:>5} {name:>9} {recall:>9.3f} {size_mb:>17.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate embedding truncation and precision")
+    parser.add_argument("pdfs", nargs="*", default=SAMPLE_PDFS, help="PDF files to evaluate on")
+    parser.add_argument("--k", type=int, default=5, help="Results compared per query")
+    args = parser.parse_args()
+    evaluate(args.pdfs, k=args.k)
+
+if __name__ == "__main__":
+    main()
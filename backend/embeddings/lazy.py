@@ -0,0 +1,19 @@
+from typing import Callable
+
+from chromadb import Documents, EmbeddingFunction, Embeddings
+
+class LazyEmbeddingFunction(EmbeddingFunction):
+    def __init__(self, load: Callable[[], EmbeddingFunction]):
+        """
+        Chroma embedding function that obtains the real function on first call.
+
+        Lets a collection be opened before the embedding model is loaded.
+
+        Args:
+            load (Callable[[], EmbeddingFunction]): Returns the embedding function,
+                            loading it if needed; called on every embed
+        """
+        self.load = load
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return self.load()(input)
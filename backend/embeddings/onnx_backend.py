@@ -0,0 +1,200 @@
+import fcntl
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from chromadb import Documents, EmbeddingFunction, Embeddings
+
+_log = logging.getLogger(__name__)
+
+EMBEDDING_MODEL_ID = "ibm-granite/granite-embedding-278m-multilingual"
+ONNX_MODEL_DIR = "./data/onnx"
+QUANTIZED_MODEL_FILE = "model_int8.onnx"
+POOLING_CONFIG_FILE = "pooling.json"
+
+def onnx_model_dir(model_name: str, root: str | Path = ONNX_MODEL_DIR) -> Path:
+    """Directory holding the exported files of a model."""
+    return Path(root) / model_name.replace("/", "__")
+
+def export_quantized_onnx(model_name: str = EMBEDDING_MODEL_ID, root: str | Path = ONNX_MODEL_DIR) -> Path:
+    """
+    Export a SentenceTransformer model to ONNX with int8 dynamic quantization.
+
+    The transformer is exported with dynamic batch and sequence axes, its
+    weights are quantized to int8, and the tokenizer and pooling settings are
+    saved next to it so inference needs neither torch nor sentence-transformers.
+    Existing exports are reused, and concurrent callers export only once.
+
+    Args:
+        model_name (str): SentenceTransformer model to export.
+                        Defaults to "ibm-granite/granite-embedding-278m-multilingual".
+        root (str | Path): Directory exports are cached under. Defaults to "./data/onnx".
+
+    Returns:
+        Path: Directory containing the quantized model, tokenizer and pooling config
+    """
+    output_dir = onnx_model_dir(model_name, root)
+    if _is_exported(output_dir):
+        return output_dir
+
+    # Processes starting on a cold cache (e.g. several embedding workers) export
+    # once: the others wait on the lock and then find the finished export
+    output_dir.parent.mkdir(parents=True, exist_ok=True)
+    lock_path = output_dir.with_name(output_dir.name + ".lock")
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            if _is_exported(output_dir):
+                return output_dir
+            # Export into a staging directory, so a crash never leaves a partial export in place
+            staging_dir = Path(tempfile.mkdtemp(prefix=f"{output_dir.name}.", dir=output_dir.parent))
+            try:
+                os.chmod(staging_dir, 0o755)
+                _log.info(f"Exporting {model_name} to quantized ONNX in {output_dir}")
+                _export(model_name, staging_dir)
+                if output_dir.exists():
+                    shutil.rmtree(output_dir)
+                os.replace(staging_dir, output_dir)
+            except BaseException:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+                raise
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+    return output_dir
+
+def _is_exported(output_dir: Path) -> bool:
+    """Whether a complete export exists in output_dir."""
+    return (output_dir / QUANTIZED_MODEL_FILE).exists() and (output_dir / POOLING_CONFIG_FILE).exists()
+
+def _export(model_name: str, output_dir: Path) -> None:
+    """Write the quantized model, tokenizer and pooling config of model_name to output_dir."""
+    # Export-time only dependencies
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0]
+    tokenizer = transformer.tokenizer
+    pooling = next(module for module in model if isinstance(module, Pooling))
+
+    input_names = [name for name in tokenizer.model_input_names if name in ("input_ids", "attention_mask", "token_type_ids")]
+    sample = tokenizer(["warm up"], return_tensors="pt")
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    class _Encoder(torch.nn.Module):
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, *inputs):
+            return self.auto_model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    fp32_path = output_dir / "model.onnx"
+    with torch.no_grad():
+        torch.onnx.export(
+            _Encoder(transformer.auto_model.eval()),
+            tuple(sample[name] for name in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=17
+        )
+    quantize_dynamic(str(fp32_path), str(output_dir / QUANTIZED_MODEL_FILE), weight_type=QuantType.QInt8)
+    fp32_path.unlink()
+
+    tokenizer.save_pretrained(str(output_dir))
+    with open(output_dir / POOLING_CONFIG_FILE, "w", encoding="utf-8") as f:
+        json.dump({
+            "mode": "cls" if pooling.pooling_mode_cls_token else "mean",
+            "normalize": any(isinstance(module, Normalize) for module in model),
+            "max_seq_length": model.max_seq_length
+        }, f)
+
+class OnnxEmbeddingFunction(EmbeddingFunction):
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL_ID,
+        root: str | Path = ONNX_MODEL_DIR,
+        batch_size: int = 32,
+        num_threads: Optional[int] = None
+    ):
+        """
+        Chroma embedding function running an int8-quantized ONNX export on CPU.
+
+        Args:
+            model_name (str): SentenceTransformer model to export and run.
+                            Defaults to "ibm-granite/granite-embedding-278m-multilingual".
+            root (str | Path): Directory exports are cached under. Defaults to "./data/onnx".
+            batch_size (int): Texts per forward pass. Defaults to 32.
+            num_threads (Optional[int]): Intra-op threads, None for onnxruntime's default
+        """
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        model_dir = export_quantized_onnx(model_name, root)
+        with open(model_dir / POOLING_CONFIG_FILE, "r", encoding="utf-8") as f:
+            self.pooling = json.load(f)
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            str(model_dir / QUANTIZED_MODEL_FILE),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self._input_names = [i.name for i in self.session.get_inputs()]
+
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Pool token states into sentence vectors the way the SentenceTransformer model does."""
+        if self.pooling["mode"] == "cls":
+            vectors = hidden[:, 0]
+        else:
+            mask = attention_mask[..., None].astype(np.float32)
+            vectors = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.pooling["normalize"]:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.clip(norms, 1e-12, None)
+        return vectors.astype(np.float32)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts in batches.
+
+        Args:
+            texts (List[str]): Texts to embed
+
+        Returns:
+            np.ndarray: Float32 vectors of shape (len(texts), dimension)
+        """
+        batches = []
+        for start in range(0, len(texts), self.batch_size):
+            encoded = self.tokenizer(
+                texts[start:start + self.batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.pooling["max_seq_length"],
+                return_tensors="np"
+            )
+            feeds: Dict[str, np.ndarray] = {
+                name: encoded[name].astype(np.int64) for name in self._input_names
+            }
+            hidden = self.session.run(["last_hidden_state"], feeds)[0]
+            batches.append(self._pool(hidden, encoded["attention_mask"]))
+        return np.concatenate(batches) if batches else np.zeros((0, 0), dtype=np.float32)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return self.encode(list(input)).tolist()
@@ -0,0 +1,27 @@
+from chromadb import Documents, EmbeddingFunction, Embeddings
+
+from backend.models import get_sentence_transformer
+
+class SharedSentenceTransformerEmbeddingFunction(EmbeddingFunction):
+    def __init__(self, model_name: str, device: str = "cpu", normalize_embeddings: bool = False):
+        """
+        Chroma embedding function using the process-wide SentenceTransformer for a model.
+
+        Drop-in for chromadb's SentenceTransformerEmbeddingFunction, which
+        loads its own model and tokenizer copy.
+
+        Args:
+            model_name (str): SentenceTransformer model id
+            device (str): Device to run the model on. Defaults to "cpu".
+            normalize_embeddings (bool): Scale vectors to unit length. Defaults to False.
+        """
+        self.model = get_sentence_transformer(model_name, device=device)
+        self.normalize_embeddings = normalize_embeddings
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return self.model.encode(
+            list(input),
+            convert_to_numpy=True,
+            normalize_embeddings=self.normalize_embeddings,
+            show_progress_bar=False
+        ).tolist()
@@ -0,0 +1,169 @@
+import argparse
+import logging
+import os
+import threading
+import time
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from .worker_pool import EMBEDDING_MODEL_ID, EmbeddingWorkerPool, _consume, _publish
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_AUTHKEY = b"ragapp-embeddings"
+
+class EmbeddingServer:
+    def __init__(self, pool: EmbeddingWorkerPool, socket_path: str | Path, authkey: bytes = DEFAULT_AUTHKEY):
+        """
+        Serve an EmbeddingWorkerPool to other processes over a Unix socket.
+
+        Several API processes can share one set of model copies this way.
+        Requests carry texts; replies carry the name of a shared memory block
+        holding the vectors, which the client frees after copying.
+
+        Args:
+            pool (EmbeddingWorkerPool): Pool that computes the embeddings
+            socket_path (str | Path): Unix socket to listen on
+            authkey (bytes): Shared secret clients must present
+        """
+        self.pool = pool
+        self.socket_path = Path(socket_path)
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+        self._listener = Listener(str(self.socket_path), family="AF_UNIX", authkey=authkey)
+
+    def _handle(self, connection: Connection) -> None:
+        """Answer one client's requests until it disconnects."""
+        with connection:
+            while True:
+                try:
+                    request = connection.recv()
+                except EOFError:
+                    return
+                if request == "ping":
+                    connection.send(("ok", self.pool.dimension))
+                    continue
+                try:
+                    connection.send(("ok", _publish(self.pool.embed(request))))
+                except Exception as e:
+                    _log.error(f"Embedding request failed: {e}")
+                    connection.send(("error", str(e)))
+
+    def serve_forever(self) -> None:
+        """Accept clients, serving each on its own thread."""
+        _log.info(f"Embedding service listening on {self.socket_path}")
+        while True:
+            try:
+                connection = self._listener.accept()
+            except OSError:
+                return
+            except Exception as e:
+                _log.warning(f"Rejected embedding client: {e}")
+                continue
+            threading.Thread(target=self._handle, args=(connection,), daemon=True).start()
+
+    def close(self) -> None:
+        """Stop accepting clients and remove the socket."""
+        self._listener.close()
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+
+class EmbeddingServiceClient:
+    def __init__(self, socket_path: str | Path, authkey: bytes = DEFAULT_AUTHKEY, connect_timeout: float = 0.0):
+        """
+        Client of an EmbeddingServer, usable from many threads.
+
+        Each thread keeps its own connection, so concurrent requests are
+        served in parallel by the server's worker pool.
+
+        Args:
+            socket_path (str | Path): Unix socket the server listens on
+            authkey (bytes): Shared secret of the server
+            connect_timeout (float): Seconds to keep retrying while the server starts
+
+        Raises:
+            ConnectionError: If the server cannot be reached in time
+        """
+        self.socket_path = str(socket_path)
+        self.authkey = authkey
+        self._local = threading.local()
+        self.dimension = self._wait_ready(connect_timeout)
+
+    def _wait_ready(self, timeout: float) -> int:
+        """Ping the server until it answers, returning the embedding dimension."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self._request("ping")
+            except (OSError, EOFError) as e:
+                self._local.connection = None
+                if time.monotonic() >= deadline:
+                    raise ConnectionError(f"Embedding service at {self.socket_path} is not available: {e}")
+                time.sleep(0.5)
+
+    def _connection(self) -> Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = Client(self.socket_path, family="AF_UNIX", authkey=self.authkey)
+            self._local.connection = connection
+        return connection
+
+    def _request(self, request):
+        connection = self._connection()
+        connection.send(request)
+        status, payload = connection.recv()
+        if status != "ok":
+            raise RuntimeError(f"Embedding service failed: {payload}")
+        return payload
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts on the shared service.
+
+        Args:
+            texts (List[str]): Texts to embed
+
+        Returns:
+            np.ndarray: Float32 vectors of shape (len(texts), dimension)
+        """
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        try:
+            return _consume(*self._request(list(texts)))
+        except (OSError, EOFError):
+            # The server restarted; reconnect once
+            self._local.connection = None
+            return _consume(*self._request(list(texts)))
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Shared embedding service")
+    parser.add_argument("--socket", required=True, help="Unix socket to listen on")
+    parser.add_argument("--model", default=EMBEDDING_MODEL_ID, help="SentenceTransformer model")
+    parser.add_argument("--workers", type=int, default=2, help="Embedding worker processes")
+    parser.add_argument("--backend", default="torch", choices=["torch", "onnx-int8"], help="Embedding backend")
+    parser.add_argument("--onnx-dir", default="./data/onnx", help="Where ONNX exports are cached")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    authkey = os.environ.get("EMBEDDING_SERVICE_AUTHKEY", DEFAULT_AUTHKEY.decode()).encode()
+    pool = EmbeddingWorkerPool(
+        model_name=args.model,
+        num_workers=args.workers,
+        backend=args.backend,
+        onnx_dir=args.onnx_dir
+    )
+    server = EmbeddingServer(pool, args.socket, authkey=authkey)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        pool.close()
+
+if __name__ == "__main__":
+    main()
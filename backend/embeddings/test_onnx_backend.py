@@ -0,0 +1,74 @@
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the parent directory to sys.path to allow imports from the backend package
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from backend.embeddings import OnnxEmbeddingFunction
+
+MODEL_ID = "ibm-granite/granite-embedding-278m-multilingual"
+TEXTS = [
+    "Tesla delivered over 1.8 million vehicles in 2023, a 38% increase year over year.",
+    "Arena Learning simulates chatbot battles to build training data for WizardLM.",
+    "Automotive gross margin declined due to price reductions.",
+    "Les revenus totaux ont augmenté grâce aux livraisons du Model Y.",
+    "Die Batteriezellen 4680 wurden im vierten Quartal hochgefahren.",
+    "What is the total energy storage deployed?",
+] * 16
+
+def _cosines(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.sum(a * b, axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+def _load_models():
+    """Load the quantized ONNX model, exporting it on first use, and the torch model."""
+    from sentence_transformers import SentenceTransformer
+    
+    return OnnxEmbeddingFunction(MODEL_ID), SentenceTransformer(MODEL_ID, device="cpu")
+
+def test_parity():
+    """Test that the quantized ONNX backend agrees with the torch backend"""
+    try:
+        onnx_model, torch_model = _load_models()
+        onnx_vectors = onnx_model.encode(TEXTS[:6])
+        torch_vectors = torch_model.encode(TEXTS[:6], convert_to_numpy=True)
+        cosines = _cosines(onnx_vectors, torch_vectors)
+        print("\nParity Test:")
+        print(f"Cosine agreement: min {cosines.min():.4f}, mean {cosines.mean():.4f}")
+        return cosines.min() > 0.98
+    except Exception as e:
+        print(f"Error in parity: {str(e)}")
+        return False
+
+def _throughput(encode, texts) -> float:
+    encode(texts[:4])  # warm up
+    start_time = time.perf_counter()
+    encode(texts)
+    return len(texts) / (time.perf_counter() - start_time)
+
+def test_throughput():
+    """Benchmark texts per second of both backends on the same batch"""
+    try:
+        onnx_model, torch_model = _load_models()
+        onnx_rate = _throughput(onnx_model.encode, TEXTS)
+        torch_rate = _throughput(lambda texts: torch_model.encode(texts, batch_size=32), TEXTS)
+        print("\nThroughput Benchmark:")
+        print(f"torch fp32: {torch_rate:.1f} texts/s")
+        print(f"onnx int8:  {onnx_rate:.1f} texts/s ({onnx_rate / torch_rate:.2f}x)")
+        return onnx_rate > 0 and torch_rate > 0
+    except Exception as e:
+        print(f"Error in throughput: {str(e)}")
+        return False
+
+def main():
+    parity_success = test_parity()
+    throughput_success = test_throughput()
+    
+    # Print overall results
+    print("\nTest Results:")
+    print(f"Parity Test: {'✓ Passed' if parity_success else '✗ Failed'}")
+    print(f"Throughput Benchmark: {'✓ Passed' if throughput_success else '✗ Failed'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+# Add the parent directory to sys.path to allow imports from the backend package
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from backend.embeddings import EmbeddingServer, EmbeddingServiceClient, EmbeddingWorkerPool
+
+TEXTS = [
+    "Tesla delivered over 1.8 million vehicles in 2023.",
+    "Arena Learning simulates chatbot battles to build training data.",
+    "Automotive gross margin declined due to price reductions.",
+] * 40
+
+@contextmanager
+def _serve():
+    """Run a pool behind an embedding server, yielding the pool and a connected client."""
+    pool = EmbeddingWorkerPool(num_workers=2)
+    socket_path = Path(tempfile.mkdtemp()) / "embeddings.sock"
+    server = EmbeddingServer(pool, socket_path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield pool, EmbeddingServiceClient(socket_path, connect_timeout=10)
+    finally:
+        server.close()
+        pool.close()
+
+def test_service_parity():
+    """Test that vectors from the service match the pool's"""
+    try:
+        with _serve() as (pool, client):
+            served = client.embed(TEXTS[:3])
+            direct = pool.embed(TEXTS[:3])
+        print("\nService Parity Test:")
+        print(f"Shape: {served.shape}, max abs diff: {np.abs(served - direct).max():.2e}")
+        return served.shape == (3, client.dimension) and np.allclose(served, direct, atol=1e-5)
+    except Exception as e:
+        print(f"Error in service parity: {str(e)}")
+        return False
+
+def test_concurrent_clients():
+    """Test that concurrent threads each get their own vectors back over separate connections"""
+    try:
+        with _serve() as (_, client):
+            start_time = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(lambda text: client.embed([text]), TEXTS))
+        elapsed = time.perf_counter() - start_time
+        print("\nConcurrent Clients Test:")
+        print(f"{len(TEXTS)} single-text calls in {elapsed:.2f}s")
+        first = results[0][0]
+        return all(np.allclose(r[0], first, atol=1e-5) for r in results[::3])
+    except Exception as e:
+        print(f"Error in concurrent clients: {str(e)}")
+        return False
+
+def main():
+    parity_success = test_service_parity()
+    concurrent_success = test_concurrent_clients()
+
+    # Print overall results
+    print("\nTest Results:")
+    print(f"Service Parity Test: {'✓ Passed' if parity_success else '✗ Failed'}")
+    print(f"Concurrent Clients Test: {'✓ Passed' if concurrent_success else '✗ Failed'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# Add the parent directory to sys.path to allow imports from the backend package
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from backend.embeddings import EmbeddingWorkerPool, PooledEmbeddingFunction
+
+TEXTS = [
+    "Tesla delivered over 1.8 million vehicles in 2023.",
+    "Arena Learning simulates chatbot battles to build training data.",
+    "Automotive gross margin declined due to price reductions.",
+] * 40
+
+def test_pooled_embedding():
+    """Test that pooled vectors match an in-process model"""
+    from sentence_transformers import SentenceTransformer
+    
+    pool = None
+    try:
+        pool = EmbeddingWorkerPool(num_workers=2)
+        pooled = np.asarray(PooledEmbeddingFunction(pool)(TEXTS[:3]))
+        local = SentenceTransformer(pool.model_name, device="cpu").encode(TEXTS[:3])
+        cosine = np.sum(pooled * local, axis=1) / (
+            np.linalg.norm(pooled, axis=1) * np.linalg.norm(local, axis=1)
+        )
+        print("\nPooled Embedding Test:")
+        print(f"Shape: {pooled.shape}, min cosine vs in-process: {cosine.min():.6f}")
+        return pooled.shape == (3, pool.dimension) and cosine.min() > 0.9999
+    except Exception as e:
+        print(f"Error in pooled embedding: {str(e)}")
+        return False
+    finally:
+        if pool is not None:
+            pool.close()
+
+def test_concurrent_callers():
+    """Test that concurrent callers each get their own vectors back"""
+    pool = None
+    try:
+        pool = EmbeddingWorkerPool(num_workers=2)
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda text: pool.embed([text]), TEXTS))
+        elapsed = time.perf_counter() - start_time
+        print("\nConcurrent Callers Test:")
+        print(f"{len(TEXTS)} single-text calls in {elapsed:.2f}s")
+        first = results[0][0]
+        return all(np.allclose(r[0], first, atol=1e-5) for r in results[::3])
+    except Exception as e:
+        print(f"Error in concurrent callers: {str(e)}")
+        return False
+    finally:
+        if pool is not None:
+            pool.close()
+
+def test_worker_death():
+    """Test that a killed worker is replaced and the pool keeps serving"""
+    pool = None
+    try:
+        pool = EmbeddingWorkerPool(num_workers=1, request_timeout=60)
+        pool._workers[0].process.kill()
+        
+        # Requests fail fast, instead of hanging, until the replacement starts
+        start_time = time.perf_counter()
+        while True:
+            try:
+                vectors = pool.embed(TEXTS[:2])
+                break
+            except RuntimeError:
+                if time.perf_counter() - start_time > 120:
+                    raise
+                time.sleep(0.5)
+        elapsed = time.perf_counter() - start_time
+        print("\nWorker Death Test:")
+        print(f"Served again {elapsed:.1f}s after the worker was killed")
+        return vectors.shape == (2, pool.dimension)
+    except Exception as e:
+        print(f"Error in worker death: {str(e)}")
+        return False
+    finally:
+        if pool is not None:
+            pool.close()
+
+def main():
+    pooled_success = test_pooled_embedding()
+    concurrent_success = test_concurrent_callers()
+    death_success = test_worker_death()
+    
+    # Print overall results
+    print("\nTest Results:")
+    print(f"Pooled Embedding Test: {'✓ Passed' if pooled_success else '✗ Failed'}")
+    print(f"Concurrent Callers Test: {'✓ Passed' if concurrent_success else '✗ Failed'}")
+    print(f"Worker Death Test: {'✓ Passed' if death_success else '✗ Failed'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import numpy as np
+from chromadb import Documents, EmbeddingFunction, Embeddings
+
+def truncate_embeddings(embeddings, dim: int) -> np.ndarray:
+    """
+    Keep the leading dimensions of embeddings and rescale them to unit length.
+
+    Matryoshka-trained models pack most of the signal into the leading
+    dimensions; for other models this trades recall for size.
+
+    Args:
+        embeddings: Vectors of shape (n, full_dim)
+        dim (int): Dimensions to keep; 0 or anything >= full_dim only renormalizes
+
+    Returns:
+        np.ndarray: Float32 vectors of shape (n, min(dim, full_dim))
+    """
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    if dim and dim < vectors.shape[-1]:
+        vectors = vectors[..., :dim]
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.clip(norms, 1e-12, None)
+
+class TruncatedEmbeddingFunction(EmbeddingFunction):
+    def __init__(self, embedding_function: EmbeddingFunction, dim: int):
+        """
+        Chroma embedding function that truncates another function's vectors.
+
+        Args:
+            embedding_function (EmbeddingFunction): Produces the full-width vectors
+            dim (int): Dimensions to keep
+        """
+        self.embedding_function = embedding_function
+        self.dim = dim
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return truncate_embeddings(self.embedding_function(input), self.dim).tolist()
@@ -0,0 +1,325 @@
+import itertools
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import wait
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from chromadb import Documents, EmbeddingFunction, Embeddings
+
+_log = logging.getLogger(__name__)
+
+EMBEDDING_MODEL_ID = "ibm-granite/granite-embedding-278m-multilingual"
+
+_STOP = None
+
+def _publish(vectors: np.ndarray) -> Tuple[str, Tuple[int, ...]]:
+    """
+    Copy vectors into a new shared memory block owned by the reader.
+
+    The block is dropped from this process's resource tracker, so the reader
+    that attaches to it is the only one responsible for unlinking it.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    shm = shared_memory.SharedMemory(create=True, size=max(vectors.nbytes, 1))
+    np.ndarray(vectors.shape, dtype=np.float32, buffer=shm.buf)[:] = vectors
+    resource_tracker.unregister(shm._name, "shared_memory")
+    shm.close()
+    return shm.name, vectors.shape
+
+def _consume(name: str, shape: Tuple[int, ...]) -> np.ndarray:
+    """Copy vectors out of a shared memory block and free it."""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+def _load_encoder(model_name: str, backend: str, onnx_dir: str):
+    """Load the model for a worker, returning a function from texts to a float32 matrix."""
+    # Imported here so only worker processes pay for the model runtime
+    if backend == "onnx-int8":
+        from .onnx_backend import OnnxEmbeddingFunction
+        return OnnxEmbeddingFunction(model_name, root=onnx_dir).encode
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name, device="cpu")
+    return lambda texts: model.encode(texts, batch_size=len(texts), convert_to_numpy=True, show_progress_bar=False)
+
+def _worker_main(model_name: str, backend: str, onnx_dir: str, requests: mp.Queue, responses: mp.Queue) -> None:
+    """Load one model copy and embed batches until told to stop."""
+    try:
+        encode = _load_encoder(model_name, backend, onnx_dir)
+        dimension = int(encode(["warm up"]).shape[1])
+    except Exception as e:
+        responses.put(("error", None, f"Failed to load {model_name}: {e}"))
+        return
+    responses.put(("ready", None, dimension))
+
+    while True:
+        request = requests.get()
+        if request is _STOP:
+            return
+        request_id, texts = request
+        try:
+            responses.put(("ok", request_id, _publish(encode(texts))))
+        except Exception as e:
+            responses.put(("error", request_id, str(e)))
+
+class _Worker:
+    def __init__(self, process, requests):
+        """A worker process, its own request queue and the requests it has not answered yet."""
+        self.process = process
+        self.requests = requests
+        self.request_ids: Set[int] = set()
+        self.alive = True
+        self.started_at = time.monotonic()
+        self.died_at = 0.0
+        self.failures = 0
+
+class EmbeddingWorkerPool:
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL_ID,
+        num_workers: int = 2,
+        max_batch_size: int = 64,
+        startup_timeout: float = 300.0,
+        backend: str = "torch",
+        onnx_dir: str = "./data/onnx",
+        request_timeout: float = 120.0
+    ):
+        """
+        Run embedding models in separate worker processes.
+
+        Each worker holds one model copy and takes batches from its own
+        request queue; each batch goes to the worker with the fewest
+        unanswered ones. Ingestion and query embedding therefore no longer
+        contend for the API process's GIL. Vectors come back through shared
+        memory; only the block name travels over the response queue.
+
+        A worker that dies (out of memory, a crash in the model runtime)
+        fails the requests it held and is replaced, backing off while
+        replacements keep dying.
+
+        Args:
+            model_name (str): SentenceTransformer model each worker loads.
+                            Defaults to "ibm-granite/granite-embedding-278m-multilingual".
+            num_workers (int): Number of worker processes. Defaults to 2.
+            max_batch_size (int): Texts per request sent to a worker. Larger inputs
+                            are split so several workers can share them. Defaults to 64.
+            startup_timeout (float): Seconds to wait for workers to load the model.
+            backend (str): "torch" for SentenceTransformer or "onnx-int8" for the
+                            quantized ONNX export. Defaults to "torch".
+            onnx_dir (str): Directory ONNX exports are cached under.
+            request_timeout (float): Default seconds embed waits for its vectors. Defaults to 120.
+
+        Raises:
+            RuntimeError: If a worker fails to load the model in time
+        """
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.request_timeout = request_timeout
+        self._worker_args = (model_name, backend, onnx_dir)
+
+        # Spawn rather than fork: torch and the API process's threads are not fork-safe
+        self._context = mp.get_context("spawn")
+        self._responses = self._context.Queue()
+        self._workers = [self._spawn(i) for i in range(num_workers)]
+
+        try:
+            self.dimension = self._wait_ready(num_workers, startup_timeout)
+        except Exception:
+            self.close()
+            raise
+
+        self._ids = itertools.count()
+        self._pending: Dict[int, Tuple[Future, _Worker]] = {}
+        self._lock = threading.Lock()
+        self._closing = threading.Event()
+        self._listener = threading.Thread(target=self._listen, name="embedding-pool-listener", daemon=True)
+        self._listener.start()
+        self._watcher = threading.Thread(target=self._watch, name="embedding-pool-watcher", daemon=True)
+        self._watcher.start()
+        _log.info(f"Started {num_workers} embedding workers for {model_name}")
+
+    def _spawn(self, index: int) -> _Worker:
+        """Start a worker process with its own request queue."""
+        requests = self._context.Queue()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(*self._worker_args, requests, self._responses),
+            name=f"embedding-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        return _Worker(process, requests)
+
+    def _wait_ready(self, num_workers: int, timeout: float) -> int:
+        """Wait until every worker has loaded the model, returning the embedding dimension."""
+        dimension = None
+        for _ in range(num_workers):
+            try:
+                status, _, payload = self._responses.get(timeout=timeout)
+            except queue.Empty:
+                raise RuntimeError(f"Embedding workers did not start within {timeout:g}s")
+            if status != "ready":
+                raise RuntimeError(payload)
+            dimension = payload
+        return dimension
+
+    def _listen(self) -> None:
+        """Resolve pending requests as workers answer them."""
+        while True:
+            try:
+                response = self._responses.get()
+            except Exception as e:
+                # A worker killed mid-write can leave a truncated message behind
+                _log.error(f"Unreadable embedding worker response: {e}")
+                continue
+            if response is _STOP:
+                return
+            status, request_id, payload = response
+            if request_id is None:
+                # Startup report of a replacement worker
+                if status == "ready":
+                    _log.info("Replacement embedding worker is ready")
+                else:
+                    _log.error(f"Replacement embedding worker failed to start: {payload}")
+                continue
+            with self._lock:
+                future, worker = self._pending.pop(request_id, (None, None))
+                if worker is not None:
+                    worker.request_ids.discard(request_id)
+            if status == "ok":
+                vectors = _consume(*payload)
+                if future is not None:
+                    future.set_result(vectors)
+            elif future is not None:
+                future.set_exception(RuntimeError(f"Embedding worker failed: {payload}"))
+
+    def _watch(self) -> None:
+        """Fail the requests of workers that die and start their replacements."""
+        while not self._closing.is_set():
+            with self._lock:
+                running = {worker.process.sentinel: worker for worker in self._workers if worker.alive}
+            if running:
+                died = wait(list(running), timeout=1.0)
+            else:
+                died = []
+                self._closing.wait(1.0)
+            if self._closing.is_set():
+                return
+            for sentinel in died:
+                self._fail_worker(running[sentinel])
+            self._replace_dead_workers()
+
+    def _fail_worker(self, worker: _Worker) -> None:
+        """Mark a worker dead and fail the requests it had not answered."""
+        with self._lock:
+            worker.alive = False
+            worker.died_at = time.monotonic()
+            failed = [self._pending.pop(request_id)[0] for request_id in worker.request_ids if request_id in self._pending]
+            worker.request_ids.clear()
+        worker.process.join(timeout=1)  # Reap it, so its exit code is known
+        worker.requests.cancel_join_thread()
+        worker.requests.close()
+        _log.error(
+            f"Embedding worker {worker.process.name} died with exit code {worker.process.exitcode}, "
+            f"failing {len(failed)} requests"
+        )
+        error = RuntimeError(f"Embedding worker {worker.process.name} died (exit code {worker.process.exitcode})")
+        for future in failed:
+            future.set_exception(error)
+
+    def _replace_dead_workers(self) -> None:
+        """Start replacements for dead workers, backing off while they keep dying young."""
+        now = time.monotonic()
+        for index, worker in enumerate(self._workers):
+            if worker.alive:
+                continue
+            failures = worker.failures + 1 if worker.died_at - worker.started_at < 60 else 0
+            if now - worker.died_at < min(2 ** failures, 60):
+                continue
+            replacement = self._spawn(index)
+            replacement.failures = failures
+            with self._lock:
+                self._workers[index] = replacement
+            _log.info(f"Started replacement embedding worker {replacement.process.name}")
+
+    def _submit(self, texts: List[str]) -> Future:
+        future: Future = Future()
+        with self._lock:
+            alive = [worker for worker in self._workers if worker.alive]
+            if not alive:
+                raise RuntimeError("No embedding workers are running")
+            worker = min(alive, key=lambda w: len(w.request_ids))
+            request_id = next(self._ids)
+            self._pending[request_id] = (future, worker)
+            worker.request_ids.add(request_id)
+            worker.requests.put((request_id, texts))
+        return future
+
+    def embed(self, texts: List[str], timeout: Optional[float] = None) -> np.ndarray:
+        """
+        Embed texts on the worker processes.
+
+        Args:
+            texts (List[str]): Texts to embed
+            timeout (Optional[float]): Seconds to wait for the vectors. Defaults to request_timeout
+
+        Returns:
+            np.ndarray: Float32 vectors of shape (len(texts), dimension)
+
+        Raises:
+            RuntimeError: If the worker handling a batch fails or dies
+            TimeoutError: If the vectors do not arrive in time
+        """
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        futures = [
+            self._submit(list(texts[start:start + self.max_batch_size]))
+            for start in range(0, len(texts), self.max_batch_size)
+        ]
+        deadline = time.monotonic() + (timeout if timeout is not None else self.request_timeout)
+        return np.concatenate([
+            future.result(timeout=max(0.0, deadline - time.monotonic())) for future in futures
+        ])
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        closing = getattr(self, "_closing", None)
+        if closing is not None:
+            closing.set()
+            self._watcher.join(timeout=5)
+        for worker in self._workers:
+            if worker.process.is_alive():
+                worker.requests.put(_STOP)
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        if getattr(self, "_listener", None) is not None:
+            self._responses.put(_STOP)
+            self._listener.join(timeout=5)
+
+class PooledEmbeddingFunction(EmbeddingFunction):
+    def __init__(self, pool: EmbeddingWorkerPool):
+        """
+        Chroma embedding function backed by an EmbeddingWorkerPool.
+
+        Also accepts an EmbeddingServiceClient, or anything else with an
+        embed(texts) method returning an array of vectors.
+
+        Args:
+            pool: Pool or service client that computes the embeddings
+        """
+        self.pool = pool
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return self.pool.embed(list(input)).tolist()
@@ -1,5 +1,5 @@
 import openai  # Changed to import the package directly
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 class FastMLXEndpoint:
     def __init__(self, api_key: str, url_base: str = "http://localhost:8000"):
@@ -52,3 +52,32 @@ class FastMLXEndpoint:
             messages=[{"role": "user", "content": prompt}]
         )
         return response.choices[0].message.content
+
+    async def astream(self, prompt: str, model_name: str = "mistral") -> AsyncIterator[str]:
+        """
+        Stream a text completion token by token using the asynchronous client.
+        
+        Args:
+            prompt (str): The input prompt for generation
+            model_name (str): The model to use for generation. Defaults to "mistral"
+            
+        Yields:
+            str: The next piece of generated text as soon as the server produces it
+        
+        Closing the generator early closes the HTTP stream, so the server
+        stops generating for a client that went away.
+        """
+        stream = await self.async_client.chat.completions.create(
+            model=model_name,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True
+        )
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+        finally:
+            await stream.close()
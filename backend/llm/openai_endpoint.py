@@ -1,5 +1,5 @@
 from openai import OpenAI, AsyncOpenAI
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 class OpenAIEndpoint:
     def __init__(self, api_key: str):
@@ -40,3 +40,32 @@ class OpenAIEndpoint:
             messages=[{"role": "user", "content": prompt}]
         )
         return response.choices[0].message.content
+
+    async def astream(self, prompt: str, model_name: str = "gpt-3.5-turbo") -> AsyncIterator[str]:
+        """
+        Stream a text completion token by token using the asynchronous OpenAI client.
+        
+        Args:
+            prompt (str): The input prompt for generation
+            model_name (str): The model to use for generation. Defaults to "gpt-3.5-turbo"
+            
+        Yields:
+            str: The next piece of generated text as soon as the server produces it
+        
+        Closing the generator early closes the HTTP stream, so the server
+        stops generating for a client that went away.
+        """
+        stream = await self.async_client.chat.completions.create(
+            model=model_name,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True
+        )
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+        finally:
+            await stream.close()
@@ -55,6 +55,32 @@ async def test_async_generation():
         print(f"Error in async generation: {str(e)}")
         return False
 
+async def test_streaming_generation():
+    """Test streaming generation with FastMLXEndpoint"""
+    endpoint = FastMLXEndpoint(
+        api_key=API_KEY,
+        url_base="http://localhost:8000/v1"  # Adjust if your MLX server is running elsewhere
+    )
+    
+    prompt = "Count from one to five in words."
+    
+    try:
+        print("\nStreaming Generation Test:")
+        print(f"Prompt: {prompt}")
+        print("Response: ", end="", flush=True)
+        pieces = []
+        async for piece in endpoint.astream(
+            prompt=prompt,
+            model_name=MODEL_NAME
+        ):
+            pieces.append(piece)
+            print(piece, end="", flush=True)
+        print(f"\nReceived {len(pieces)} streamed pieces\n")
+        return bool(pieces)
+    except Exception as e:
+        print(f"Error in streaming generation: {str(e)}")
+        return False
+
 def main():
     # Run synchronous test
     sync_success = test_sync_generation()
@@ -62,10 +88,14 @@ def main():
     # Run async test
     async_success = asyncio.run(test_async_generation())
     
+    # Run streaming test
+    stream_success = asyncio.run(test_streaming_generation())
+    
     # Print overall results
     print("\nTest Results:")
     print(f"Synchronous Test: {'✓ Passed' if sync_success else '✗ Failed'}")
     print(f"Asynchronous Test: {'✓ Passed' if async_success else '✗ Failed'}")
+    print(f"Streaming Test: {'✓ Passed' if stream_success else '✗ Failed'}")
 
 if __name__ == "__main__":
     main()
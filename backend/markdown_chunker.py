@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from typing import List, Optional, Dict, Union
 import logging
 from pathlib import Path
-from transformers import AutoTokenizer
+from backend.models import get_tokenizer
 
 @dataclass
 class Chunk:
@@ -31,7 +31,7 @@ class AcademicMarkdownChunker:
         """
         self.max_chunk_size = max_chunk_size
         self.overlap_size = overlap_size
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.tokenizer = get_tokenizer(model_name)
         self.section_pattern = re.compile(r'^#{2,3}\s+(.+)$', re.MULTILINE)
         self.figure_pattern = re.compile(r'(?:([^\n]+)\n\n)?(!\[.*?\]\(.*?\).*?)(?:\n\n([^\n]+))?(?=\n\n|$)', re.DOTALL)
         self.table_pattern = re.compile(r'(\|.*?\n\|[-|\s]+\n(?:\|.*?\n)+)', re.MULTILINE)
@@ -0,0 +1,15 @@
+from .registry import (
+    ModelRegistry,
+    SharedTokenizer,
+    get_cross_encoder,
+    get_max_seq_length,
+    get_sentence_transformer,
+    get_tokenizer,
+    registry
+)
+
+__all__ = [
+    'ModelRegistry', 'SharedTokenizer', 'registry',
+    'get_tokenizer', 'get_sentence_transformer', 'get_cross_encoder',
+    'get_max_seq_length'
+]
@@ -0,0 +1,205 @@
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+_log = logging.getLogger(__name__)
+
+class SharedTokenizer:
+    def __init__(self, tokenizer):
+        """
+        A HuggingFace tokenizer shared between threads.
+
+        Fast tokenizers switch their truncation and padding state on every
+        call whose settings differ from the previous one, and concurrent
+        switches fail with "Already borrowed". Calls through this wrapper,
+        and SentenceTransformer tokenization of models from the same
+        registry, are serialized by one lock per tokenizer.
+
+        Args:
+            tokenizer: The HuggingFace tokenizer. Code that uses it directly
+                            (e.g. docling's HybridChunker) bypasses the lock
+        """
+        self.tokenizer = tokenizer
+        self.lock = threading.RLock()
+
+    def encode(self, text: str, **kwargs) -> List[int]:
+        with self.lock:
+            return self.tokenizer.encode(text, **kwargs)
+
+    def decode(self, token_ids: List[int], **kwargs) -> str:
+        with self.lock:
+            return self.tokenizer.decode(token_ids, **kwargs)
+
+    def tokenize(self, text: str, **kwargs) -> List[str]:
+        with self.lock:
+            return self.tokenizer.tokenize(text, **kwargs)
+
+    def __call__(self, *args, **kwargs):
+        with self.lock:
+            return self.tokenizer(*args, **kwargs)
+
+    def count(self, text: str, add_special_tokens: bool = True) -> int:
+        """Number of tokens in text."""
+        return len(self.encode(text, add_special_tokens=add_special_tokens))
+
+class ModelRegistry:
+    def __init__(self):
+        """
+        Process-wide cache of tokenizers and models, keyed by model id.
+
+        Each tokenizer and model is loaded once, however many components
+        ask for it; concurrent first requests wait for a single load. A
+        SentenceTransformer and the tokenizer of the same model id share
+        one tokenizer instance.
+        """
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._instances: Dict[Hashable, Any] = {}
+
+    def _get(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        """Return the instance cached under key, loading it once."""
+        instance = self._instances.get(key)
+        if instance is not None:
+            return instance
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            instance = self._instances.get(key)
+            if instance is None:
+                _log.info(f"Loading {key[0]} {key[1]}")
+                instance = load()
+                self._instances[key] = instance
+        return instance
+
+    def tokenizer(self, model_id: str) -> SharedTokenizer:
+        """
+        Get the shared tokenizer of a model.
+
+        Args:
+            model_id (str): HuggingFace model id
+
+        Returns:
+            SharedTokenizer: The tokenizer, reused from the model if it is already loaded
+        """
+        def load():
+            for (kind, loaded_id, *_), model in list(self._instances.items()):
+                if kind == "sentence_transformer" and loaded_id == model_id:
+                    return SharedTokenizer(model.tokenizer)
+            from transformers import AutoTokenizer
+            return SharedTokenizer(AutoTokenizer.from_pretrained(model_id))
+
+        return self._get(("tokenizer", model_id), load)
+
+    def sentence_transformer(self, model_id: str, device: str = "cpu"):
+        """
+        Get a shared SentenceTransformer.
+
+        Args:
+            model_id (str): SentenceTransformer model id
+            device (str): Device to load the model on. Defaults to "cpu".
+
+        Returns:
+            SentenceTransformer: The model, using the registry's tokenizer for model_id
+        """
+        def load():
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(model_id, device=device)
+            shared = self._get(("tokenizer", model_id), lambda: SharedTokenizer(model.tokenizer))
+            if model.tokenizer is not shared.tokenizer:
+                # Drop the copy the model just loaded in favour of the shared one
+                model.tokenizer = shared.tokenizer
+
+            tokenize = model.tokenize
+
+            def locked_tokenize(texts, *args, **kwargs):
+                with shared.lock:
+                    return tokenize(texts, *args, **kwargs)
+
+            model.tokenize = locked_tokenize
+            return model
+
+        return self._get(("sentence_transformer", model_id, device), load)
+
+    def max_seq_length(self, model_id: str) -> Optional[int]:
+        """
+        Get the number of tokens a SentenceTransformer model embeds, special tokens included.
+
+        Read from the model if it is loaded, else from its sentence_bert_config.json,
+        else from its tokenizer, so the model itself need not be loaded.
+
+        Args:
+            model_id (str): SentenceTransformer model id or local directory
+
+        Returns:
+            Optional[int]: The limit, or None if the model does not declare one
+        """
+        for (kind, loaded_id, *_), model in list(self._instances.items()):
+            if kind == "sentence_transformer" and loaded_id == model_id:
+                return model.max_seq_length
+
+        def load():
+            try:
+                config_path = Path(model_id) / "sentence_bert_config.json"
+                if not config_path.exists():
+                    from huggingface_hub import hf_hub_download
+                    config_path = hf_hub_download(model_id, "sentence_bert_config.json")
+                with open(config_path, 'r', encoding='utf-8') as f:
+                    limit = json.load(f).get("max_seq_length")
+                if limit:
+                    return int(limit)
+            except Exception as e:
+                _log.info(f"No sentence_bert_config.json for {model_id} ({e}), using its tokenizer's limit")
+            limit = getattr(self.tokenizer(model_id).tokenizer, "model_max_length", None)
+            # Tokenizers without a limit report a huge sentinel value
+            return int(limit) if limit and limit < 1_000_000 else 0
+
+        return self._get(("max_seq_length", model_id), load) or None
+
+    def cross_encoder(self, model_id: str, max_length: int = 512, device: str = "cpu"):
+        """
+        Get a shared CrossEncoder.
+
+        Args:
+            model_id (str): Cross-encoder model id
+            max_length (int): Maximum tokens per pair. Defaults to 512.
+            device (str): Device to load the model on. Defaults to "cpu".
+
+        Returns:
+            CrossEncoder: The model
+        """
+        def load():
+            from sentence_transformers import CrossEncoder
+            return CrossEncoder(model_id, max_length=max_length, device=device)
+
+        return self._get(("cross_encoder", model_id, max_length, device), load)
+
+    def loaded(self) -> List[str]:
+        """Descriptions of everything loaded so far."""
+        return [" ".join(str(part) for part in key) for key in self._instances]
+
+    def clear(self) -> None:
+        """Forget all loaded instances; components holding them keep working."""
+        with self._lock:
+            self._instances.clear()
+            self._key_locks.clear()
+
+# Process-wide default registry
+registry = ModelRegistry()
+
+def get_tokenizer(model_id: str) -> SharedTokenizer:
+    """Get a tokenizer from the process-wide registry."""
+    return registry.tokenizer(model_id)
+
+def get_sentence_transformer(model_id: str, device: str = "cpu"):
+    """Get a SentenceTransformer from the process-wide registry."""
+    return registry.sentence_transformer(model_id, device=device)
+
+def get_max_seq_length(model_id: str) -> Optional[int]:
+    """Get a SentenceTransformer model's input limit from the process-wide registry."""
+    return registry.max_seq_length(model_id)
+
+def get_cross_encoder(model_id: str, max_length: int = 512, device: str = "cpu"):
+    """Get a CrossEncoder from the process-wide registry."""
+    return registry.cross_encoder(model_id, max_length=max_length, device=device)
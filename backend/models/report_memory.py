@@ -0,0 +1,93 @@
+import argparse
+import json
+import resource
+import subprocess
+import sys
+from pathlib import Path
+
+# Add the parent directory to sys.path to allow imports from the backend package
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+EMBEDDING_MODEL = "ibm-granite/granite-embedding-278m-multilingual"
+CHUNKER_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+def _rss_mb() -> float:
+    """Current resident set size, falling back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def load_separately():
+    """Load models the way the API did before the registry: every component its own copy."""
+    from chromadb.utils import embedding_functions
+    from sentence_transformers import CrossEncoder
+    from transformers import AutoTokenizer
+
+    embedder = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=EMBEDDING_MODEL)
+    prompt_tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL)
+    chunker_tokenizer = AutoTokenizer.from_pretrained(CHUNKER_MODEL)
+    reranker = CrossEncoder(RERANK_MODEL, max_length=512, device="cpu")
+    embedder(["warm up"])
+    return embedder, prompt_tokenizer, chunker_tokenizer, reranker
+
+def load_shared():
+    """Load models through the registry, with the chunker counting in the embedder's tokens."""
+    from backend.chunkers import SimpleChunker
+    from backend.embeddings import SharedSentenceTransformerEmbeddingFunction
+    from backend.models import get_cross_encoder, get_tokenizer
+
+    embedder = SharedSentenceTransformerEmbeddingFunction(model_name=EMBEDDING_MODEL)
+    prompt_tokenizer = get_tokenizer(EMBEDDING_MODEL)
+    chunker = SimpleChunker(model_name=EMBEDDING_MODEL)
+    reranker = get_cross_encoder(RERANK_MODEL)
+    embedder(["warm up"])
+    return embedder, prompt_tokenizer, chunker, reranker
+
+def measure(mode: str) -> dict:
+    """Measure RSS around loading in this process."""
+    # Import the heavy libraries first so both modes start from the same baseline
+    import sentence_transformers  # noqa: F401
+    import transformers  # noqa: F401
+    import chromadb  # noqa: F401
+
+    baseline = _rss_mb()
+    components = load_separately() if mode == "separate" else load_shared()
+    loaded = _rss_mb()
+    return {"mode": mode, "baseline_mb": baseline, "loaded_mb": loaded, "components": len(components)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Report RSS of separately loaded vs shared models")
+    parser.add_argument("--mode", choices=["separate", "shared"], help="Measure one mode in this process")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(measure(args.mode)))
+        return
+
+    # Each mode runs in a fresh process so neither inherits the other's allocations
+    results = []
+    for mode in ("separate", "shared"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print("\nModel Memory Report:")
+    print(f"{'mode':<10} {'baseline MB':>12} {'loaded MB':>10} {'models MB':>10}")
+    for result in results:
+        print(
+            f"{result['mode']:<10} {result['baseline_mb']:>12.0f} {result['loaded_mb']:>10.0f} "
+            f"{result['loaded_mb'] - result['baseline_mb']:>10.0f}"
+        )
+    saved = (results[0]["loaded_mb"] - results[0]["baseline_mb"]) - (results[1]["loaded_mb"] - results[1]["baseline_mb"])
+    print(f"Saved by sharing: {saved:.0f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add the parent directory to sys.path to allow imports from the backend package
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from backend.models import ModelRegistry
+
+MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+
+def test_single_load():
+    """Test that concurrent first requests share one tokenizer instance"""
+    try:
+        registry = ModelRegistry()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            tokenizers = list(executor.map(lambda _: registry.tokenizer(MODEL_ID), range(16)))
+        print("\nSingle Load Test:")
+        print(f"Distinct instances: {len({id(t) for t in tokenizers})}, loaded: {registry.loaded()}")
+        return all(t is tokenizers[0] for t in tokenizers)
+    except Exception as e:
+        print(f"Error in single load: {str(e)}")
+        return False
+
+def test_model_shares_tokenizer():
+    """Test that a SentenceTransformer and the tokenizer registry hand out the same tokenizer"""
+    try:
+        registry = ModelRegistry()
+        tokenizer = registry.tokenizer(MODEL_ID)
+        model = registry.sentence_transformer(MODEL_ID)
+        print("\nShared Tokenizer Test:")
+        print(f"Model uses registry tokenizer: {model.tokenizer is tokenizer.tokenizer}")
+        return model.tokenizer is tokenizer.tokenizer
+    except Exception as e:
+        print(f"Error in shared tokenizer: {str(e)}")
+        return False
+
+def test_concurrent_use():
+    """Test that counting and embedding can run concurrently on the shared tokenizer"""
+    try:
+        registry = ModelRegistry()
+        model = registry.sentence_transformer(MODEL_ID)
+        tokenizer = registry.tokenizer(MODEL_ID)
+        text = "Arena Learning simulates chatbot battles to build training data. " * 50
+
+        def work(i: int) -> int:
+            if i % 2:
+                return tokenizer.count(text)
+            return len(model.encode([text], show_progress_bar=False))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(work, range(64)))
+        print("\nConcurrent Use Test:")
+        print(f"Token count of long text: {results[1]} (model truncates to {model.max_seq_length})")
+        return results[1] > model.max_seq_length and all(r == results[1] for r in results[1::2])
+    except Exception as e:
+        print(f"Error in concurrent use: {str(e)}")
+        return False
+
+def test_max_seq_length():
+    """Test that the input limit read without loading the model matches the loaded model's"""
+    try:
+        registry = ModelRegistry()
+        declared = registry.max_seq_length(MODEL_ID)
+        loaded_before = registry.loaded()
+        model = registry.sentence_transformer(MODEL_ID)
+        print("\nMax Sequence Length Test:")
+        print(f"Declared: {declared}, model: {model.max_seq_length}, loaded before the model: {loaded_before}")
+        return declared == model.max_seq_length == registry.max_seq_length(MODEL_ID)
+    except Exception as e:
+        print(f"Error in max sequence length: {str(e)}")
+        return False
+
+def main():
+    single_success = test_single_load()
+    shared_success = test_model_shares_tokenizer()
+    concurrent_success = test_concurrent_use()
+    limit_success = test_max_seq_length()
+
+    # Print overall results
+    print("\nTest Results:")
+    print(f"Single Load Test: {'✓ Passed' if single_success else '✗ Failed'}")
+    print(f"Shared Tokenizer Test: {'✓ Passed' if shared_success else '✗ Failed'}")
+    print(f"Concurrent Use Test: {'✓ Passed' if concurrent_success else '✗ Failed'}")
+    print(f"Max Sequence Length Test: {'✓ Passed' if limit_success else '✗ Failed'}")
+
+if __name__ == "__main__":
+    main()
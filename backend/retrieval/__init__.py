@@ -0,0 +1,7 @@
+from .binary_index import BinaryIndex, binarize, hamming_distances
+from .bm25 import BM25Index, tokenize
+from .fusion import reciprocal_rank_fusion
+from .mmr import mmr_select
+from .reranker import CrossEncoderReranker
+
+__all__ = ['BinaryIndex', 'binarize', 'hamming_distances', 'BM25Index', 'tokenize', 'reciprocal_rank_fusion', 'mmr_select', 'CrossEncoderReranker']
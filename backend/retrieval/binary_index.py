@@ -0,0 +1,214 @@
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_log = logging.getLogger(__name__)
+
+# Set bits per byte value, for numpy versions without bitwise_count
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def binarize(embeddings) -> np.ndarray:
+    """
+    Sign-quantize embeddings to packed bits.
+
+    Args:
+        embeddings: Vectors of shape (n, dim) or (dim,)
+
+    Returns:
+        np.ndarray: uint8 codes of shape (n, ceil(dim / 8)) or (ceil(dim / 8),)
+    """
+    return np.packbits(np.asarray(embeddings, dtype=np.float32) > 0, axis=-1)
+
+def hamming_distances(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    """
+    Count differing bits between every code and a query code.
+
+    Args:
+        codes (np.ndarray): Packed codes of shape (n, n_bytes)
+        query_code (np.ndarray): Packed query code of shape (n_bytes,)
+
+    Returns:
+        np.ndarray: Distances of shape (n,)
+    """
+    diff = np.bitwise_xor(codes, query_code)
+    if diff.shape[1] % 8 == 0:
+        # Popcount whole 64-bit words rather than single bytes
+        diff = diff.view(np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(diff).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT_TABLE[diff.view(np.uint8)].sum(axis=1, dtype=np.int32)
+
+class BinaryIndex:
+    def __init__(self):
+        """
+        Initialize an empty in-memory index of 1-bit sign-quantized embeddings.
+
+        Each dimension is stored as one bit, 32x smaller than float32, and
+        searched by Hamming distance. It is meant as a first pass whose
+        candidates are rescored with full-precision vectors.
+        """
+        self._lock = threading.Lock()
+        self._codes = np.zeros((0, 0), dtype=np.uint8)
+        self._ids: List[str] = []
+        # Sources are stored per row as codes, so filtering is a vectorized mask
+        self._row_sources = np.zeros(0, dtype=np.int32)
+        self._sources: List[str] = []
+        self._source_codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the packed codes."""
+        return self._codes.nbytes
+
+    def _keep(self, mask: np.ndarray) -> None:
+        """Keep only the rows selected by mask. Caller must hold the lock."""
+        self._codes = self._codes[mask]
+        self._ids = [doc_id for doc_id, keep in zip(self._ids, mask) if keep]
+        self._row_sources = self._row_sources[mask]
+
+    def _source_code(self, source: str) -> int:
+        """Code of a source, assigning a new one if needed. Caller must hold the lock."""
+        code = self._source_codes.get(source)
+        if code is None:
+            code = len(self._sources)
+            self._sources.append(source)
+            self._source_codes[source] = code
+        return code
+
+    def add(self, ids: List[str], embeddings, sources: List[str]) -> None:
+        """
+        Index embeddings, replacing any previous version with the same id.
+
+        Args:
+            ids (List[str]): Unique chunk ids
+            embeddings: Full-precision vectors of shape (len(ids), dim)
+            sources (List[str]): Source each chunk belongs to, used for filtering and removal
+        """
+        if not len(ids):
+            return
+        codes = binarize(embeddings)
+        with self._lock:
+            if len(self._ids):
+                if codes.shape[1] != self._codes.shape[1]:
+                    raise ValueError(f"Expected {self._codes.shape[1] * 8}-bit codes, got {codes.shape[1] * 8}")
+                new_ids = set(ids)
+                replaced = np.array([doc_id in new_ids for doc_id in self._ids], dtype=bool)
+                if replaced.any():
+                    self._keep(~replaced)
+                self._codes = np.concatenate([self._codes, codes])
+            else:
+                self._codes = codes
+            self._ids.extend(ids)
+            new_codes = np.array([self._source_code(source) for source in sources], dtype=np.int32)
+            self._row_sources = np.concatenate([self._row_sources, new_codes])
+
+    def remove_source(self, source: str) -> int:
+        """
+        Remove all chunks belonging to a source.
+
+        Args:
+            source (str): The source to remove
+
+        Returns:
+            int: Number of chunks removed
+        """
+        with self._lock:
+            code = self._source_codes.get(source)
+            if code is None:
+                return 0
+            removed = self._row_sources == code
+            if removed.any():
+                self._keep(~removed)
+            return int(removed.sum())
+
+    def clear(self) -> None:
+        """Remove all chunks."""
+        with self._lock:
+            self._codes = np.zeros((0, 0), dtype=np.uint8)
+            self._ids = []
+            self._row_sources = np.zeros(0, dtype=np.int32)
+            self._sources = []
+            self._source_codes = {}
+
+    def search(self, query_embedding, n_results: int = 100, sources: Optional[Sequence[str]] = None) -> List[Tuple[str, int]]:
+        """
+        Find the chunks whose codes are closest to the query's.
+
+        Args:
+            query_embedding: Full-precision query vector
+            n_results (int): Maximum number of candidates. Defaults to 100.
+            sources (Optional[Sequence[str]]): Only return chunks from these sources
+
+        Returns:
+            List[Tuple[str, int]]: (chunk id, Hamming distance) pairs, closest first
+        """
+        query_code = binarize(query_embedding)
+        with self._lock:
+            codes, ids = self._codes, self._ids
+            rows = None
+            if sources is not None:
+                wanted = [self._source_codes[source] for source in sources if source in self._source_codes]
+                rows = np.flatnonzero(np.isin(self._row_sources, wanted))
+                codes = codes[rows]
+        if not len(codes):
+            return []
+
+        distances = hamming_distances(codes, query_code)
+        k = min(n_results, len(distances))
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top], kind="stable")]
+        return [(ids[i if rows is None else rows[i]], int(distances[i])) for i in top]
+
+    def save(self, path: str | Path) -> None:
+        """
+        Persist the index atomically.
+
+        Args:
+            path: File to write the index to
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with self._lock:
+            with open(tmp_path, 'wb') as f:
+                np.savez(
+                    f,
+                    codes=self._codes,
+                    ids=np.array(self._ids, dtype=str),
+                    sources=np.array(self._sources, dtype=str)[self._row_sources]
+                )
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> Optional["BinaryIndex"]:
+        """
+        Load a persisted index.
+
+        Args:
+            path: File the index was saved to
+
+        Returns:
+            Optional[BinaryIndex]: The index, or None if it does not exist or is unreadable
+        """
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as state:
+                index = cls()
+                index._codes = state['codes']
+                index._ids = state['ids'].tolist()
+                sources, row_sources = np.unique(state['sources'], return_inverse=True)
+                index._sources = sources.tolist()
+                index._source_codes = {source: code for code, source in enumerate(index._sources)}
+                index._row_sources = row_sources.astype(np.int32).reshape(-1)
+            return index
+        except (OSError, ValueError, KeyError) as e:
+            _log.warning(f"Ignoring unreadable binary index {path}: {e}")
+            return None
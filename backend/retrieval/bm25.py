@@ -0,0 +1,194 @@
+import logging
+import math
+import pickle
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+_log = logging.getLogger(__name__)
+
+# Keep identifiers like part numbers, tickers and figures ("a-123", "2023.4") whole
+TOKEN_PATTERN = re.compile(r'\w+(?:[.\-/]\w+)*')
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase lexical terms.
+    
+    Args:
+        text (str): Text to tokenize
+        
+    Returns:
+        List[str]: Terms in order of appearance
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize an empty in-memory inverted index scored with Okapi BM25.
+        
+        Args:
+            k1 (float): Term frequency saturation. Defaults to 1.5.
+            b (float): Document length normalization. Defaults to 0.75.
+        """
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._doc_sources: Dict[str, str] = {}
+        self._doc_terms: Dict[str, Tuple[str, ...]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def add(self, ids: List[str], texts: List[str], sources: List[str]) -> None:
+        """
+        Index documents, replacing any previous version with the same id.
+        
+        Args:
+            ids (List[str]): Unique document ids
+            texts (List[str]): Document texts
+            sources (List[str]): Source each document belongs to, used for removal
+        """
+        with self._lock:
+            for doc_id, text, source in zip(ids, texts, sources):
+                self._remove_id(doc_id)
+                terms = Counter(tokenize(text))
+                for term, freq in terms.items():
+                    self._postings.setdefault(term, {})[doc_id] = freq
+                length = sum(terms.values())
+                self._doc_lengths[doc_id] = length
+                self._doc_sources[doc_id] = source
+                self._doc_terms[doc_id] = tuple(terms)
+                self._total_length += length
+
+    def remove_source(self, source: str) -> int:
+        """
+        Remove all documents belonging to a source.
+        
+        Args:
+            source (str): The source to remove
+            
+        Returns:
+            int: Number of documents removed
+        """
+        with self._lock:
+            doc_ids = [doc_id for doc_id, src in self._doc_sources.items() if src == source]
+            for doc_id in doc_ids:
+                self._remove_id(doc_id)
+            return len(doc_ids)
+
+    def clear(self) -> None:
+        """Remove all documents."""
+        with self._lock:
+            self._postings = {}
+            self._doc_lengths = {}
+            self._doc_sources = {}
+            self._doc_terms = {}
+            self._total_length = 0
+
+    def search(self, query: str, n_results: int = 10, sources: Optional[List[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Score documents against a query.
+        
+        Args:
+            query (str): Query text
+            n_results (int): Maximum number of results. Defaults to 10.
+            sources (Optional[List[str]]): Only return documents from these sources
+            
+        Returns:
+            List[Tuple[str, float]]: (document id, score) pairs, best first
+        """
+        with self._lock:
+            n_docs = len(self._doc_lengths)
+            if n_docs == 0:
+                return []
+            avg_length = self._total_length / n_docs
+            allowed = set(sources) if sources is not None else None
+            
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, freq in postings.items():
+                    if allowed is not None and self._doc_sources[doc_id] not in allowed:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (self.k1 + 1) / (freq + norm)
+                    
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:n_results]
+
+    def save(self, path: str | Path) -> None:
+        """
+        Persist the index atomically.
+        
+        Args:
+            path: File to write the index to
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with self._lock:
+            state = {
+                'k1': self.k1,
+                'b': self.b,
+                'postings': self._postings,
+                'doc_lengths': self._doc_lengths,
+                'doc_sources': self._doc_sources,
+            }
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> Optional["BM25Index"]:
+        """
+        Load a persisted index.
+        
+        Args:
+            path: File the index was saved to
+            
+        Returns:
+            Optional[BM25Index]: The index, or None if it does not exist or is unreadable
+        """
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+            index = cls(k1=state['k1'], b=state['b'])
+            index._postings = state['postings']
+            index._doc_lengths = state['doc_lengths']
+            index._doc_sources = state['doc_sources']
+            doc_terms: Dict[str, List[str]] = {doc_id: [] for doc_id in index._doc_lengths}
+            for term, postings in index._postings.items():
+                for doc_id in postings:
+                    doc_terms[doc_id].append(term)
+            index._doc_terms = {doc_id: tuple(terms) for doc_id, terms in doc_terms.items()}
+            index._total_length = sum(index._doc_lengths.values())
+            return index
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError) as e:
+            _log.warning(f"Ignoring unreadable BM25 index {path}: {e}")
+            return None
+
+    def _remove_id(self, doc_id: str) -> None:
+        """Remove one document. Caller must hold the lock."""
+        length = self._doc_lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._doc_sources.pop(doc_id, None)
+        self._total_length -= length
+        for term in self._doc_terms.pop(doc_id, ()):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
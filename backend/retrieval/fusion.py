@@ -0,0 +1,22 @@
+from typing import Dict, List, Sequence
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[str]:
+    """
+    Merge several ranked id lists with reciprocal rank fusion.
+    
+    Each id scores sum(1 / (k + rank)) over the rankings it appears in, so
+    ids ranked well by several retrievers rise to the top without having to
+    calibrate their raw scores against each other.
+    
+    Args:
+        rankings (Sequence[Sequence[str]]): Ranked id lists, best first
+        k (int): Rank smoothing constant. Defaults to 60.
+        
+    Returns:
+        List[str]: Fused ids, best first
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda doc_id: scores[doc_id], reverse=True)
@@ -0,0 +1,50 @@
+from typing import List
+
+import numpy as np
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Scale each row to unit length so dot products are cosine similarities."""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def mmr_select(query_embedding, candidate_embeddings, k: int, lambda_mult: float = 0.7) -> List[int]:
+    """
+    Pick a relevant but diverse subset of candidates by maximal marginal relevance.
+    
+    All pairwise similarities come from a single matrix product; each of the
+    k selection steps is then a vectorized update over the candidates.
+    
+    Args:
+        query_embedding: Query vector of shape (dim,)
+        candidate_embeddings: Candidate vectors of shape (n, dim), best retrieval rank first
+        k (int): Number of candidates to select
+        lambda_mult (float): Trade-off between relevance (1.0) and diversity (0.0). Defaults to 0.7.
+        
+    Returns:
+        List[int]: Indices of the selected candidates, in selection order
+    """
+    candidates = _normalize_rows(np.asarray(candidate_embeddings, dtype=np.float32))
+    n = candidates.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return []
+    
+    query = _normalize_rows(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+    
+    selected = [int(np.argmax(relevance))]
+    max_similarity = similarity[selected[0]].copy()
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+    
+    for _ in range(k - 1):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+        
+    return selected
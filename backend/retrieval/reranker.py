@@ -0,0 +1,188 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import List, Optional
+
+from backend.models import get_cross_encoder
+
+_log = logging.getLogger(__name__)
+
+RERANK_MODEL_ID = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+class BatchLatencyModel:
+    def __init__(self, decay: float = 0.2, max_age_s: float = 300.0):
+        """
+        Estimate the latency of a scoring batch as a fixed overhead plus a cost per pair.
+        
+        The two terms are fit by exponentially weighted least squares over
+        recent batches, so old measurements fade out. An estimate is dropped
+        once no batch has been measured for max_age_s, so that one slow
+        period cannot disable scoring for good.
+        
+        Args:
+            decay (float): Weight of each new measurement. Defaults to 0.2.
+            max_age_s (float): Seconds after the last measurement before the
+                             estimate is discarded. Defaults to 300.
+        """
+        self.decay = decay
+        self.max_age_s = max_age_s
+        self._lock = threading.Lock()
+        self._updated_at: Optional[float] = None
+        # Weighted means of pairs, seconds, pairs² and pairs × seconds
+        self._pairs = self._seconds = self._pairs_sq = self._pairs_seconds = 0.0
+
+    def add(self, pairs: int, seconds: float, reset: bool = False) -> None:
+        """
+        Record the latency of a batch of pairs.
+        
+        Args:
+            pairs (int): Number of pairs in the batch
+            seconds (float): How long the batch took
+            reset (bool): Start the fit over from this measurement. Defaults to False.
+        """
+        sample = (pairs, seconds, pairs * pairs, pairs * seconds)
+        with self._lock:
+            now = time.monotonic()
+            if reset or self._updated_at is None or now - self._updated_at > self.max_age_s:
+                means = sample
+            else:
+                current = (self._pairs, self._seconds, self._pairs_sq, self._pairs_seconds)
+                means = tuple(m + self.decay * (x - m) for m, x in zip(current, sample))
+            self._pairs, self._seconds, self._pairs_sq, self._pairs_seconds = means
+            self._updated_at = now
+
+    def estimate(self, pairs: int) -> Optional[float]:
+        """
+        Predict the latency of a batch.
+        
+        Args:
+            pairs (int): Number of pairs in the batch
+        
+        Returns:
+            Optional[float]: Predicted seconds, or None without a recent measurement
+        """
+        with self._lock:
+            if self._updated_at is None or time.monotonic() - self._updated_at > self.max_age_s:
+                return None
+            variance = self._pairs_sq - self._pairs ** 2
+            if variance > 1e-6:
+                per_pair = (self._pairs_seconds - self._pairs * self._seconds) / variance
+                if per_pair >= 0:
+                    overhead = self._seconds - per_pair * self._pairs
+                    return max(0.0, overhead + per_pair * pairs)
+            # Only one batch size seen so far: scale its latency
+            return self._seconds * pairs / self._pairs
+
+class CrossEncoderReranker:
+    def __init__(
+        self,
+        model_name: str = RERANK_MODEL_ID,
+        max_length: int = 512,
+        probe_interval: int = 20,
+        estimate_max_age_s: float = 300.0
+    ):
+        """
+        Initialize a CPU cross-encoder that scores (query, passage) pairs.
+        
+        Args:
+            model_name (str): Cross-encoder model to load.
+                            Defaults to "cross-encoder/ms-marco-MiniLM-L-6-v2".
+            max_length (int): Maximum tokens per pair. Defaults to 512.
+            probe_interval (int): While the latency estimate exceeds the budget,
+                                every probe_interval-th rerank is still scored in
+                                the background to re-measure. Defaults to 20.
+            estimate_max_age_s (float): Seconds before an unrefreshed latency
+                                      estimate is discarded. Defaults to 300.
+        """
+        self.model = get_cross_encoder(model_name, max_length=max_length)
+        
+        # A single worker keeps scoring off the caller's thread so a latency
+        # budget can be enforced, and never lets timed-out work pile up
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reranker")
+        self._busy = threading.Lock()
+        self.latency = BatchLatencyModel(max_age_s=estimate_max_age_s)
+        self.probe_interval = probe_interval
+        self._skipped = 0
+        self._warm = False
+        self.fallbacks = 0
+
+    def warm_up(self) -> None:
+        """Run a dummy pair through the model; its cold-start latency is not recorded."""
+        self._executor.submit(
+            self.model.predict, [("warm-up", "warm-up")], show_progress_bar=False
+        ).result()
+        self._warm = True
+
+    def _score(self, query: str, passages: List[str], probe: bool = False) -> List[float]:
+        """
+        Score all pairs in one batched forward pass, recording the batch latency.
+        
+        A probe's latency replaces the estimate, which only probes could
+        correct while it exceeds the budget.
+        """
+        try:
+            start_time = time.perf_counter()
+            scores = self.model.predict(
+                [(query, passage) for passage in passages],
+                batch_size=len(passages),
+                show_progress_bar=False
+            )
+            # The first pass pays for lazy initialization and would skew the estimate
+            if self._warm:
+                self.latency.add(len(passages), time.perf_counter() - start_time, reset=probe)
+            self._warm = True
+            return [float(score) for score in scores]
+        finally:
+            self._busy.release()
+
+    def rerank(self, query: str, passages: List[str], top_k: int, budget_s: Optional[float] = None) -> Optional[List[int]]:
+        """
+        Order passages by cross-encoder relevance within a latency budget.
+        
+        Args:
+            query (str): The query text
+            passages (List[str]): Candidate passages in retrieval order
+            top_k (int): Number of passages to keep
+            budget_s (Optional[float]): Seconds allowed for scoring, None for no limit
+        
+        Returns:
+            Optional[List[int]]: Indices of the top_k passages, best first, or None
+            if the budget could not be met and the caller should keep retrieval order
+        """
+        if not passages:
+            return []
+        
+        # Skip scoring that would obviously blow the budget or wait behind earlier work
+        if budget_s is not None:
+            estimate = self.latency.estimate(len(passages))
+            if estimate is not None and estimate > budget_s:
+                self.fallbacks += 1
+                self._skipped += 1
+                # Re-measure now and then in the background, so the estimate can recover
+                if self._skipped % self.probe_interval == 0 and self._busy.acquire(blocking=False):
+                    self._executor.submit(self._score, query, passages, True)
+                    _log.info("Skipping rerank: estimated latency exceeds budget, re-measuring in background")
+                else:
+                    _log.info("Skipping rerank: estimated latency exceeds budget")
+                return None
+        if not self._busy.acquire(blocking=False):
+            self.fallbacks += 1
+            _log.info("Skipping rerank: reranker is busy")
+            return None
+        
+        future = self._executor.submit(self._score, query, passages)
+        try:
+            scores = future.result(timeout=budget_s)
+        except TimeoutError:
+            # Scoring finishes in the background and still updates the estimate
+            self.fallbacks += 1
+            _log.warning(f"Rerank exceeded {budget_s * 1000:.0f} ms budget, keeping retrieval order")
+            return None
+        
+        ranked = sorted(range(len(passages)), key=lambda i: scores[i], reverse=True)
+        return ranked[:top_k]
+
+    def close(self) -> None:
+        """Stop the scoring worker."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,94 @@
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the parent directory to sys.path to allow imports from the backend package
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from backend.retrieval.binary_index import BinaryIndex
+
+EMBEDDING_DIM = 768  # granite-embedding-278m-multilingual
+N_CHUNKS = 100000
+N_QUERIES = 100
+K = 10
+
+def _corpus(rng: np.random.Generator):
+    """Clustered unit vectors, like chunks of many documents, with queries near random chunks."""
+    centers = rng.standard_normal((N_CHUNKS // 50, EMBEDDING_DIM)).astype(np.float32)
+    chunks = centers[rng.integers(0, len(centers), N_CHUNKS)]
+    chunks += 0.6 * rng.standard_normal(chunks.shape).astype(np.float32)
+    chunks /= np.linalg.norm(chunks, axis=1, keepdims=True)
+    queries = chunks[rng.integers(0, N_CHUNKS, N_QUERIES)]
+    queries = queries + 0.5 / np.sqrt(EMBEDDING_DIM) * rng.standard_normal(queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return chunks, queries
+
+def test_save_load():
+    """Test that the index round-trips through disk and honours source filters"""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((4, 64))
+    index = BinaryIndex()
+    index.add(["a_0", "a_1", "b_0", "b_1"], vectors, ["a.pdf", "a.pdf", "b.pdf", "b.pdf"])
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            index.save(Path(tmp_dir) / "binary_index.npz")
+            loaded = BinaryIndex.load(Path(tmp_dir) / "binary_index.npz")
+        results = loaded.search(vectors[2], n_results=2, sources=["b.pdf"])
+        loaded.remove_source("b.pdf")
+        print("\nSave/Load Test:")
+        print(f"Results: {results}, {len(loaded)} chunks after removing b.pdf")
+        return results[0] == ("b_0", 0) and len(loaded) == 2
+    except Exception as e:
+        print(f"Error in save/load: {str(e)}")
+        return False
+
+def test_recall_benchmark():
+    """Benchmark recall@10 of Hamming prefilter plus float rescoring against exact search"""
+    rng = np.random.default_rng(0)
+    chunks, queries = _corpus(rng)
+    ids = [str(i) for i in range(N_CHUNKS)]
+    index = BinaryIndex()
+    index.add(ids, chunks, ["corpus.pdf"] * N_CHUNKS)
+    
+    try:
+        exact = np.argsort(-(queries @ chunks.T), axis=1)[:, :K]
+        print("\nRecall Benchmark:")
+        print(f"{N_CHUNKS} x {EMBEDDING_DIM} chunks: {chunks.nbytes / 1e6:.0f} MB float32, "
+              f"{index.nbytes / 1e6:.1f} MB binary")
+        recall_at_100 = 0.0
+        for n_candidates in (10, 50, 100, 200, 500):
+            hits = 0
+            start_time = time.perf_counter()
+            for query, truth in zip(queries, exact):
+                candidates = np.array([int(doc_id) for doc_id, _ in index.search(query, n_candidates)])
+                rescored = candidates[np.argsort(-(chunks[candidates] @ query))[:K]]
+                hits += len(set(rescored) & set(truth))
+            elapsed = (time.perf_counter() - start_time) / N_QUERIES
+            recall = hits / (N_QUERIES * K)
+            if n_candidates == 100:
+                recall_at_100 = recall
+            print(f"  rescoring {n_candidates:>3} candidates: recall@{K} {recall:.3f}, {elapsed * 1000:.1f} ms/query")
+        
+        start_time = time.perf_counter()
+        for query in queries:
+            np.argpartition(-(chunks @ query), K)[:K]
+        print(f"  exact float32 search: {(time.perf_counter() - start_time) / N_QUERIES * 1000:.1f} ms/query")
+        return recall_at_100 > 0.9
+    except Exception as e:
+        print(f"Error in recall benchmark: {str(e)}")
+        return False
+
+def main():
+    save_load_success = test_save_load()
+    recall_success = test_recall_benchmark()
+    
+    # Print overall results
+    print("\nTest Results:")
+    print(f"Save/Load Test: {'✓ Passed' if save_load_success else '✗ Failed'}")
+    print(f"Recall Benchmark: {'✓ Passed' if recall_success else '✗ Failed'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the parent directory to sys.path to allow imports from the backend package
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from backend.retrieval import BM25Index, reciprocal_rank_fusion
+
+def _build_index() -> BM25Index:
+    index = BM25Index()
+    index.add(
+        ids=["tesla_chunk_0", "tesla_chunk_1", "arena_chunk_0"],
+        texts=[
+            "Total revenues grew to $25,167 million in Q4-2023 driven by Model Y deliveries.",
+            "Automotive gross margin declined year over year. Part number TSLA-4680 cells ramped.",
+            "Arena Learning simulates chatbot battles to build training data for WizardLM.",
+        ],
+        sources=["tesla.pdf", "tesla.pdf", "arena.pdf"]
+    )
+    return index
+
+def test_exact_term_search():
+    """Test that exact identifiers are matched lexically"""
+    index = _build_index()
+    
+    try:
+        results = index.search("What is TSLA-4680?", n_results=3)
+        print("\nExact Term Search Test:")
+        print(f"Results: {results}")
+        return bool(results) and results[0][0] == "tesla_chunk_1"
+    except Exception as e:
+        print(f"Error in exact term search: {str(e)}")
+        return False
+
+def test_incremental_updates():
+    """Test removing a source and persisting the index"""
+    index = _build_index()
+    
+    try:
+        removed = index.remove_source("tesla.pdf")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "bm25_index.pkl"
+            index.save(path)
+            loaded = BM25Index.load(path)
+        
+        print("\nIncremental Update Test:")
+        print(f"Removed: {removed}, remaining: {len(loaded)}")
+        return (
+            removed == 2
+            and len(loaded) == 1
+            and not loaded.search("revenues")
+            and loaded.search("arena")[0][0] == "arena_chunk_0"
+        )
+    except Exception as e:
+        print(f"Error in incremental updates: {str(e)}")
+        return False
+
+def test_rank_fusion():
+    """Test reciprocal rank fusion of dense and lexical rankings"""
+    dense = ["a", "b", "c"]
+    lexical = ["c", "d", "a"]
+    
+    try:
+        fused = reciprocal_rank_fusion([dense, lexical])
+        print("\nRank Fusion Test:")
+        print(f"Fused: {fused}")
+        return fused[0] == "a" and set(fused) == {"a", "b", "c", "d"}
+    except Exception as e:
+        print(f"Error in rank fusion: {str(e)}")
+        return False
+
+def main():
+    search_success = test_exact_term_search()
+    update_success = test_incremental_updates()
+    fusion_success = test_rank_fusion()
+    
+    # Print overall results
+    print("\nTest Results:")
+    print(f"Exact Term Search Test: {'✓ Passed' if search_success else '✗ Failed'}")
+    print(f"Incremental Update Test: {'✓ Passed' if update_success else '✗ Failed'}")
+    print(f"Rank Fusion Test: {'✓ Passed' if fusion_success else '✗ Failed'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to sys.path to allow imports from the backend package
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from backend.retrieval import CrossEncoderReranker
+from backend.retrieval.reranker import BatchLatencyModel
+
+QUERY = "How many vehicles did Tesla deliver in 2023?"
+PASSAGES = [
+    "Arena Learning simulates chatbot battles to build training data.",
+    "Tesla delivered over 1.8 million vehicles in 2023, a 38% increase year over year.",
+    "Automotive gross margin declined due to price reductions.",
+    "The WizardLM-β model is trained iteratively on battle results.",
+]
+
+def test_rerank():
+    """Test that the most relevant passage is ranked first"""
+    reranker = CrossEncoderReranker()
+    
+    try:
+        order = reranker.rerank(QUERY, PASSAGES, top_k=2)
+        print("\nRerank Test:")
+        for i in order:
+            print(f"  {PASSAGES[i]}")
+        return order is not None and order[0] == 1 and len(order) == 2
+    except Exception as e:
+        print(f"Error in rerank: {str(e)}")
+        return False
+
+def test_latency_budget():
+    """Test that an impossible budget falls back to retrieval order"""
+    reranker = CrossEncoderReranker()
+    
+    try:
+        start_time = time.perf_counter()
+        order = reranker.rerank(QUERY, PASSAGES * 25, top_k=4, budget_s=0.001)
+        elapsed = time.perf_counter() - start_time
+        print("\nLatency Budget Test:")
+        print(f"Result: {order}, returned in {elapsed * 1000:.1f} ms")
+        return order is None and reranker.fallbacks == 1
+    except Exception as e:
+        print(f"Error in latency budget: {str(e)}")
+        return False
+
+def test_latency_model():
+    """Test that the batch latency estimate separates overhead from per-pair cost and recovers"""
+    try:
+        model = BatchLatencyModel(decay=0.5, max_age_s=0.2)
+        empty = model.estimate(10) is None
+        
+        # 10 ms overhead plus 1 ms per pair
+        for pairs in (10, 30, 10, 30):
+            model.add(pairs, 0.010 + 0.001 * pairs)
+        estimate = model.estimate(20)
+        print("\nLatency Model Test:")
+        print(f"Estimate for 20 pairs: {estimate * 1000:.1f} ms")
+        fitted = abs(estimate - 0.030) < 1e-3
+        
+        # A slow sample is outweighed by faster ones that follow
+        model.add(30, 1.0)
+        slow = model.estimate(30)
+        for _ in range(5):
+            model.add(30, 0.040)
+        recovered = model.estimate(30) < slow / 10
+        
+        # An estimate that is not refreshed expires
+        time.sleep(0.25)
+        expired = model.estimate(30) is None
+        return empty and fitted and recovered and expired
+    except Exception as e:
+        print(f"Error in latency model: {str(e)}")
+        return False
+
+def main():
+    rerank_success = test_rerank()
+    budget_success = test_latency_budget()
+    model_success = test_latency_model()
+    
+    # Print overall results
+    print("\nTest Results:")
+    print(f"Rerank Test: {'✓ Passed' if rerank_success else '✗ Failed'}")
+    print(f"Latency Budget Test: {'✓ Passed' if budget_success else '✗ Failed'}")
+    print(f"Latency Model Test: {'✓ Passed' if model_success else '✗ Failed'}")
+
+if __name__ == "__main__":
+    main()
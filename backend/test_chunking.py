@@ -1,4 +1,9 @@
 import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to sys.path so the chunker can import the backend package
+sys.path.append(str(Path(__file__).parent.parent))
 from markdown_chunker import AcademicMarkdownChunker
 
 # Source document to process
@@ -0,0 +1,5 @@
+from .base import VectorStore
+from .chroma_store import ChromaVectorStore
+from .flat_store import MmapFlatVectorStore
+
+__all__ = ['VectorStore', 'ChromaVectorStore', 'MmapFlatVectorStore']
@@ -0,0 +1,136 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+Include = Sequence[str]
+
+DEFAULT_INCLUDE = ('documents', 'metadatas')
+
+def check_metadata(stored: Dict[str, Any], requested: Dict[str, Any], store_name: str) -> None:
+    """
+    Make sure an existing store was built with the requested settings.
+
+    Args:
+        stored: Settings recorded when the store was created
+        requested: Settings the caller is about to use
+        store_name: Store description for the error message
+
+    Raises:
+        ValueError: If any requested setting differs from the recorded one
+    """
+    mismatched = {
+        key: (stored.get(key), value)
+        for key, value in requested.items()
+        if key in stored and stored[key] != value
+    }
+    if mismatched:
+        details = ", ".join(f"{key}: stored {old!r}, requested {new!r}" for key, (old, new) in mismatched.items())
+        raise ValueError(f"{store_name} was built with different settings ({details}); re-ingest into a new store")
+
+class VectorStore(ABC):
+    """
+    Storage and nearest-neighbour search for chunk embeddings.
+
+    Results use ChromaDB's shapes so callers can switch backends freely:
+    get returns parallel 'ids', 'documents', 'metadatas' and 'embeddings'
+    lists; query returns one such list per query embedding, plus
+    'distances' (lower is closer). Where filters match metadata fields by
+    equality or with {"$in": [...]}.
+    """
+
+    @abstractmethod
+    def add(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: Optional[List[List[float]]] = None
+    ) -> None:
+        """
+        Add new chunks, embedding the documents if no embeddings are given.
+
+        Args:
+            ids: Unique chunk IDs
+            documents: Chunk texts
+            metadatas: Chunk metadata, including 'source'
+            embeddings: Precomputed chunk embeddings
+        """
+
+    @abstractmethod
+    def upsert(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: Optional[List[List[float]]] = None
+    ) -> None:
+        """Add chunks, replacing any existing chunks with the same IDs."""
+
+    @abstractmethod
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Delete chunks by ID and/or metadata filter.
+
+        Args:
+            ids: Chunk IDs to delete
+            where: Metadata filter selecting chunks to delete
+
+        Returns:
+            int: Number of chunks deleted
+        """
+
+    @abstractmethod
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        include: Include = DEFAULT_INCLUDE
+    ) -> Dict[str, List]:
+        """
+        Fetch chunks by ID and/or metadata filter; all chunks if neither is given.
+
+        Args:
+            ids: Chunk IDs to fetch
+            where: Metadata filter
+            include: Fields to return besides 'ids'
+
+        Returns:
+            Dict[str, List]: Parallel lists keyed by 'ids' and the included fields
+        """
+
+    @abstractmethod
+    def query(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int,
+        where: Optional[Dict[str, Any]] = None,
+        include: Include = DEFAULT_INCLUDE
+    ) -> Dict[str, List[List]]:
+        """
+        Find the nearest chunks for each query embedding.
+
+        Args:
+            query_embeddings: Query vectors
+            n_results: Number of chunks per query
+            where: Metadata filter
+            include: Fields to return besides 'ids'
+
+        Returns:
+            Dict[str, List[List]]: Per query, parallel lists keyed by 'ids' and the
+            included fields, nearest first
+        """
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of chunks in the store."""
+
+    @abstractmethod
+    def list_sources(self) -> Set[str]:
+        """Distinct 'source' values of the stored chunks."""
+
+    def clear(self) -> int:
+        """Delete every chunk, returning how many were deleted."""
+        ids = self.get(include=[])['ids']
+        return self.delete(ids=ids) if ids else 0
+
+    def close(self) -> None:
+        """Release resources held by the store."""
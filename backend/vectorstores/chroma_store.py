@@ -0,0 +1,78 @@
+from typing import Any, Dict, List, Optional, Set
+
+import chromadb
+from chromadb import EmbeddingFunction
+
+from .base import DEFAULT_INCLUDE, Include, VectorStore, check_metadata
+
+class ChromaVectorStore(VectorStore):
+    def __init__(
+        self,
+        path: str,
+        collection_name: str = "documents",
+        embedding_function: Optional[EmbeddingFunction] = None,
+        client=None,
+        metadata: Optional[Dict[str, Any]] = None,
+        host: Optional[str] = None,
+        port: int = 8000
+    ):
+        """
+        VectorStore backed by a ChromaDB collection.
+
+        Args:
+            path (str): Directory of the persistent ChromaDB database
+            collection_name (str): Collection to use. Defaults to "documents".
+            embedding_function (Optional[EmbeddingFunction]): Embeds added documents
+            client: An existing ChromaDB client to use instead of opening path
+            metadata (Optional[Dict[str, Any]]): Embedding settings to record on a new
+                            collection and check against an existing one
+            host (Optional[str]): Connect to a Chroma server on this host instead of opening path
+            port (int): Port of the Chroma server. Defaults to 8000.
+
+        Raises:
+            ValueError: If the collection was created with different settings
+        """
+        if client is None:
+            client = chromadb.HttpClient(host=host, port=port) if host else chromadb.PersistentClient(path=path)
+        self.client = client
+        # Passing metadata here would overwrite an existing collection's on chromadb 0.4,
+        # so the settings are checked against what is stored and only recorded on a new one
+        self.collection = self.client.get_or_create_collection(
+            name=collection_name,
+            embedding_function=embedding_function
+        )
+        if metadata:
+            stored = self.collection.metadata or {}
+            check_metadata(stored, metadata, f"Collection {collection_name!r}")
+            if not stored and self.collection.count() == 0:
+                self.collection.modify(metadata=metadata)
+
+    def add(self, ids, documents, metadatas, embeddings=None) -> None:
+        self.collection.add(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+
+    def upsert(self, ids, documents, metadatas, embeddings=None) -> None:
+        self.collection.upsert(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None) -> int:
+        matched = self.collection.get(ids=ids, where=where, include=[])['ids']
+        if matched:
+            self.collection.delete(ids=matched)
+        return len(matched)
+
+    def get(self, ids=None, where=None, include: Include = DEFAULT_INCLUDE) -> Dict[str, List]:
+        return self.collection.get(ids=ids, where=where, include=list(include))
+
+    def query(self, query_embeddings, n_results, where=None, include: Include = DEFAULT_INCLUDE) -> Dict[str, List[List]]:
+        return self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where,
+            include=list(include)
+        )
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def list_sources(self) -> Set[str]:
+        metadatas = self.collection.get(include=['metadatas'])['metadatas'] or []
+        return {meta['source'] for meta in metadatas if meta and 'source' in meta}
@@ -0,0 +1,435 @@
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+from chromadb import EmbeddingFunction
+
+from .base import DEFAULT_INCLUDE, Include, VectorStore, check_metadata
+
+_log = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.bin"
+LEGACY_VECTORS_FILE = "vectors.f16"  # Name used before the precision became configurable
+OFFSETS_FILE = "offsets.i64"
+RECORDS_FILE = "records.jsonl"
+KEYS_FILE = "keys.jsonl"
+DELETED_FILE = "deleted.i64"
+CONFIG_FILE = "store.json"
+
+PRECISIONS = {"float16": np.float16, "float32": np.float32}
+
+def _matches(value: Any, condition: Any) -> bool:
+    """Evaluate a ChromaDB-style where condition against one metadata value."""
+    if isinstance(condition, dict):
+        if "$in" in condition:
+            return value in condition["$in"]
+        if "$eq" in condition:
+            return value == condition["$eq"]
+        raise ValueError(f"Unsupported where operator: {condition}")
+    return value == condition
+
+class MmapFlatVectorStore(VectorStore):
+    def __init__(
+        self,
+        path: str | Path,
+        embedding_function: Optional[EmbeddingFunction] = None,
+        block_rows: int = 16384,
+        compact_threshold: float = 0.5,
+        precision: str = "float16",
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Append-only flat index of vectors searched by exact dot products.
+
+        Vectors are unit-normalized and appended to a float16 (or float32) matrix file that
+        is memory-mapped read-only, so startup does not copy it and only pages
+        touched by a search count towards RSS. Chunk texts and metadata live in
+        a JSON lines sidecar addressed through a memory-mapped offset table;
+        only chunk IDs and sources are kept in memory. Deletions are recorded
+        as tombstones and the files are compacted once most rows are dead.
+
+        Args:
+            path (str | Path): Directory holding the index files
+            embedding_function (Optional[EmbeddingFunction]): Embeds added documents
+            block_rows (int): Rows scored per block, bounding search memory. Defaults to 16384.
+            compact_threshold (float): Dead row fraction that triggers compaction. Defaults to 0.5.
+            precision (str): "float16" or "float32" storage. Defaults to "float16".
+            metadata (Optional[Dict[str, Any]]): Embedding settings to record on a new
+                            store and check against an existing one
+
+        Raises:
+            ValueError: If an existing store was built with a different precision or settings
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported precision {precision!r}, expected one of {sorted(PRECISIONS)}")
+        self.path = Path(path)
+        retired = self.path.with_name(self.path.name + ".old")
+        if not self.path.exists() and retired.exists():
+            # A compaction was interrupted between its two renames
+            os.replace(retired, self.path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.embedding_function = embedding_function
+        self.block_rows = block_rows
+        self.compact_threshold = compact_threshold
+        self.precision = precision
+        self.metadata = dict(metadata or {})
+        self._lock = threading.RLock()
+        self._load()
+
+    # Loading and appending
+
+    def _load(self) -> None:
+        """Map the index files, dropping any partially written trailing rows."""
+        legacy_path = self.path / LEGACY_VECTORS_FILE
+        if legacy_path.exists() and not (self.path / VECTORS_FILE).exists():
+            # Always float16, which is what a config without a precision means
+            _log.info(f"Renaming {legacy_path} to {VECTORS_FILE}")
+            os.replace(legacy_path, self.path / VECTORS_FILE)
+        config_path = self.path / CONFIG_FILE
+        self.dimension: Optional[int] = None
+        if config_path.exists():
+            with open(config_path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            self.dimension = config.get('dimension')
+            check_metadata(
+                {'precision': config.get('precision', 'float16'), **config.get('metadata', {})},
+                {'precision': self.precision, **self.metadata},
+                f"Vector store {self.path}"
+            )
+            self.metadata = {**config.get('metadata', {}), **self.metadata}
+        else:
+            self._write_config()
+        self._dtype = PRECISIONS[self.precision]
+        row_bytes = np.dtype(self._dtype).itemsize * (self.dimension or 0)
+
+        self._ids: List[str] = []
+        self._sources: List[str] = []
+        self._source_codes: Dict[str, int] = {}
+        codes = []
+        keys_path = self.path / KEYS_FILE
+        key_bytes = []
+        if keys_path.exists():
+            with open(keys_path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    key = json.loads(line)
+                    self._ids.append(key['id'])
+                    codes.append(self._source_code(key['source']))
+                    key_bytes.append(len(line))
+
+        rows = len(self._ids)
+        offsets_path = self.path / OFFSETS_FILE
+        vectors_path = self.path / VECTORS_FILE
+        if offsets_path.exists():
+            rows = min(rows, offsets_path.stat().st_size // 8)
+        else:
+            rows = 0
+        if self.dimension and vectors_path.exists():
+            rows = min(rows, vectors_path.stat().st_size // row_bytes)
+        else:
+            rows = 0
+
+        # Rows are committed once written to every file; cut off anything beyond
+        if rows < len(self._ids):
+            _log.warning(f"Dropping {len(self._ids) - rows} partially written rows from {self.path}")
+            self._ids = self._ids[:rows]
+            codes = codes[:rows]
+            with open(keys_path, 'r+b') as f:
+                f.truncate(sum(key_bytes[:rows]))
+        for file_path, file_row_bytes in ((offsets_path, 8), (vectors_path, row_bytes)):
+            if file_path.exists() and file_path.stat().st_size > rows * file_row_bytes:
+                with open(file_path, 'r+b') as f:
+                    f.truncate(rows * file_row_bytes)
+
+        self._codes = np.asarray(codes, dtype=np.int32)
+        self._alive = np.ones(rows, dtype=bool)
+        deleted_path = self.path / DELETED_FILE
+        if deleted_path.exists():
+            deleted = np.fromfile(deleted_path, dtype=np.int64)
+            self._alive[deleted[deleted < rows]] = False
+        self._row_of = {self._ids[row]: int(row) for row in np.flatnonzero(self._alive)}
+        # Row numbers only stay valid until the files are rewritten
+        self._layout = getattr(self, '_layout', 0) + 1
+        self._map(rows)
+
+    def _write_config(self) -> None:
+        with open(self.path / CONFIG_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'dimension': self.dimension, 'precision': self.precision, 'metadata': self.metadata}, f)
+
+    def _map(self, rows: int) -> None:
+        """Memory-map the first rows of the vector and offset files read-only."""
+        if rows == 0:
+            self._vectors = np.zeros((0, self.dimension or 0), dtype=self._dtype)
+            self._offsets = np.zeros(0, dtype=np.int64)
+            return
+        self._vectors = np.memmap(self.path / VECTORS_FILE, dtype=self._dtype, mode='r', shape=(rows, self.dimension))
+        self._offsets = np.memmap(self.path / OFFSETS_FILE, dtype=np.int64, mode='r', shape=(rows,))
+
+    def _source_code(self, source: str) -> int:
+        code = self._source_codes.get(source)
+        if code is None:
+            code = len(self._sources)
+            self._sources.append(source)
+            self._source_codes[source] = code
+        return code
+
+    def _prepare_vectors(self, documents: List[str], embeddings: Optional[List[List[float]]]) -> np.ndarray:
+        """Embed if needed and unit-normalize, so dot products are cosine similarities."""
+        if embeddings is None:
+            if self.embedding_function is None:
+                raise ValueError("No embeddings given and no embedding function configured")
+            embeddings = self.embedding_function(documents)
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(self._dtype)
+
+    def _append(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]], vectors: np.ndarray) -> None:
+        """Append rows to every file, the vector file last. Caller must hold the lock."""
+        if self.dimension is None:
+            self.dimension = int(vectors.shape[1])
+            self._write_config()
+        elif vectors.shape[1] != self.dimension:
+            raise ValueError(f"Expected {self.dimension}-dimensional embeddings, got {vectors.shape[1]}")
+
+        offsets = []
+        with open(self.path / RECORDS_FILE, 'ab') as f:
+            for document, metadata in zip(documents, metadatas):
+                offsets.append(f.tell())
+                f.write(json.dumps({'document': document, 'metadata': metadata}).encode('utf-8') + b'\n')
+        with open(self.path / OFFSETS_FILE, 'ab') as f:
+            f.write(np.asarray(offsets, dtype=np.int64).tobytes())
+        with open(self.path / KEYS_FILE, 'ab') as f:
+            for doc_id, metadata in zip(ids, metadatas):
+                f.write(json.dumps({'id': doc_id, 'source': (metadata or {}).get('source')}).encode('utf-8') + b'\n')
+        with open(self.path / VECTORS_FILE, 'ab') as f:
+            f.write(np.ascontiguousarray(vectors).tobytes())
+
+        first_row = len(self._ids)
+        self._ids.extend(ids)
+        new_codes = [self._source_code((metadata or {}).get('source')) for metadata in metadatas]
+        self._codes = np.concatenate([self._codes, np.asarray(new_codes, dtype=np.int32)])
+        self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+        for i, doc_id in enumerate(ids):
+            self._row_of[doc_id] = first_row + i
+        self._map(len(self._ids))
+
+    def _tombstone(self, rows: Sequence[int]) -> None:
+        """Mark rows deleted. Caller must hold the lock."""
+        if not len(rows):
+            return
+        rows = np.asarray(rows, dtype=np.int64)
+        with open(self.path / DELETED_FILE, 'ab') as f:
+            f.write(rows.tobytes())
+        self._alive[rows] = False
+        for row in rows:
+            self._row_of.pop(self._ids[row], None)
+
+    # Reading
+
+    def _read_records(self, rows: Sequence[int]) -> List[Dict[str, Any]]:
+        """Read the document and metadata of rows from the sidecar. Caller must hold the lock."""
+        records = []
+        if not len(rows):
+            return records
+        with open(self.path / RECORDS_FILE, 'rb') as f:
+            for row in rows:
+                f.seek(int(self._offsets[row]))
+                records.append(json.loads(f.readline()))
+        return records
+
+    def _where_mask(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        """Live rows matching a where filter. Caller must hold the lock."""
+        mask = self._alive.copy()
+        if not where:
+            return mask
+        for key, condition in where.items():
+            if key == 'source':
+                # Sources are kept in memory, so the common filter never touches the sidecar
+                wanted = [
+                    code for source, code in self._source_codes.items()
+                    if _matches(source, condition)
+                ]
+                mask &= np.isin(self._codes, wanted)
+            else:
+                rows = np.flatnonzero(mask)
+                records = self._read_records(rows)
+                keep = [_matches((record['metadata'] or {}).get(key), condition) for record in records]
+                mask[rows[~np.asarray(keep, dtype=bool)]] = False
+        return mask
+
+    def _rows_result(self, rows: Sequence[int], include: Include) -> Dict[str, List]:
+        """Build a get-style result for rows. Caller must hold the lock."""
+        result: Dict[str, List] = {'ids': [self._ids[row] for row in rows]}
+        if 'documents' in include or 'metadatas' in include:
+            records = self._read_records(rows)
+            if 'documents' in include:
+                result['documents'] = [record['document'] for record in records]
+            if 'metadatas' in include:
+                result['metadatas'] = [record['metadata'] for record in records]
+        if 'embeddings' in include:
+            result['embeddings'] = [self._vectors[row].astype(np.float32).tolist() for row in rows]
+        return result
+
+    # VectorStore interface
+
+    def add(self, ids, documents, metadatas, embeddings=None) -> None:
+        vectors = self._prepare_vectors(documents, embeddings)
+        with self._lock:
+            existing = [doc_id for doc_id in ids if doc_id in self._row_of]
+            if existing:
+                raise ValueError(f"IDs already exist: {existing[:5]}")
+            self._append(list(ids), list(documents), list(metadatas), vectors)
+
+    def upsert(self, ids, documents, metadatas, embeddings=None) -> None:
+        vectors = self._prepare_vectors(documents, embeddings)
+        with self._lock:
+            self._tombstone([self._row_of[doc_id] for doc_id in ids if doc_id in self._row_of])
+            self._append(list(ids), list(documents), list(metadatas), vectors)
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None) -> int:
+        with self._lock:
+            mask = self._where_mask(where)
+            if ids is not None:
+                selected = np.zeros_like(mask)
+                selected[[self._row_of[doc_id] for doc_id in ids if doc_id in self._row_of]] = True
+                mask &= selected
+            rows = np.flatnonzero(mask)
+            self._tombstone(rows)
+            if len(self._ids) and 1 - len(self._row_of) / len(self._ids) > self.compact_threshold:
+                self.compact()
+            return len(rows)
+
+    def get(self, ids=None, where=None, include: Include = DEFAULT_INCLUDE) -> Dict[str, List]:
+        with self._lock:
+            mask = self._where_mask(where)
+            if ids is not None:
+                rows = [self._row_of[doc_id] for doc_id in ids if doc_id in self._row_of]
+                rows = [row for row in rows if mask[row]]
+            else:
+                rows = np.flatnonzero(mask).tolist()
+            return self._rows_result(rows, include)
+
+    def query(self, query_embeddings, n_results, where=None, include: Include = DEFAULT_INCLUDE) -> Dict[str, List[List]]:
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        queries /= norms
+
+        # Scoring runs outside the lock on a snapshot; a compaction meanwhile renumbers
+        # the rows, so scored rows are resolved back through the snapshot's IDs
+        with self._lock:
+            mask = self._where_mask(where)
+            vectors = self._vectors
+            ids = self._ids
+            layout = self._layout
+
+        # Score block by block so float32 copies never exceed block_rows rows
+        k = max(min(n_results, int(mask.sum())), 0)
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        if k:
+            for start in range(0, len(vectors), self.block_rows):
+                block_mask = mask[start:start + self.block_rows]
+                if not block_mask.any():
+                    continue
+                scores = queries @ np.asarray(vectors[start:start + self.block_rows], dtype=np.float32).T
+                scores[:, ~block_mask] = -np.inf
+                rows = np.broadcast_to(np.arange(start, start + len(block_mask)), scores.shape)
+                best_scores = np.concatenate([best_scores, scores], axis=1)
+                best_rows = np.concatenate([best_rows, rows], axis=1)
+                if best_scores.shape[1] > k:
+                    top = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                    best_scores = np.take_along_axis(best_scores, top, axis=1)
+                    best_rows = np.take_along_axis(best_rows, top, axis=1)
+
+        result: Dict[str, List[List]] = {'ids': []}
+        for key in include:
+            result[key] = []
+        with self._lock:
+            renumbered = self._layout != layout
+            for q in range(len(queries)):
+                keep, rows = [], []
+                for i in np.argsort(-best_scores[q]):
+                    if not np.isfinite(best_scores[q][i]):
+                        continue
+                    scored = best_rows[q][i]
+                    row = self._row_of.get(ids[scored])
+                    if row is None:
+                        continue  # Deleted since it was scored
+                    # Replaced under the same ID since it was scored: the score belongs to the old row
+                    if not renumbered and row != scored:
+                        continue
+                    if renumbered and not np.array_equal(self._vectors[row], vectors[scored]):
+                        continue
+                    keep.append(i)
+                    rows.append(row)
+                single = self._rows_result(rows, include)
+                result['ids'].append(single['ids'])
+                for key in include:
+                    if key == 'distances':
+                        result[key].append([float(1.0 - best_scores[q][i]) for i in keep])
+                    else:
+                        result[key].append(single[key])
+        return result
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._row_of)
+
+    def list_sources(self) -> Set[str]:
+        with self._lock:
+            codes = np.unique(self._codes[self._alive])
+            return {self._sources[code] for code in codes if self._sources[code] is not None}
+
+    def clear(self) -> int:
+        with self._lock:
+            deleted = len(self._row_of)
+            self._vectors = self._offsets = None
+            shutil.rmtree(self.path)
+            self.path.mkdir(parents=True)
+            self._load()
+            return deleted
+
+    def compact(self) -> None:
+        """Rewrite the index files without deleted rows."""
+        with self._lock:
+            rows = np.flatnonzero(self._alive)
+            _log.info(f"Compacting {self.path}: keeping {len(rows)} of {len(self._ids)} rows")
+            staging = self.path.with_name(self.path.name + ".compact")
+            shutil.rmtree(staging, ignore_errors=True)
+            compacted = MmapFlatVectorStore(
+                staging,
+                block_rows=self.block_rows,
+                compact_threshold=1.0,
+                precision=self.precision,
+                metadata=self.metadata
+            )
+            for start in range(0, len(rows), self.block_rows):
+                block = rows[start:start + self.block_rows]
+                records = self._read_records(block)
+                compacted._append(
+                    [self._ids[row] for row in block],
+                    [record['document'] for record in records],
+                    [record['metadata'] for record in records],
+                    np.asarray(self._vectors[block])
+                )
+            if compacted.dimension is None and self.dimension is not None:
+                compacted.dimension = self.dimension
+                compacted._write_config()
+            compacted._vectors = compacted._offsets = None
+
+            # Swap directories so a crash leaves either the old or the new index in place
+            self._vectors = self._offsets = None
+            retired = self.path.with_name(self.path.name + ".old")
+            shutil.rmtree(retired, ignore_errors=True)
+            os.replace(self.path, retired)
+            os.replace(staging, self.path)
+            shutil.rmtree(retired, ignore_errors=True)
+            self._load()
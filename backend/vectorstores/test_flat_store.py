@@ -0,0 +1,205 @@
+import resource
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the parent directory to sys.path to allow imports from the backend package
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from backend.vectorstores import MmapFlatVectorStore
+
+DIMENSION = 768
+
+def _rss_mb() -> float:
+    """Current resident set size, falling back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _fill(store: MmapFlatVectorStore, rows: int, rng: np.random.Generator, batch: int = 10000) -> np.ndarray:
+    """Add random chunks in batches, returning the vectors of the first batch."""
+    first = None
+    for start in range(0, rows, batch):
+        end = min(start + batch, rows)
+        vectors = rng.normal(size=(end - start, DIMENSION)).astype(np.float32)
+        first = vectors if first is None else first
+        store.add(
+            ids=[f"doc{i // 100}_chunk_{i % 100}" for i in range(start, end)],
+            documents=[f"chunk text {i}" for i in range(start, end)],
+            metadatas=[{"source": f"doc{i // 100}.pdf", "chunk_index": i % 100} for i in range(start, end)],
+            embeddings=vectors
+        )
+    return first
+
+def test_crud():
+    """Test add, filtered query, delete and reload"""
+    rng = np.random.default_rng(0)
+    tmp_dir = tempfile.TemporaryDirectory()
+    path = Path(tmp_dir.name) / "crud"
+    
+    try:
+        store = MmapFlatVectorStore(path)
+        vectors = _fill(store, 1000, rng)
+        results = store.query(vectors[[5, 250]], n_results=3, include=['documents', 'distances'])
+        scoped = store.query(vectors[[5]], n_results=3, where={"source": "doc2.pdf"})
+        deleted = store.delete(where={"source": "doc0.pdf"})
+        reloaded = MmapFlatVectorStore(path)
+        print("\nCRUD Test:")
+        print(f"Nearest: {results['ids']}")
+        print(f"Scoped to doc2.pdf: {scoped['ids'][0]}")
+        print(f"Deleted {deleted}, {reloaded.count()} chunks after reload")
+        return (
+            results['ids'][0][0] == "doc0_chunk_5"
+            and results['ids'][1][0] == "doc2_chunk_50"
+            and all(doc_id.startswith("doc2_") for doc_id in scoped['ids'][0])
+            and deleted == 100
+            and reloaded.count() == 900
+            and "doc0.pdf" not in reloaded.list_sources()
+        )
+    except Exception as e:
+        print(f"Error in CRUD: {str(e)}")
+        return False
+    finally:
+        tmp_dir.cleanup()
+
+def test_query_during_compaction():
+    """Test that queries racing deletions and compactions return consistent rows"""
+    rng = np.random.default_rng(2)
+    tmp_dir = tempfile.TemporaryDirectory()
+    
+    try:
+        store = MmapFlatVectorStore(Path(tmp_dir.name) / "race", block_rows=256, compact_threshold=0.1)
+        vectors = _fill(store, 5000, rng)
+        stop = threading.Event()
+        mismatches = []
+        
+        def search():
+            while not stop.is_set():
+                try:
+                    results = store.query(vectors[4000:4008], n_results=5, include=['documents'])
+                except Exception as e:
+                    mismatches.append(str(e))
+                    continue
+                for ids, documents in zip(results['ids'], results['documents']):
+                    for doc_id, document in zip(ids, documents):
+                        doc, chunk = doc_id[3:].split("_chunk_")
+                        if document != f"chunk text {int(doc) * 100 + int(chunk)}":
+                            mismatches.append((doc_id, document))
+        
+        searcher = threading.Thread(target=search)
+        searcher.start()
+        try:
+            # Deleting leading documents renumbers every row the queries find
+            for doc in range(0, 39):
+                store.delete(where={"source": f"doc{doc}.pdf"})
+        finally:
+            stop.set()
+            searcher.join()
+        print("\nQuery During Compaction Test:")
+        print(f"{store.count()} chunks left, {len(mismatches)} mismatched results")
+        return not mismatches
+    except Exception as e:
+        print(f"Error in query during compaction: {str(e)}")
+        return False
+    finally:
+        tmp_dir.cleanup()
+
+def test_query_during_replacement():
+    """Test that a chunk replaced under the same ID never carries the old chunk's score"""
+    rng = np.random.default_rng(3)
+    tmp_dir = tempfile.TemporaryDirectory()
+    
+    try:
+        store = MmapFlatVectorStore(Path(tmp_dir.name) / "replace", block_rows=256, compact_threshold=0.2)
+        _fill(store, 1000, rng)
+        # The query matches version "a" exactly and is unrelated to version "b"
+        versions = {"a": rng.normal(size=DIMENSION), "b": rng.normal(size=DIMENSION)}
+        stop = threading.Event()
+        mismatches = []
+        
+        def replace(version: str) -> None:
+            store.upsert(
+                ids=["replaced_chunk_0"],
+                documents=[version],
+                metadatas=[{"source": "replaced.pdf", "chunk_index": 0}],
+                embeddings=[versions[version]]
+            )
+        
+        def search():
+            while not stop.is_set():
+                results = store.query([versions["a"]], n_results=1, include=['documents', 'distances'])
+                for doc_id, document, distance in zip(results['ids'][0], results['documents'][0], results['distances'][0]):
+                    if doc_id == "replaced_chunk_0" and (document == "a") != (distance < 0.01):
+                        mismatches.append((document, distance))
+        
+        replace("a")
+        searcher = threading.Thread(target=search)
+        searcher.start()
+        try:
+            for i in range(2000):
+                replace("ab"[i % 2])
+        finally:
+            stop.set()
+            searcher.join()
+        print("\nQuery During Replacement Test:")
+        print(f"{len(mismatches)} results scored against a replaced chunk")
+        return not mismatches
+    except Exception as e:
+        print(f"Error in query during replacement: {str(e)}")
+        return False
+    finally:
+        tmp_dir.cleanup()
+
+def test_large_index(rows: int = 300000):
+    """Benchmark startup, search latency and RSS on a few hundred thousand chunks"""
+    rng = np.random.default_rng(1)
+    tmp_dir = tempfile.TemporaryDirectory()
+    path = Path(tmp_dir.name) / "large"
+    
+    try:
+        _fill(MmapFlatVectorStore(path), rows, rng)
+        rss_before = _rss_mb()
+        start_time = time.perf_counter()
+        store = MmapFlatVectorStore(path)
+        load_time = time.perf_counter() - start_time
+        
+        query = rng.normal(size=(1, DIMENSION)).astype(np.float32)
+        start_time = time.perf_counter()
+        store.query(query, n_results=10)
+        query_time = time.perf_counter() - start_time
+        rss_after = _rss_mb()
+        
+        print("\nLarge Index Benchmark:")
+        print(f"{store.count()} chunks, {rows * DIMENSION * 2 / 1e6:.0f} MB of float16 vectors on disk")
+        print(f"Load: {load_time:.2f}s, query: {query_time * 1000:.0f} ms")
+        print(f"RSS: {rss_before:.0f} MB before load, {rss_after:.0f} MB after query")
+        return store.count() == rows
+    except Exception as e:
+        print(f"Error in large index: {str(e)}")
+        return False
+    finally:
+        tmp_dir.cleanup()
+
+def main():
+    crud_success = test_crud()
+    race_success = test_query_during_compaction()
+    replace_success = test_query_during_replacement()
+    large_success = test_large_index()
+    
+    # Print overall results
+    print("\nTest Results:")
+    print(f"CRUD Test: {'✓ Passed' if crud_success else '✗ Failed'}")
+    print(f"Query During Compaction Test: {'✓ Passed' if race_success else '✗ Failed'}")
+    print(f"Query During Replacement Test: {'✓ Passed' if replace_success else '✗ Failed'}")
+    print(f"Large Index Benchmark: {'✓ Passed' if large_success else '✗ Failed'}")
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ from docling.document_converter import DocumentConverter, MarkdownFormatOption
 from docling.datamodel.base_models import InputFormat
 from docling.chunking import HybridChunker
 from backend.chunkers import Chunk
-from transformers import AutoTokenizer
+from backend.models import get_tokenizer
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -54,8 +54,8 @@ class MarkdownToChunksWorkflow:
             }
         )
         
-        # Initialize tokenizer and chunker
-        self.tokenizer = AutoTokenizer.from_pretrained(model_id)
+        # Initialize tokenizer and chunker; HybridChunker needs the HuggingFace tokenizer itself
+        self.tokenizer = get_tokenizer(model_id).tokenizer
         self.chunker = HybridChunker(
             tokenizer=self.tokenizer,
             max_tokens=max_tokens,
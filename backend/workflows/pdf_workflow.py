@@ -1,10 +1,11 @@
 import logging
 import time
+from io import BytesIO
 from pathlib import Path
-from typing import List
+from typing import Callable, List, Optional
 
 from docling_core.types.doc import ImageRefMode
-from docling.datamodel.base_models import InputFormat
+from docling.datamodel.base_models import DocumentStream, InputFormat
 from docling.datamodel.pipeline_options import PdfPipelineOptions
 from docling.document_converter import DocumentConverter, PdfFormatOption
 from backend.chunkers import SimpleChunker, Chunk
@@ -15,15 +16,39 @@ _log = logging.getLogger(__name__)
 
 IMAGE_RESOLUTION_SCALE = 2.0
 
+def _single_page_pdf(text: str) -> bytes:
+    """Build a minimal one-page PDF showing a line of text."""
+    stream = f"BT /F1 24 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+    ]
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref_offset = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    pdf += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    return pdf
+
 class PdfToChunksWorkflow:
-    def __init__(self, max_chunk_size: int = 512):
+    def __init__(self, max_chunk_size: int = 512, tokenizer_model: str = "sentence-transformers/all-MiniLM-L6-v2"):
         """
         Initialize the workflow with configurable chunk size.
         
         Args:
             max_chunk_size (int): Maximum size for each text chunk. Defaults to 512.
+            tokenizer_model (str): Model whose tokenizer chunk sizes are measured with.
+                            Defaults to "sentence-transformers/all-MiniLM-L6-v2".
         """
-        self.chunker = SimpleChunker(max_chunk_size=max_chunk_size)
+        self.chunker = SimpleChunker(max_chunk_size=max_chunk_size, model_name=tokenizer_model)
         
         # Setup PDF converter with image options
         pipeline_options = PdfPipelineOptions()
@@ -37,6 +62,17 @@ class PdfToChunksWorkflow:
             }
         )
 
+    def warm_up(self) -> None:
+        """
+        Convert and chunk a one-page PDF in memory.
+        
+        Docling loads its layout and table models on the first conversion;
+        doing it here keeps that cost out of the first real upload.
+        """
+        source = DocumentStream(name="warm-up.pdf", stream=BytesIO(_single_page_pdf("Warm-up page")))
+        conv_result = self.doc_converter.convert(source)
+        self.chunker.chunk_text(conv_result.document.export_to_markdown())
+
     async def _save_page_images(self, conv_result, output_dir: Path, doc_filename: str):
         """
         Save page images from conversion result.
@@ -118,17 +154,25 @@ class PdfToChunksWorkflow:
         
         return chunks
 
-    def process(self, pdf_path: str | Path, output_dir: str | Path = None) -> List[Chunk]:
+    def process(
+        self,
+        pdf_path: str | Path,
+        output_dir: str | Path = None,
+        progress: Optional[Callable[[str, int, int], None]] = None
+    ) -> List[Chunk]:
         """
         Process a PDF file and return chunks of text synchronously.
         
         Args:
             pdf_path: Path to the PDF file
             output_dir: Directory to save markdown and images (defaults to 'scratch_{pdf_name}')
+            progress: Called with (stage, current, total) as processing advances;
+                      an exception it raises aborts processing
             
         Returns:
             List of Chunk objects containing the chunked text
         """
+        report = progress or (lambda stage, current, total: None)
         if isinstance(pdf_path, str):
             pdf_path = Path(pdf_path)
             
@@ -145,11 +189,14 @@ class PdfToChunksWorkflow:
         
         # Convert PDF
         _log.info("Converting PDF...")
+        report("converting", 0, 0)
         conv_result = self.doc_converter.convert(pdf_path)
         doc_filename = conv_result.input.file.stem
         
         # Save page images
-        for page_no, page in conv_result.document.pages.items():
+        pages = conv_result.document.pages
+        for done, (page_no, page) in enumerate(pages.items()):
+            report("exporting", done, len(pages))
             page_image_filename = output_dir / f"{doc_filename}-{page_no}.png"
             with page_image_filename.open("wb") as fp:
                 page.image.pil_image.save(fp, format="PNG")
@@ -166,6 +213,7 @@ class PdfToChunksWorkflow:
         
         # Chunk the content
         _log.info("Chunking content...")
+        report("chunking", 0, 0)
         chunks = self.chunker.chunk_text(content)
         
         end_time = time.time() - start_time
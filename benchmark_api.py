@@ -0,0 +1,93 @@
+"""
+Measure query throughput of a running RAG API.
+
+Start the server (e.g. `python run.py --workers 4`), upload a document,
+then run:
+
+    python benchmark_api.py --document arena_learning.pdf --concurrency 16 --duration 60
+
+Run it once against `python run.py` and once against `python run.py --workers N`
+with the same document and settings to compare the two modes.
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+QUESTIONS = [
+    "What is the main contribution of this document?",
+    "Summarize the methodology.",
+    "What datasets are used?",
+    "What are the key results?",
+    "What limitations are mentioned?",
+    "How does the approach compare to prior work?",
+]
+
+def post(url: str, body: dict, timeout: float = 300.0):
+    """POST a JSON body, returning the status code and decoded response."""
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RAG API query throughput")
+    parser.add_argument("--url", default="http://localhost:3456/api/v1", help="API base URL")
+    parser.add_argument("--document", required=True, help="Name of an uploaded document to chat with")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to run")
+    parser.add_argument("--unique", action="store_true", help="Make every question unique to bypass answer caches")
+    args = parser.parse_args()
+
+    status, chat = post(f"{args.url}/chats", {"title": "benchmark", "document_name": args.document})
+    if status != 200:
+        raise SystemExit(f"Could not create a chat session (HTTP {status})")
+    query_url = f"{args.url}/chats/{chat['id']}/query"
+
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    counter = iter(range(10**9))
+    deadline = time.monotonic() + args.duration
+
+    def client():
+        while time.monotonic() < deadline:
+            i = next(counter)
+            question = QUESTIONS[i % len(QUESTIONS)]
+            if args.unique:
+                question = f"{question} (#{i})"
+            start = time.perf_counter()
+            status, _ = post(query_url, {"question": question})
+            elapsed = time.perf_counter() - start
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == 200:
+                    latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for _ in range(args.concurrency):
+            executor.submit(client)
+    wall = time.perf_counter() - start
+
+    print(f"\nConcurrency: {args.concurrency}, duration: {wall:.1f}s")
+    print(f"Responses by status: {dict(sorted(statuses.items()))}")
+    if latencies:
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"Throughput: {len(latencies) / wall:.2f} req/s")
+        print(f"Latency p50: {statistics.median(latencies) * 1000:.0f}ms, p95: {p95 * 1000:.0f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ const config = {
       documents: '/api/v1/documents',
       chats: '/api/v1/chats',
       chatQuery: (chatId) => `/api/v1/chats/${chatId}/query`,
+      job: (jobId) => `/api/v1/jobs/${jobId}`,
     },
   },
   upload: {
@@ -13,6 +14,7 @@ const config = {
       'application/pdf': ['.pdf'],
     },
     maxFileSize: 50 * 1024 * 1024, // 50MB
+    jobPollInterval: 1000, // ms between ingestion progress checks
   },
   suggestions: {
     defaultQuestions: [
@@ -8,7 +8,13 @@ const api = axios.create({
   },
 });
 
-export const uploadDocument = async (file) => {
+export const getJob = async (jobId) => {
+  const response = await api.get(config.api.endpoints.job(jobId));
+  return response.data;
+};
+
+// Upload a document and wait until its ingestion job finishes
+export const uploadDocument = async (file, onProgress) => {
   const formData = new FormData();
   formData.append('file', file);
 
@@ -17,7 +23,17 @@ export const uploadDocument = async (file) => {
       'Content-Type': 'multipart/form-data',
     },
   });
-  return response.data;
+
+  let job = await getJob(response.data.job_id);
+  while (job.status === 'queued' || job.status === 'running') {
+    if (onProgress) onProgress(job);
+    await new Promise((resolve) => setTimeout(resolve, config.upload.jobPollInterval));
+    job = await getJob(job.id);
+  }
+  if (job.status !== 'completed') {
+    throw new Error(job.error || `Ingestion ${job.status}`);
+  }
+  return job;
 };
 
 export const queryDocument = async (chatId, question, n_results = 5) => {
@@ -65,14 +81,15 @@ export const withErrorHandler = async (apiCall) => {
       // The request was made but no response was received
       throw new Error('No response from server');
     } else {
-      // Something happened in setting up the request that triggered an Error
-      throw new Error('Error setting up request');
+      // Setting up the request failed, or a finished job reported an error
+      throw new Error(error.message || 'Error setting up request');
     }
   }
 };
 
 export default {
   uploadDocument,
+  getJob,
   queryDocument,
   listDocuments,
   withErrorHandler,
@@ -3,13 +3,12 @@ import logging
 from pathlib import Path
 from typing import List, Optional
 
-import chromadb
-from chromadb.utils import embedding_functions
 import torch
-from transformers import AutoTokenizer
 from backend.chunkers import Chunk
+from backend.embeddings import SharedSentenceTransformerEmbeddingFunction
 from backend.workflows.pdf_workflow import PdfToChunksWorkflow
 from backend.llm import FastMLXEndpoint
+from backend.vectorstores import ChromaVectorStore, MmapFlatVectorStore, VectorStore
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -17,34 +16,41 @@ _log = logging.getLogger(__name__)
 
 # Constants
 COLLECTION_NAME = "documents"
+CHROMA_DB_PATH = "./chroma_db"
+FLAT_STORE_PATH = "./flat_store"
 EMBEDDING_MODEL = "ibm-granite/granite-embedding-278m-multilingual"
 CHUNK_SIZE = 512
 MLX_MODEL = "mlx-community/Llama-3.2-3B-Instruct-4bit"
 MLX_URL = "http://localhost:8000/v1"
 
 class RAGApp:
-    def __init__(self):
-        # Initialize ChromaDB
-        self.chroma_client = chromadb.PersistentClient(path="./chroma_db")
-        self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
+    def __init__(self, store: str = "chroma"):
+        self.embedding_function = SharedSentenceTransformerEmbeddingFunction(
             model_name=EMBEDDING_MODEL
         )
-        self.collection = self.chroma_client.get_or_create_collection(
-            name=COLLECTION_NAME,
-            embedding_function=self.embedding_function
-        )
+        
+        # Initialize the vector store
+        self.vector_store: VectorStore
+        if store == "flat":
+            self.vector_store = MmapFlatVectorStore(
+                path=FLAT_STORE_PATH,
+                embedding_function=self.embedding_function
+            )
+        else:
+            self.vector_store = ChromaVectorStore(
+                path=CHROMA_DB_PATH,
+                collection_name=COLLECTION_NAME,
+                embedding_function=self.embedding_function
+            )
         
         # Initialize PDF workflow
-        self.pdf_workflow = PdfToChunksWorkflow(max_chunk_size=CHUNK_SIZE)
+        self.pdf_workflow = PdfToChunksWorkflow(max_chunk_size=CHUNK_SIZE, tokenizer_model=EMBEDDING_MODEL)
         
         # Initialize MLX endpoint
         self.llm = FastMLXEndpoint(
             api_key="test-key",  # Replace with actual key if needed
             url_base=MLX_URL
         )
-        
-        # Initialize tokenizer for chunking
-        self.tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL)
 
     def ingest_pdf(self, pdf_path: str | Path) -> None:
         """Ingest a PDF file into the vector database."""
@@ -53,12 +59,12 @@ class RAGApp:
         # Process PDF and get chunks
         chunks = self.pdf_workflow.process(pdf_path)
         
-        # Add chunks to ChromaDB
+        # Add chunks to the vector store
         texts = [chunk.content for chunk in chunks]
-        ids = [f"chunk_{i}" for i in range(len(chunks))]
+        ids = [f"{Path(pdf_path).stem}_chunk_{i}" for i in range(len(chunks))]
         metadatas = [{"source": str(pdf_path), "chunk_index": i} for i in range(len(chunks))]
         
-        self.collection.add(
+        self.vector_store.add(
             documents=texts,
             ids=ids,
             metadatas=metadatas
@@ -69,9 +75,9 @@ class RAGApp:
         """Query the vector database and generate a response."""
         _log.info(f"Processing query: {question}")
         
-        # Get relevant chunks from ChromaDB
-        results = self.collection.query(
-            query_texts=[question],
+        # Get relevant chunks from the vector store
+        results = self.vector_store.query(
+            query_embeddings=self.embedding_function([question]),
             n_results=n_results
         )
         
@@ -123,9 +129,8 @@ def interactive_mode(app: RAGApp):
                     
             elif user_input.lower() == 'docs':
                 # Get unique document sources
-                results = app.collection.get(include=['metadatas'])
-                if results and results['metadatas']:
-                    sources = {meta['source'] for meta in results['metadatas']}
+                sources = app.vector_store.list_sources()
+                if sources:
                     print("\nIngested documents:")
                     for source in sources:
                         print(f"  - {source}")
@@ -146,10 +151,11 @@ def main():
     parser = argparse.ArgumentParser(description="RAG CLI Application")
     parser.add_argument("--ingest", type=str, help="Path to PDF file to ingest")
     parser.add_argument("--interactive", action="store_true", help="Run in interactive mode")
+    parser.add_argument("--store", choices=["chroma", "flat"], default="chroma", help="Vector store backend")
     
     args = parser.parse_args()
     
-    app = RAGApp()
+    app = RAGApp(store=args.store)
     
     if args.ingest:
         app.ingest_pdf(args.ingest)
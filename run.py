@@ -1,11 +1,114 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
 import uvicorn
 from app.config import settings
 
+EMBEDDING_SOCKET = "./data/embeddings.sock"
+STARTUP_TIMEOUT = 300
+
+def wait_for_chroma(host: str, port: int, timeout: float) -> None:
+    """Poll the Chroma server's heartbeat until it answers."""
+    import chromadb
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            chromadb.HttpClient(host=host, port=port).heartbeat()
+            return
+        except Exception as e:
+            if time.monotonic() >= deadline:
+                raise RuntimeError(f"Chroma server on {host}:{port} did not start: {e}")
+            time.sleep(0.5)
+
+def start_shared_services() -> list:
+    """
+    Start the Chroma server and embedding service shared by the API workers.
+
+    Services already configured through CHROMA_SERVER_HOST or
+    EMBEDDING_SERVICE_SOCKET are reused rather than started. The
+    environment is updated so the workers connect to them.
+
+    Returns:
+        list: The started subprocesses
+    """
+    from backend.embeddings import EmbeddingServiceClient
+
+    processes = []
+    if not settings.CHROMA_SERVER_HOST:
+        print(f"Starting Chroma server on port {settings.CHROMA_SERVER_PORT}...")
+        processes.append(subprocess.Popen([
+            "chroma", "run",
+            "--path", settings.CHROMA_DB_PATH,
+            "--host", "127.0.0.1",
+            "--port", str(settings.CHROMA_SERVER_PORT)
+        ]))
+        os.environ["CHROMA_SERVER_HOST"] = "127.0.0.1"
+    wait_for_chroma(os.environ["CHROMA_SERVER_HOST"], settings.CHROMA_SERVER_PORT, STARTUP_TIMEOUT)
+
+    socket_path = settings.EMBEDDING_SERVICE_SOCKET
+    if not socket_path:
+        socket_path = EMBEDDING_SOCKET
+        print(f"Starting embedding service on {socket_path}...")
+        processes.append(subprocess.Popen([
+            sys.executable, "-m", "backend.embeddings.service",
+            "--socket", socket_path,
+            "--model", settings.EMBEDDING_MODEL,
+            "--workers", str(settings.EMBEDDING_WORKERS or 1),
+            "--backend", settings.EMBEDDING_BACKEND,
+            "--onnx-dir", settings.ONNX_MODEL_DIR
+        ], env={**os.environ, "EMBEDDING_SERVICE_AUTHKEY": settings.EMBEDDING_SERVICE_AUTHKEY}))
+        os.environ["EMBEDDING_SERVICE_SOCKET"] = str(Path(socket_path).resolve())
+    EmbeddingServiceClient(
+        socket_path,
+        authkey=settings.EMBEDDING_SERVICE_AUTHKEY.encode(),
+        connect_timeout=STARTUP_TIMEOUT
+    )
+    return processes
+
+def stop_processes(processes: list) -> None:
+    """Terminate subprocesses, killing any that do not exit promptly."""
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
 if __name__ == "__main__":
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=settings.PORT,
-        reload=True,  # Enable auto-reload during development
-        log_level="info"
+    parser = argparse.ArgumentParser(description="Run the RAG API")
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="API worker processes. More than one shares a Chroma server and an embedding service"
     )
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=settings.PORT,
+            reload=True,  # Enable auto-reload during development
+            log_level="info"
+        )
+        sys.exit(0)
+
+    if settings.VECTOR_STORE != "chroma":
+        sys.exit(f"VECTOR_STORE={settings.VECTOR_STORE!r} cannot be shared between workers; use 'chroma'")
+
+    processes = start_shared_services()
+    try:
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=settings.PORT,
+            workers=args.workers,
+            log_level="info"
+        )
+    finally:
+        stop_processes(processes)